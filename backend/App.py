@@ -1,11 +1,96 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.routing import APIRoute
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import Instance
-import Network
-import Router
-import LoadBalancer
+import AsyncInstance
+import AsyncNetwork
+import AsyncRouter
+import AsyncLoadBalancer
+import AsyncClient
+import Client
+import Jobs
+import Waiter
+import Reference
+import Topology
+import Watch
+import Inventory
+import Metrics
+import Throttle
+import Idempotency
+import Autoscaler
+import Standby
+import Drain
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await Reference.start()
+    yield
+    Autoscaler.stop_all()
+    Standby.stop_all()
+    await Reference.stop()
+    await Jobs.shutdown()
+    await AsyncClient.aclose()
+
+# Endpoint tạo tài nguyên nhận header Idempotency-Key: gửi lại cùng key -> trả lại kết quả lần đầu, không tạo thêm
+IDEMPOTENT_ENDPOINTS = {
+    "/create_vm", "/scale_up", "/create_network", "/create_networks", "/create_router",
+    "/attach_floating_ip", "/create_lb", "/create_listener", "/create_pool", "/create_lb_stack",
+}
+
+class IdempotentRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if self.path not in IDEMPOTENT_ENDPOINTS:
+            return handler
+
+        async def idempotent_handler(request):
+            key = request.headers.get(Idempotency.HEADER)
+            if not key:
+                return await handler(request)
+            if len(key) > Idempotency.MAX_KEY_LENGTH:
+                return JSONResponse(status_code=400, content={"detail": f"{Idempotency.HEADER} quá dài"})
+            body = await request.body()
+            fingerprint = Idempotency.fingerprint(request.method, request.url.path, request.url.query, body)
+
+            async def execute():
+                try:
+                    return await handler(request)
+                except HTTPException as e:
+                    # Lỗi 4xx là kết quả xác định của request -> lưu để phát lại như thành công
+                    return JSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=e.headers)
+
+            try:
+                response, replayed = await Idempotency.run(
+                    key, fingerprint, execute, keep=lambda r: r.status_code < 500)
+            except Idempotency.KeyReused as e:
+                return JSONResponse(status_code=422, content={"detail": str(e)})
+            headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+            headers[Idempotency.HEADER] = key
+            if replayed:
+                headers["Idempotent-Replayed"] = "true"
+            return Response(content=response.body, status_code=response.status_code, headers=headers)
+
+        return idempotent_handler
+
+app = FastAPI(title="OpenStack VM API", lifespan=lifespan)
+app.router.route_class = IdempotentRoute
+
+@app.exception_handler(Throttle.CircuitOpenError)
+async def circuit_open_handler(request, exc):
+    # Service upstream đang bị ngắt mạch -> báo 503 ngay thay vì chờ timeout
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "service": exc.service_type},
+        headers={"Retry-After": str(max(int(exc.retry_after + 0.999), 1))}
+    )
 
-app = FastAPI(title="OpenStack VM API")
+# Client /watch không nhận sự kiện nào trong chừng này giây thì gửi comment giữ kết nối
+WATCH_HEARTBEAT = 15
 
 # ==== MODELS ====
 
@@ -14,11 +99,26 @@ class CreateVMRequest(BaseModel):
     network_name: str
     key_name: str | None = None
     user_data: str | None = None
+    flavor: str | None = None
+    image: str | None = None
+    security_group: str = "default"
+    wait: bool = False
+    wait_timeout: float = 600
 
 class ScaleRequest(BaseModel):
     base_instance_name: str
     subnet_id: str
     count: int = 1
+    mode: str | None = "auto"
+    concurrency: int | None = None
+    use_standby: bool = True
+    policy: str = "newest"
+    pool: str | None = None
+    member_port: int = 80
+    member_subnet_id: str | None = None
+    drain_timeout: float | None = None
+    wait: bool = False
+    wait_timeout: float = 300
 
 class DeleteVMRequest(BaseModel):
     name: str
@@ -29,6 +129,15 @@ class CreateNetworkRequest(BaseModel):
     subnet_name: str | None = None
     gateway_ip: str | None = None
 
+class NetworkSpec(BaseModel):
+    name: str
+    cidr: str
+    subnet_name: str | None = None
+    gateway_ip: str | None = None
+
+class CreateNetworksRequest(BaseModel):
+    networks: list[NetworkSpec]
+
 class DeleteNetworkRequest(BaseModel):
     name: str
 
@@ -68,74 +177,246 @@ class CreatePoolRequest(BaseModel):
     protocol: str | None = "HTTP"
     lb_algorithm: str | None = "ROUND_ROBIN"
 
+class CreateLBStackRequest(BaseModel):
+    name: str
+    vip_subnet_id: str
+    servers: list[str] = []
+    member_subnet_id: str | None = None
+    protocol: str = "HTTP"
+    protocol_port: int = 80
+    member_port: int | None = None
+    lb_algorithm: str = "ROUND_ROBIN"
+    healthmonitor: dict | bool | None = None
+
 class DeleteLBRequest(BaseModel):
     name: str
+    cascade: bool = True
+
+class StartAutoscalerRequest(BaseModel):
+    name: str
+    base_instance_name: str
+    subnet_id: str
+    metric: dict
+    pool: str | None = None
+    member_port: int = 80
+    member_subnet_id: str | None = None
+    min_size: int = 1
+    max_size: int = 5
+    target: float = 100.0
+    tolerance: float = 0.2
+    max_step: int = 2
+    up_cooldown: float = 60
+    down_cooldown: float = 300
+    breaches: int = 2
+    interval: float | None = None
+    victim_policy: str = "newest"
+    drain_timeout: float | None = None
+
+class StopAutoscalerRequest(BaseModel):
+    name: str
+
+class PushMetricRequest(BaseModel):
+    name: str
+    value: float
+
+class ServerConnectionsRequest(BaseModel):
+    server: str
+    connections: float
+
+class StandbyPoolRequest(BaseModel):
+    base_instance_name: str
+    subnet_id: str
+    size: int
+    mode: str = "paused"
+
+
+
+# ==== JOBS ====
 
+async def _run(background, kind, fn):
+    # background=true: trả job_id ngay, công việc chạy nền và xem kết quả ở /jobs/{id}
+    if background:
+        job = Jobs.submit(kind, fn)
+        return JSONResponse(status_code=202, content={"job_id": job["id"], "status": job["status"]})
+    return await fn()
+
+@app.get("/jobs")
+async def get_jobs(status: str | None = None):
+    return Jobs.list_jobs(status)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = Jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy job")
+    return job
 
 
 # ==== EXISTING ====
 
+async def _stream_items(first_page, pages, ndjson):
+    # Gửi từng trang ngay khi nhận được từ upstream, bộ nhớ chỉ giữ một trang
+    first = True
+    if not ndjson:
+        yield "["
+    page = first_page
+    while page is not None:
+        for item in page:
+            if ndjson:
+                yield json.dumps(item) + "\n"
+            else:
+                yield ("" if first else ",") + json.dumps(item)
+            first = False
+        page = await anext(pages, None)
+    if not ndjson:
+        yield "]"
+
+async def _stream_pages(pages, format):
+    # Trang đầu lỗi thì trả về null như trước, không mở stream
+    first_page = await anext(pages, None)
+    if first_page is None:
+        return None
+    ndjson = format == "ndjson"
+    return StreamingResponse(
+        _stream_items(first_page, pages, ndjson),
+        media_type="application/x-ndjson" if ndjson else "application/json"
+    )
+
+async def _no_more_pages():
+    return
+    yield
+
+async def _inventory_response(request, kind, format, since):
+    try:
+        snapshot = await Inventory.snapshot(kind)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return None
+    headers = {"ETag": f'"{snapshot["etag"]}"', "Cache-Control": "no-cache"}
+    if Inventory.matches(request.headers.get("if-none-match"), snapshot["etag"]):
+        return Response(status_code=304, headers=headers)
+    if since is not None:
+        since = since.removeprefix("W/").strip('"')
+        delta = Inventory.delta(kind, snapshot, since)
+        if delta is None:
+            # Phiên bản quá cũ hoặc không hợp lệ: trả toàn bộ dưới dạng added, client thay hẳn trạng thái
+            delta = {"etag": snapshot["etag"], "since": since, "reset": True,
+                     "added": snapshot["items"], "changed": [], "removed": []}
+        return JSONResponse(delta, headers=headers)
+    ndjson = format == "ndjson"
+    return StreamingResponse(
+        _stream_items(snapshot["items"], _no_more_pages(), ndjson),
+        media_type="application/x-ndjson" if ndjson else "application/json",
+        headers=headers
+    )
+
 @app.get("/vms")
-def get_vms():
-    return Instance.list_instances()
+async def get_vms(request: Request, format: str = "json", limit: int | None = None, since: str | None = None):
+    # limit: phân trang upstream theo từng trang như cũ (không có ETag); còn lại dùng ảnh chụp có ETag
+    if limit is not None:
+        return await _stream_pages(AsyncInstance.iter_instances(limit), format)
+    return await _inventory_response(request, "servers", format, since)
 
 @app.get("/networks")
-def get_networks():
-    return Network.list_networks    ()
+async def get_networks(request: Request, format: str = "json", limit: int | None = None, since: str | None = None):
+    if limit is not None:
+        return await _stream_pages(AsyncNetwork.iter_networks(limit), format)
+    return await _inventory_response(request, "networks", format, since)
 
 @app.post("/create_vm")
-def api_create_vm(req: CreateVMRequest):
-    server = Instance.create_vm(
-        name=req.name,
-        network_name=req.network_name,
-        keypair_name=req.key_name,
-        user_data_str=req.user_data
-    )
-    return {
-        "id": server.get("id"),
-        "name": server.get("name"),
-        "status": server.get("status", "BUILD")
-    }
+async def api_create_vm(req: CreateVMRequest, background: bool = False):
+    async def run():
+        server = await AsyncInstance.create_vm(
+            name=req.name,
+            network_name=req.network_name,
+            keypair_name=req.key_name,
+            user_data_str=req.user_data,
+            wait=req.wait,
+            wait_timeout=req.wait_timeout,
+            flavor=req.flavor,
+            image=req.image,
+            security_group=req.security_group
+        )
+        Inventory.invalidate("servers")
+        if server is None:
+            raise HTTPException(status_code=400, detail="Không tạo được VM")
+        return {
+            "id": server.get("id"),
+            "name": server.get("name"),
+            "status": server.get("status", "BUILD")
+        }
+    return await _run(background, "create_vm", run)
 
 @app.post("/scale_up")
-def api_scale_up(req: ScaleRequest):
-    created_vms = Instance.scale_up(
-        base_instance_name = req.base_instance_name,
-        subnet_id = req.subnet_id,
-    )
-    return {
-        "success": True,
-        "base_instance": req.base_instance_name,
-        "created_clones": created_vms,
-        "count": len(created_vms)
-    }
+async def api_scale_up(req: ScaleRequest, background: bool = False):
+    async def run():
+        results = await AsyncInstance.scale_up(
+            base_instance_name = req.base_instance_name,
+            subnet_id = req.subnet_id,
+            count = req.count,
+            mode = req.mode,
+            concurrency = req.concurrency,
+            use_standby = req.use_standby,
+            pool = req.pool,
+            member_port = req.member_port,
+            member_subnet_id = req.member_subnet_id
+        )
+        Inventory.invalidate("servers")
+        created_vms = [r["name"] for r in results or [] if r["success"]]
+        return {
+            "success": results is not None,
+            "base_instance": req.base_instance_name,
+            "created_clones": created_vms,
+            "count": len(created_vms),
+            "results": results or []
+        }
+    return await _run(background, "scale_up", run)
 
 @app.post("/scale_down")
-def api_scale_down(req: ScaleRequest):
-    deleted_vms = Instance.scale_down(req.base_instance_name)
-    return {
-        "success": True,
-        "base_instance": req.base_instance_name,
-        "deleted_clones": deleted_vms,
-        "count": len(deleted_vms)
-    }
+async def api_scale_down(req: ScaleRequest, background: bool = False):
+    if req.policy not in Drain.POLICIES:
+        raise HTTPException(status_code=400, detail=f"policy phải là một trong {Drain.POLICIES}")
+
+    async def run():
+        results = await AsyncInstance.scale_down(
+            base_instance_name = req.base_instance_name,
+            count = req.count,
+            concurrency = req.concurrency,
+            wait = req.wait,
+            wait_timeout = req.wait_timeout,
+            policy = req.policy,
+            pool = req.pool,
+            drain_timeout = req.drain_timeout
+        )
+        Inventory.invalidate("servers")
+        deleted_vms = [r["name"] for r in results or [] if r["success"]]
+        return {
+            "success": results is not None,
+            "base_instance": req.base_instance_name,
+            "deleted_clones": deleted_vms,
+            "count": len(deleted_vms),
+            "results": results or []
+        }
+    return await _run(background, "scale_down", run)
 
 @app.post("/delete_vm")
-def api_delete_vm(req: DeleteVMRequest):
-    success = Instance.delete_instance(req.name)
+async def api_delete_vm(req: DeleteVMRequest):
+    success = await AsyncInstance.delete_instance(req.name)
+    Inventory.invalidate("servers")
     return {
         "deleted_vm": req.name,
         "success": success
     }
 
 @app.post("/create_network")
-def api_create_network(req: CreateNetworkRequest):
-    result = Network.create_network(
+async def api_create_network(req: CreateNetworkRequest):
+    result = await AsyncNetwork.create_network(
         name=req.name,
         cidr=req.cidr,
         subnet_name=req.subnet_name,
         gateway_ip=req.gateway_ip
     )
+    Inventory.invalidate("networks")
     network = result.get("network")
     subnet = result.get("subnet")
     return {
@@ -145,17 +426,33 @@ def api_create_network(req: CreateNetworkRequest):
         "subnet_name": subnet.get("name") if subnet else None,
     }
 
+@app.post("/create_networks")
+async def api_create_networks(req: CreateNetworksRequest):
+    result = await AsyncNetwork.create_networks([spec.model_dump() for spec in req.networks])
+    Inventory.invalidate("networks")
+    # Bị từ chối trước khi tạo được gì (spec sai hoặc Neutron từ chối lô network) -> 400
+    if not result["success"] and "rolled_back" not in result:
+        raise HTTPException(status_code=400, detail=result["errors"])
+    return {
+        "success": result["success"],
+        "networks": [{"id": n["id"], "name": n["name"]} for n in result["networks"]],
+        "subnets": [{"id": s["id"], "name": s["name"], "cidr": s["cidr"]} for s in result["subnets"]],
+        "errors": result["errors"],
+        "rolled_back": result.get("rolled_back", []),
+    }
+
 @app.post("/delete_network")
-def api_delete_network(req: DeleteNetworkRequest):
-    success = Network.delete_network(req.name)
+async def api_delete_network(req: DeleteNetworkRequest):
+    success = await AsyncNetwork.delete_network(req.name)
+    Inventory.invalidate("networks")
     return {
         "deleted_network": req.name,
         "success": success
     }
 
 @app.post("/create_router")
-def api_create_router(req: CreateRouterRequest):
-    router = Router.create_router(
+async def api_create_router(req: CreateRouterRequest):
+    router = await AsyncRouter.create_router(
         router_name=req.router_name,
         external_network_name=req.external_network_name
     )
@@ -167,16 +464,16 @@ def api_create_router(req: CreateRouterRequest):
     
 
 @app.post("/delete_router")
-def api_delete_router(req: DeleteRouterRequest):
-    success = Router.delete_router(req.router_name)
+async def api_delete_router(req: DeleteRouterRequest):
+    success = await AsyncRouter.delete_router(req.router_name)
     return {
         "deleted_router": req.router_name,
         "success": success
     }
 
 @app.post("/add_interface")
-def api_add_interface(req: AddInterfaceRequest):
-    success = Router.add_interface(
+async def api_add_interface(req: AddInterfaceRequest):
+    success = await AsyncRouter.add_interface(
         router_name=req.router_name,
         subnet_name=req.subnet_name
     )
@@ -187,8 +484,8 @@ def api_add_interface(req: AddInterfaceRequest):
     }
 
 @app.post("/remove_interface")
-def api_remove_interface(req: RemoveInterfaceRequest):
-    success = Router.remove_interface(
+async def api_remove_interface(req: RemoveInterfaceRequest):
+    success = await AsyncRouter.remove_interface(
         router_name=req.router_name,
         subnet_name=req.subnet_name
     )
@@ -199,8 +496,8 @@ def api_remove_interface(req: RemoveInterfaceRequest):
     }
 
 @app.post("/attach_floating_ip")
-def api_attach_floating_ip(req: AttachFloatingIPRequest):
-    floating_ip = Instance.attach_floating_ip(
+async def api_attach_floating_ip(req: AttachFloatingIPRequest):
+    floating_ip = await AsyncInstance.attach_floating_ip(
         server_name=req.server_name,
         floating_ip=req.floating_ip
     )
@@ -210,8 +507,8 @@ def api_attach_floating_ip(req: AttachFloatingIPRequest):
     }
 
 @app.post("/create_lb")
-def api_create_lb(req: CreateLBRequest):
-    lb = LoadBalancer.create_lb(
+async def api_create_lb(req: CreateLBRequest):
+    lb = await AsyncLoadBalancer.create_lb(
         name=req.name,
         vip_subnet_id= req.vip_subnet_id,
         description=req.description
@@ -223,8 +520,8 @@ def api_create_lb(req: CreateLBRequest):
     }
 
 @app.post("/create_listener")
-def api_create_listener(req: CreateListenerRequest):
-    listener = LoadBalancer.create_listener(
+async def api_create_listener(req: CreateListenerRequest):
+    listener = await AsyncLoadBalancer.create_listener(
         name=req.name,
         lb_name=req.lb_name,
         protocol=req.protocol,
@@ -238,8 +535,8 @@ def api_create_listener(req: CreateListenerRequest):
     }
 
 @app.post("/create_pool")
-def api_create_pool(req: CreatePoolRequest):
-    pool = LoadBalancer.create_pool(
+async def api_create_pool(req: CreatePoolRequest):
+    pool = await AsyncLoadBalancer.create_pool(
         name=req.name,
         lb_name=req.lb_name,
         protocol=req.protocol,
@@ -251,10 +548,170 @@ def api_create_pool(req: CreatePoolRequest):
         "lb_name": req.lb_name
     }
 
+@app.post("/create_lb_stack")
+async def api_create_lb_stack(req: CreateLBStackRequest, background: bool = False):
+    async def run():
+        return await AsyncLoadBalancer.create_lb_stack(
+            name=req.name,
+            vip_subnet_id=req.vip_subnet_id,
+            server_names=req.servers,
+            member_subnet_id=req.member_subnet_id,
+            protocol=req.protocol,
+            protocol_port=req.protocol_port,
+            member_port=req.member_port,
+            lb_algorithm=req.lb_algorithm,
+            healthmonitor=req.healthmonitor
+        )
+    return await _run(background, "create_lb_stack", run)
+
 @app.post("/delete_lb")
-def api_delete_lb(req: DeleteLBRequest):
-    success = LoadBalancer.delete_lb(req.name)
+async def api_delete_lb(req: DeleteLBRequest, background: bool = False):
+    async def run():
+        report = await AsyncLoadBalancer.delete_lb(req.name, cascade=req.cascade)
+        if report is None:
+            return {"lb_name": req.name, "success": False, "error": "not found"}
+        return {
+            "lb_name": req.name,
+            **report
+        }
+    return await _run(background, "delete_lb", run)
+
+@app.post("/start_autoscaler")
+async def api_start_autoscaler(req: StartAutoscalerRequest):
+    config = req.model_dump(exclude={"name", "metric"})
+    try:
+        metric = Autoscaler.metric_from_spec(req.name, req.metric)
+        return await Autoscaler.register(req.name, metric=metric, **config)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/stop_autoscaler")
+async def api_stop_autoscaler(req: StopAutoscalerRequest):
+    return {"name": req.name, "stopped": Autoscaler.stop(req.name)}
+
+@app.post("/push_metric")
+async def api_push_metric(req: PushMetricRequest):
+    # Hệ thống giám sát ngoài (vd. CPU trung bình của nhóm) đẩy số liệu cho autoscaler dùng nguồn "pushed"
+    Autoscaler.push(req.name, req.value)
+    return {"name": req.name, "value": req.value}
+
+@app.post("/server_connections")
+async def api_server_connections(req: ServerConnectionsRequest):
+    # Agent trên server báo số kết nối đang mở: dùng cho policy least_loaded và để biết khi nào rút xong
+    Drain.report(req.server, req.connections)
+    return {"server": req.server, "connections": req.connections}
+
+@app.get("/autoscaler")
+async def get_autoscaler(name: str | None = None):
+    return Autoscaler.status(name)
+
+@app.post("/standby_pool")
+async def api_standby_pool(req: StandbyPoolRequest):
+    # size = 0 để tắt bể (xóa các máy đang chờ)
+    try:
+        return Standby.configure(req.base_instance_name, req.subnet_id, req.size, req.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/standby_pool")
+async def get_standby_pool(base_instance_name: str | None = None):
+    return Standby.status(base_instance_name)
+
+@app.get("/topology")
+async def get_topology(refresh: bool = False):
+    snapshot = await Topology.snapshot(refresh)
+    return {**snapshot, "age": round(time.time() - snapshot["generated_at"], 3)}
+
+def _sse(event):
+    return f"id: {Watch.event_id(event['seq'])}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+async def _watch_events(request, kinds, after_seq):
+    queue = Watch.subscribe()
+    try:
+        await Watch.wait_ready()
+        # Kết nối lại: gửi bù sự kiện bị lỡ nếu còn trong lịch sử, không thì gửi ảnh chụp mới
+        missed = Watch.replay(after_seq) if after_seq is not None else None
+        if missed is None:
+            snapshot = Watch.snapshot(kinds)
+            seq = snapshot["seq"]
+            yield _sse(snapshot)
+        else:
+            seq = after_seq
+            for event in missed:
+                if event["kind"] in kinds:
+                    yield _sse(event)
+                seq = event["seq"]
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), WATCH_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event["type"] == "resync":
+                snapshot = Watch.snapshot(kinds)
+                seq = snapshot["seq"]
+                yield _sse(snapshot)
+            elif event["seq"] > seq and event["kind"] in kinds:
+                seq = event["seq"]
+                yield _sse(event)
+    finally:
+        Watch.unsubscribe(queue)
+
+@app.get("/watch")
+async def watch(request: Request, kinds: str | None = None):
+    # SSE: event snapshot đầu tiên, sau đó added/removed/changed; mọi client dùng chung một poller
+    selected = [k for k in kinds.split(",") if k in Watch.KINDS] if kinds else list(Watch.KINDS)
+    return StreamingResponse(
+        _watch_events(request, selected, Watch.parse_event_id(request.headers.get("last-event-id"))),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _gauges():
+    # Số đo tức thời đọc lúc scrape từ các module đang giữ trạng thái
+    gauges = []
+    for origin, st in Client.pool_stats().items():
+        labels = {"client": "sync", "origin": origin}
+        gauges += [
+            ("openstack_pool_in_flight", "Số request đang dùng kết nối", st["in_flight"], labels),
+            ("openstack_pool_open_sockets", "Số socket đang mở", st["open_sockets"], labels),
+            ("openstack_pool_idle_sockets", "Số socket rảnh trong pool", st["idle_sockets"], labels),
+            ("openstack_pool_size", "Kích thước tối đa của pool", st["pool_size"], labels),
+            ("openstack_pool_waits", "Số lần request phải chờ kết nối rảnh", st["waits"], labels),
+            ("openstack_pool_new_connections", "Số kết nối mới đã mở", st["new_connections"], labels),
+        ]
+    st = AsyncClient.pool_stats()
+    labels = {"client": "async", "origin": "all"}
+    gauges += [
+        ("openstack_pool_in_flight", "Số request đang dùng kết nối", st["in_flight"], labels),
+        ("openstack_pool_open_sockets", "Số socket đang mở", st["open_connections"], labels),
+        ("openstack_pool_size", "Kích thước tối đa của pool", st["max_connections"], labels),
+    ]
+    gauges.append(("openstack_jobs", "Số job theo trạng thái", len(Jobs.list_jobs("running")), {"status": "running"}))
+    gauges.append(("openstack_jobs", "Số job theo trạng thái", len(Jobs.list_jobs("pending")), {"status": "pending"}))
+    for kind, st in Waiter.stats().items():
+        gauges.append(("openstack_waiter_waiting", "Số tài nguyên đang chờ đổi trạng thái", st["waiting"], {"kind": kind}))
+    for service_type, st in Throttle.stats().items():
+        gauges.append(("openstack_circuit_open", "Circuit breaker theo service: 0 đóng, 1 thăm dò, 2 mở",
+                       {"closed": 0, "half_open": 1, "open": 2}[st["state"]],
+                       {"service": Metrics.SERVICE_NAMES.get(service_type, service_type)}))
+    gauges.append(("openstack_watch_subscribers", "Số client đang theo dõi /watch", Watch.stats()["subscribers"], {}))
+    return gauges
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(Metrics.render(_gauges()), media_type="text/plain; version=0.0.4")
+
+@app.get("/pool_stats")
+async def get_pool_stats():
     return {
-        "lb_name": req.name,
-        "success": success
-    }
\ No newline at end of file
+        "sync": Client.pool_stats(),
+        "async": AsyncClient.pool_stats(),
+        "waiter": Waiter.stats(),
+        "reference": Reference.stats(),
+        "watch": Watch.stats(),
+        "inventory": Inventory.stats(),
+        "coalescing": {"sync": Client.flight_stats(), "async": AsyncClient.flight_stats()},
+        "throttle": Throttle.stats(),
+        "idempotency": Idempotency.stats()
+    }
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+import Client
+import Identity
+import Metrics
+import Throttle
+
+# ---- Cấu hình client bất đồng bộ ----
+MAX_CONNECTIONS = int(os.environ.get("OS_ASYNC_MAX_CONNECTIONS", 1000))
+MAX_KEEPALIVE = int(os.environ.get("OS_ASYNC_MAX_KEEPALIVE", 100))
+CONNECT_TIMEOUT = float(os.environ.get("OS_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("OS_READ_TIMEOUT", 60))
+
+_client = None
+# httpx.AsyncClient gắn với event loop tạo ra nó -> tạo lại nếu loop đổi
+_client_loop = None
+_stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "bytes_in": 0}
+
+
+def _get_client():
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client_loop = loop
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+    return _client
+
+
+async def aclose():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _get_headers():
+    # Xác thực Keystone là lời gọi đồng bộ -> chạy trong thread để không chặn event loop
+    if not Identity.has_valid_token():
+        await asyncio.to_thread(Identity.get_token_and_catalog)
+    headers, _ = Identity.get_headers()
+    return headers
+
+
+async def request(method, url, **kwargs):
+    _stats["requests"] += 1
+    _stats["in_flight"] += 1
+    _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+    try:
+        resp = await _get_client().request(method, url, **kwargs)
+    finally:
+        _stats["in_flight"] -= 1
+    _stats["bytes_in"] += len(resp.content)
+    return resp
+
+
+# ---- Gọi API theo service type trong catalog, tự gắn token ----
+
+async def api(method, service_type, path, **kwargs):
+    extra_headers = kwargs.pop("headers", None) or {}
+    reauthenticated = False
+    throttled = 0
+    while True:
+        headers = await _get_headers()
+        headers.update(extra_headers)
+        url = f"{Identity.get_service_url(service_type)}{path}"
+        # Token bucket + circuit breaker theo service (Throttle); mạch mở thì CircuitOpenError ngay tại đây
+        wait = Throttle.acquire(service_type)
+        started = time.time()
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+                started = time.time()
+            resp = await request(method, url, headers=headers, **kwargs)
+        except BaseException as e:
+            Throttle.release(service_type, method, error=e)
+            if isinstance(e, Exception):
+                Metrics.record_call(service_type, method, path, started, error=e)
+            raise
+        Metrics.record_call(service_type, method, path, started, status=resp.status_code)
+        retry = Throttle.release(service_type, method, status=resp.status_code, headers=resp.headers)
+        # Token bị thu hồi trước hạn -> xác thực lại và thử thêm một lần
+        if resp.status_code == 401 and not reauthenticated:
+            reauthenticated = True
+            Identity.invalidate(headers.get("X-Auth-Token"))
+            continue
+        # 429/503: Throttle đã chặn bucket tới hết Retry-After, lần acquire sau sẽ tự chờ
+        if retry and throttled < Throttle.MAX_RETRIES:
+            throttled += 1
+            continue
+        return resp
+
+# khóa (kèm event loop) -> Future của GET đang chạy; dùng chung khóa với Client.flight_key
+_flights = {}
+_flight_stats = {"leaders": 0, "coalesced": 0}
+
+
+async def _shared_get(service_type, path, kwargs):
+    return Client.shared_json(await api("GET", service_type, path, **kwargs))
+
+
+async def get(service_type, path, **kwargs):
+    key = Client.flight_key(service_type, path, kwargs)
+    if key is None:
+        return await api("GET", service_type, path, **kwargs)
+    key = (asyncio.get_running_loop(), *key)
+    flight = _flights.get(key)
+    if flight is None:
+        _flight_stats["leaders"] += 1
+        flight = _flights[key] = asyncio.ensure_future(_shared_get(service_type, path, kwargs))
+        flight.add_done_callback(lambda _: _flights.pop(key, None))
+    else:
+        _flight_stats["coalesced"] += 1
+        Metrics.inc("openstack_coalesced_requests_total", client="async")
+    # shield: caller đầu bị hủy (client ngắt kết nối) không làm hỏng request của các caller còn lại
+    return await asyncio.shield(flight)
+
+
+def flight_stats():
+    return {"in_flight": len(_flights), **_flight_stats}
+
+
+async def post(service_type, path, **kwargs):
+    return await api("POST", service_type, path, **kwargs)
+
+async def put(service_type, path, **kwargs):
+    return await api("PUT", service_type, path, **kwargs)
+
+async def delete(service_type, path, **kwargs):
+    return await api("DELETE", service_type, path, **kwargs)
+
+
+async def iter_pages(service_type, path, key, params=None, limit=None, strict=False):
+    # Như Client.iter_pages
+    limit = limit or Client.PAGE_SIZE
+    # Giữ dạng danh sách cặp để tham số lặp lại (vd. fields=id&fields=name) không bị gộp mất
+    params = list(params.items() if isinstance(params, dict) else params or [])
+    marker = None
+    while True:
+        page_params = params + [("limit", limit)] + ([("marker", marker)] if marker else [])
+        resp = await get(service_type, path, params=page_params)
+        if resp.status_code != 200:
+            if strict:
+                raise RuntimeError(f"Lỗi khi lấy trang {key}: {resp.status_code} {resp.text}")
+            print(f"❌ Lỗi khi lấy trang {key}: {resp.status_code} {resp.text}")
+            return
+        data = resp.json()
+        page = data.get(key, [])
+        yield page
+        marker = Client.next_marker(data, key, page, limit)
+        if marker is None:
+            return
+
+
+def pool_stats():
+    open_connections = None
+    if _client is not None and not _client.is_closed:
+        pool = getattr(_client._transport, "_pool", None)
+        if pool is not None:
+            open_connections = len(pool.connections)
+    return {
+        "max_connections": MAX_CONNECTIONS,
+        "max_keepalive": MAX_KEEPALIVE,
+        "open_connections": open_connections,
+        **_stats,
+    }
@@ -0,0 +1,342 @@
+import base64
+import re
+import asyncio
+import time
+import uuid
+import AsyncClient
+import Idempotency
+import Resolver
+import Reference
+import Jobs
+import Waiter
+import Standby
+import Drain
+import AsyncLoadBalancer
+from Instance import (
+    SCALE_CONCURRENCY, clone_numbers, clone_payload, clone_result,
+    use_multi_create, delete_result, mark_gone, check_references
+)
+
+
+def iter_instances(limit=None, strict=False):
+    return AsyncClient.iter_pages("compute", "/servers/detail", "servers", limit=limit, strict=strict)
+
+async def list_instances():
+    # strict: trang giữa chừng lỗi thì báo lỗi, không trả về danh sách thiếu
+    try:
+        servers = [s async for page in iter_instances(strict=True) for s in page]
+    except RuntimeError as e:
+        print(f"Lỗi khi lấy danh sách instance: {e}")
+        return None
+    print(f"Có {len(servers)} instance:")
+    for s in servers:
+        print(f"- {s['name']} ({s['id']})")
+    return servers
+
+async def list_floating_ips():
+    resp = await AsyncClient.get("network", "/v2.0/floatingips")
+    if resp.status_code == 200:
+        floating_ips = resp.json().get("floatingips", [])
+        print(f"🌐 Có {len(floating_ips)} floating IP:")
+        for fip in floating_ips:
+            print(f"- {fip['floating_ip_address']} (id={fip['id']})")
+        return floating_ips
+    else:
+        print(f"❌ Lỗi khi lấy floating IP: {resp.status_code} {resp.text}")
+        return None
+
+async def list_flavors():
+    resp = await AsyncClient.get("compute", "/flavors")
+    return resp.json().get("flavors", []) if resp.status_code == 200 else []
+
+async def list_images():
+    resp = await AsyncClient.get("image", "/v2/images")
+    return resp.json().get("images", []) if resp.status_code == 200 else []
+
+async def list_networks():
+    resp = await AsyncClient.get("network", "/v2.0/networks")
+    return resp.json().get("networks", []) if resp.status_code == 200 else []
+
+async def create_vm(name, network_name, keypair_name=None, user_data_str=None, wait=False, wait_timeout=600,
+                    flavor=None, image=None, security_group="default"):
+    # Tra flavor/image/network/security group trong cache tham chiếu -> khi cache ấm chỉ còn một lời gọi POST
+    flavor = flavor or Reference.DEFAULT_FLAVOR
+    image = image or Reference.DEFAULT_IMAGE
+    flavor_id, image_id, network_id, security_group_id = await asyncio.gather(
+        Reference.aresolve_id("flavors", flavor),
+        Reference.aresolve_id("images", image),
+        Reference.aresolve_id("networks", network_name),
+        Reference.aresolve_id("security_groups", security_group),
+    )
+    if not check_references({
+        "flavor": (flavor, flavor_id),
+        "image": (image, image_id),
+        "network": (network_name, network_id),
+        "security group": (security_group, security_group_id),
+    }):
+        return None
+    user_data_encoded = None
+    if user_data_str:
+        user_data_encoded = base64.b64encode(user_data_str.encode()).decode()
+
+    payload = {
+        "server": {
+            "name": name,
+            "imageRef": image_id,
+            "flavorRef": flavor_id,
+            "networks": [{"uuid": network_id}],
+            "security_groups": [{"name": security_group}]
+        }
+    }
+    if keypair_name:
+        payload["server"]["key_name"] = keypair_name
+    if user_data_encoded:
+        payload["server"]["user_data"] = user_data_encoded
+    # Dấu riêng của lần tạo này (Idempotency-Key của client nếu có) -> lỗi tạm thời thì tìm lại được VM
+    # đã tạo thay vì gửi lại POST và sinh VM trùng
+    key = Idempotency.current_key()
+    token = Idempotency.tag(key) if key else uuid.uuid4().hex
+    payload["server"]["metadata"] = {"idempotency_key": token}
+
+    async def find_created():
+        resp = await AsyncClient.get("compute", "/servers/detail", params={"name": f"^{re.escape(name)}$"})
+        if resp.status_code != 200:
+            return None
+        for server in resp.json().get("servers", []):
+            if (server.get("metadata") or {}).get("idempotency_key") == token:
+                return Idempotency.found(202, "server", server)
+        return None
+
+    resp = await Idempotency.post_create("compute", "/servers", payload, find_created)
+    if resp.status_code == 202:
+        data = resp.json()
+        server = data.get("server")
+        if not server:
+            print("Không có trường 'server' trong phản hồi:", data)
+            return None
+
+        name = server.get("name", "(Không có tên)")
+        id_ = server.get("id", "(Không có ID)")
+        print(f"Tạo VM thành công: {name} (id={id_})")
+        Resolver.forget("servers", name)
+        if wait:
+            Jobs.report(f"Chờ VM '{name}' ACTIVE")
+            ready = await Waiter.wait_for("servers", id_, {"ACTIVE"}, timeout=wait_timeout)
+            server = ready or server
+        return server
+    else:
+        print(f"Lỗi tạo VM: {resp.status_code} {resp.text}")
+        return None
+
+async def delete_instance(server_name):
+    # ---- Tìm ID từ tên qua chỉ mục dùng chung ----
+    server = await Resolver.aresolve("servers", server_name)
+    if not server:
+        print(f"Không tìm thấy server có tên: {server_name}")
+        return None
+
+    server_id = server["id"]
+
+    resp = await AsyncClient.delete("compute", f"/servers/{server_id}")
+    if resp.status_code == 204:
+        print(f"Xóa instance '{server_name}' (id={server_id}) thành công.")
+        Resolver.forget("servers", server_name)
+        return True
+    else:
+        print(f"Lỗi khi xóa instance: {resp.status_code} {resp.text}")
+        return False
+
+
+async def attach_floating_ip(server_name, floating_ip):
+    server = await Resolver.aresolve("servers", server_name)
+    if not server:
+        print(f"Không tìm thấy server có tên: {server_name}")
+        return None
+
+    server_id = server["id"]
+
+    # ---- Gắn Floating IP ----
+    payload = {
+        "addFloatingIp": {
+            "address": floating_ip
+        }
+    }
+
+    resp = await AsyncClient.post("compute", f"/servers/{server_id}/action", json=payload)
+    if resp.status_code == 202:
+        print(f"Gắn Floating IP {floating_ip} thành công vào {server_name} (id={server_id})")
+        return floating_ip
+    else:
+        print(f"Lỗi khi gắn Floating IP: {resp.status_code} {resp.text}")
+        return None
+
+async def _existing_clone_names(base_instance_name):
+    params = {"name": f"^{re.escape(base_instance_name)}-clone-"}
+    resp = await AsyncClient.get("compute", "/servers", params=params)
+    if resp.status_code != 200:
+        print(f"Lỗi khi lấy danh sách bản sao: {resp.status_code} {resp.text}")
+        return None
+    return [s["name"] for s in resp.json().get("servers", [])]
+
+async def _multi_create(base, base_instance_name, subnet_id, count):
+    payload = clone_payload(base, f"{base_instance_name}-clone", subnet_id)
+    payload["server"].update({"min_count": count, "max_count": count, "return_reservation_id": True})
+    resp = await Idempotency.post_create("compute", "/servers", payload)
+    if resp.status_code != 202:
+        print(f"Lỗi multi-create: {resp.status_code} {resp.text}")
+        return None
+
+    # Lấy lại từng VM của lần đặt chỗ này để trả kết quả cho từng bản sao
+    reservation_id = resp.json().get("reservation_id")
+    list_resp = await AsyncClient.get("compute", "/servers", params={"reservation_id": reservation_id})
+    if list_resp.status_code != 200:
+        print(f"Lỗi khi lấy các bản sao của reservation_id={reservation_id}: {list_resp.status_code} {list_resp.text}")
+    servers = list_resp.json().get("servers", []) if list_resp.status_code == 200 else []
+    results = [{"name": s["name"], "id": s["id"], "status": "BUILD", "success": True} for s in servers]
+    print(f"Multi-create {len(results)}/{count} bản sao (reservation_id={reservation_id})")
+    # Nova đặt tên <name>-1..N: bản sao không thấy trong danh sách (hoặc không lấy được danh sách)
+    # thì báo lỗi từng cái, không coi là thành công
+    found = {r["name"] for r in results}
+    reason = "không có trong danh sách" if list_resp.status_code == 200 else f"{list_resp.status_code} {list_resp.text}"
+    for n in range(1, count + 1):
+        name = f"{base_instance_name}-clone-{n}"
+        if name not in found:
+            results.append({"name": name, "id": None, "success": False,
+                            "error": f"Không xác nhận được sau multi-create (reservation_id={reservation_id}): {reason}"})
+    return results
+
+# Thời gian tối đa chờ bản sao ACTIVE trước khi thêm vào pool
+MEMBER_TIMEOUT = 600
+
+
+async def _register_members(pool, results, protocol_port):
+    # Chờ từng bản sao (boot mới hoặc lấy từ bể dự phòng) ACTIVE rồi thêm vào pool, như Autoscaler
+    async def register_one(r):
+        server = await Waiter.wait_for("servers", r["id"], {"ACTIVE"}, timeout=MEMBER_TIMEOUT)
+        member = await AsyncLoadBalancer.register_server(pool, server, protocol_port) if server else None
+        r["member_id"] = member["id"] if member else None
+
+    Jobs.report(f"Chờ bản sao ACTIVE để thêm vào pool {pool['id']}")
+    await asyncio.gather(*(register_one(r) for r in results if r["success"]))
+
+async def scale_up(base_instance_name, subnet_id, count=1, mode="auto", concurrency=None, use_standby=True,
+                   pool=None, member_port=80, member_subnet_id=None):
+    # pool: tên/ID pool Octavia -> mỗi bản sao ACTIVE được thêm làm member (member_port, member_subnet_id)
+    base = await Resolver.aresolve("servers", base_instance_name)
+    if not base:
+        print(f"Không tìm thấy instance gốc '{base_instance_name}'")
+        return None
+
+    if not subnet_id:
+        print(f"subnet_id không hợp lệ")
+        return None
+
+    pool_info = None
+    if pool:
+        pool_info = await AsyncLoadBalancer.member_pool(pool, member_subnet_id)
+        if pool_info is None:
+            return None
+
+    existing = await _existing_clone_names(base_instance_name)
+    if existing is None:
+        return None
+    numbers = clone_numbers(base_instance_name, existing, count)
+
+    # Lấy máy trong bể dự phòng trước (vài giây), chỉ boot mới phần còn thiếu
+    taken = await Standby.take(base_instance_name, numbers, subnet_id) if use_standby else []
+    if taken:
+        remaining = count - sum(r["success"] for r in taken)
+        numbers = clone_numbers(base_instance_name, existing + [r["name"] for r in taken], remaining)
+
+    results = [] if not numbers else None
+    if results is None and use_multi_create(mode, numbers):
+        results = await _multi_create(base, base_instance_name, subnet_id, len(numbers))
+    if results is None:
+        semaphore = asyncio.Semaphore(concurrency or SCALE_CONCURRENCY)
+
+        async def create_one(n):
+            clone_name = f"{base_instance_name}-clone-{n}"
+            async with semaphore:
+                resp = await Idempotency.post_create("compute", "/servers", clone_payload(base, clone_name, subnet_id))
+            return clone_result(clone_name, resp)
+
+        results = await asyncio.gather(*(create_one(n) for n in numbers))
+    results = taken + list(results)
+
+    for r in results:
+        if r["success"]:
+            Resolver.forget("servers", r["name"])
+    print(f"Đã scale up {sum(r['success'] for r in results)} VM dựa trên '{base_instance_name}'")
+    if pool_info is not None:
+        await _register_members(pool_info, results, member_port)
+    return results
+
+
+
+async def list_clones(base_instance_name, detail=True):
+    # Nova lọc name bằng regex -> chỉ tải về các bản sao
+    params = {"name": f"^{re.escape(base_instance_name)}-clone"}
+    resp = await AsyncClient.get("compute", "/servers/detail" if detail else "/servers", params=params)
+    if resp.status_code != 200:
+        print(f"Lỗi khi lấy danh sách servers: {resp.status_code} {resp.text}")
+        return None
+    servers = resp.json().get("servers", [])
+    return [s for s in servers if s["name"].startswith(f"{base_instance_name}-clone")]
+
+async def _wait_until_gone(results, timeout):
+    # Waiter dùng chung gộp mọi bản sao đang chờ vào một lời gọi danh sách mỗi chu kỳ
+    pending = {r["id"]: r for r in results if r["success"]}
+    total = len(pending)
+
+    async def wait_one(server_id):
+        if await Waiter.wait_for("servers", server_id, {Waiter.DELETED}, timeout=timeout) is not None:
+            mark_gone(pending, set(pending) - {server_id})
+            Jobs.report(f"Còn {len(pending)}/{total} bản sao chưa xóa xong")
+
+    await asyncio.gather(*(wait_one(server_id) for server_id in list(pending)))
+    for r in pending.values():
+        r["gone"] = False
+
+async def delete_servers(servers, concurrency=None, wait=False, wait_timeout=300, pool=None, drain_timeout=None):
+    # Xóa song song một danh sách server đã chọn (bản ghi có id, name), trả về kết quả từng server.
+    # Có pool ({"id", "lb_id"}) thì rút từng server khỏi pool trước (Drain.drain); server nào rút xong thì xóa ngay
+    semaphore = asyncio.Semaphore(concurrency or SCALE_CONCURRENCY)
+
+    async def delete_one(s):
+        drain = await Drain.drain(s, pool, drain_timeout) if pool else None
+        async with semaphore:
+            started = time.time()
+            resp = await AsyncClient.delete("compute", f"/servers/{s['id']}")
+        result = delete_result(s, resp, started)
+        if drain is not None:
+            result["drain"] = drain
+        Drain.forget(s["name"])
+        return result
+
+    results = await asyncio.gather(*(delete_one(s) for s in servers))
+    if wait:
+        await _wait_until_gone(results, wait_timeout)
+    return results
+
+async def scale_down(base_instance_name, count=1, concurrency=None, wait=False, wait_timeout=300,
+                     policy="newest", pool=None, drain_timeout=None):
+    # policy: newest | oldest | least_loaded (theo số kết nối báo về Drain.report)
+    # pool: tên/ID pool Octavia để rút máy êm trước khi xóa
+    pool_info = None
+    if pool:
+        pool_info = await Drain.resolve(pool)
+        if pool_info is None:
+            return None
+
+    clones = await list_clones(base_instance_name)
+    if clones is None:
+        return None
+
+    if not clones:
+        print(f"Không có bản sao nào của '{base_instance_name}' để xóa.")
+        return []
+
+    victims = Drain.choose_victims(clones, count, policy)
+    results = await delete_servers(victims, concurrency, wait, wait_timeout, pool_info, drain_timeout)
+    print(f"Đã scale down {sum(r['success'] for r in results)} VM phụ của '{base_instance_name}'")
+    return results
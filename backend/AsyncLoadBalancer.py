@@ -0,0 +1,416 @@
+import asyncio
+import ipaddress
+import time
+import AsyncClient
+import Idempotency
+import Resolver
+import Jobs
+import Waiter
+import LoadBalancer
+from LoadBalancer import TEARDOWN_ORDER, cascade_rejected, teardown_children, pool_children, teardown_record
+
+# Thời gian tối đa chờ LB bị xóa hẳn
+DELETE_TIMEOUT = 20
+# Thời gian tối đa chờ LB về ACTIVE: lần đầu phải dựng amphora nên lâu hơn các bước sau
+LB_ACTIVE_TIMEOUT = 600
+STEP_TIMEOUT = 300
+
+async def create_lb(name, vip_subnet_id, description=None):
+    if not vip_subnet_id:
+        print("❌ Không có subnet_id hợp lệ")
+        return None
+
+    payload = {
+        "loadbalancer": {
+            "name": name,
+            "vip_subnet_id": vip_subnet_id,
+            "description": description or "",
+            "admin_state_up": True
+        }
+    }
+
+    resp = await Idempotency.post_create("load-balancer", "/v2.0/lbaas/loadbalancers", payload)
+    if resp.status_code == 201:
+        lb = resp.json()["loadbalancer"]
+        print(f"✅ Tạo Load Balancer thành công: {lb['name']} (id={lb['id']})")
+        Resolver.remember("loadbalancers", lb)
+        return lb
+    else:
+        print(f"❌ Lỗi tạo Load Balancer: {resp.status_code} {resp.text}")
+        return None
+
+async def create_listener(name, lb_name, protocol="HTTP", protocol_port=80):
+    # Lấy id từ tên Load Balancer qua chỉ mục dùng chung
+    lb = await Resolver.aresolve("loadbalancers", lb_name)
+    if not lb:
+        print(f"❌ Không tìm thấy Load Balancer '{lb_name}'")
+        return None
+
+    lb_id = lb["id"]
+
+    payload = {
+        "listener": {
+            "name": name,
+            "loadbalancer_id": lb_id,
+            "protocol": protocol,
+            "protocol_port": protocol_port,
+            "admin_state_up": True
+        }
+    }
+
+    resp = await Idempotency.post_create("load-balancer", "/v2.0/lbaas/listeners", payload)
+    if resp.status_code == 201:
+        listener = resp.json()["listener"]
+        print(f"✅ Tạo Listener thành công: {listener['name']} (id={listener['id']}) trên LB {lb_name}")
+        return listener
+    else:
+        print(f"❌ Lỗi tạo Listener: {resp.status_code} {resp.text}")
+        return None
+
+
+async def create_pool(name, lb_name, protocol="HTTP", lb_algorithm="ROUND_ROBIN"):
+    # Lấy id từ tên Load Balancer qua chỉ mục dùng chung
+    lb = await Resolver.aresolve("loadbalancers", lb_name)
+    if not lb:
+        print(f"❌ Không tìm thấy Load Balancer '{lb_name}'")
+        return None
+
+    lb_id = lb["id"]
+
+    payload = {
+        "pool": {
+            "name": name,
+            "loadbalancer_id": lb_id,
+            "protocol": protocol,
+            "lb_algorithm": lb_algorithm,
+            "admin_state_up": True
+        }
+    }
+
+    resp = await Idempotency.post_create("load-balancer", "/v2.0/lbaas/pools", payload)
+    if resp.status_code == 201:
+        pool = resp.json()["pool"]
+        print(f"✅ Tạo Pool thành công: {pool['name']} (id={pool['id']})")
+        return pool
+    else:
+        print(f"❌ Lỗi tạo Pool: {resp.status_code} {resp.text}")
+        return None
+
+
+# Số lần thử lại khi Octavia trả 409 vì LB đang PENDING_UPDATE do một thao tác xóa khác
+CONFLICT_RETRIES = 30
+
+
+async def _delete_child(lb_id, kind, object_id, path):
+    started = time.time()
+    for attempt in range(CONFLICT_RETRIES):
+        resp = await AsyncClient.delete("load-balancer", path)
+        if resp.status_code != 409 or attempt == CONFLICT_RETRIES - 1:
+            break
+        # LB đang bận với thao tác khác -> chờ nó về ACTIVE qua waiter dùng chung rồi thử lại.
+        # LB không về ACTIVE (hết thời gian, ERROR) thì thôi, ghi đối tượng là failed với lỗi 409
+        if await Waiter.wait_for("loadbalancers", lb_id, {"ACTIVE"}, timeout=STEP_TIMEOUT) is None:
+            break
+    return teardown_record(kind, object_id, resp, started)
+
+
+async def _teardown_levels(lb_id):
+    resp = await AsyncClient.get("load-balancer", f"/v2.0/lbaas/loadbalancers/{lb_id}")
+    if resp.status_code != 200:
+        return [], []
+    levels = teardown_children(resp.json()["loadbalancer"])
+
+    # Chi tiết các pool (members, health monitor) lấy song song
+    pool_resps = await asyncio.gather(*(
+        AsyncClient.get("load-balancer", f"/v2.0/lbaas/pools/{pool_id}") for pool_id, _ in levels["pools"]
+    ))
+    for pool_resp in pool_resps:
+        if pool_resp.status_code == 200:
+            for kind, items in pool_children(pool_resp.json()["pool"]).items():
+                levels.setdefault(kind, []).extend(items)
+
+    records = []
+    for kind in TEARDOWN_ORDER:
+        items = levels.get(kind, [])
+        if not items:
+            continue
+        Jobs.report(f"Xóa {len(items)} {kind}")
+        # Cùng một tầng xóa song song; tầng sau chỉ bắt đầu khi tầng trước xong
+        records += await asyncio.gather(*(_delete_child(lb_id, kind, i, path) for i, path in items))
+    return levels, records
+
+
+async def delete_lb(lb_name, cascade=True):
+    # Trả về báo cáo {"success", "mode", "objects"} với trạng thái từng đối tượng, None nếu không thấy LB
+    lb = await Resolver.aresolve("loadbalancers", lb_name)
+    if not lb:
+        print(f"⚠️ Không tìm thấy LB '{lb_name}'")
+        return None
+
+    lb_id = lb["id"]
+    report = {"success": False, "mode": "cascade", "objects": []}
+    started = time.time()
+
+    del_resp = None
+    if cascade and LoadBalancer.cascade_supported():
+        # Một lời gọi: Octavia tự xóa listeners, pools, members, health monitors
+        del_resp = await AsyncClient.delete(
+            "load-balancer", f"/v2.0/lbaas/loadbalancers/{lb_id}", params={"cascade": "true"}
+        )
+        if cascade_rejected(del_resp):
+            del_resp = None
+    if del_resp is None:
+        report["mode"] = "levels"
+        _, report["objects"] = await _teardown_levels(lb_id)
+        record = await _delete_child(lb_id, "loadbalancers", lb_id, f"/v2.0/lbaas/loadbalancers/{lb_id}")
+        if record["status"] != "deleted":
+            report["objects"].append(record)
+            return report
+    elif del_resp.status_code not in [200, 202, 204]:
+        print(f"❌ Lỗi xóa LB: {del_resp.status_code} {del_resp.text}")
+        report["objects"].append(teardown_record("loadbalancers", lb_id, del_resp, started))
+        return report
+    Resolver.forget("loadbalancers", lb_name)
+
+    # Chờ LB thực sự bị xóa qua waiter dùng chung (một lời gọi danh sách cho mọi LB đang chờ)
+    Jobs.report(f"Chờ LB '{lb_name}' bị xóa")
+    gone = await Waiter.wait_for("loadbalancers", lb_id, {Waiter.DELETED}, timeout=DELETE_TIMEOUT)
+    report["objects"].append({
+        "type": "loadbalancers", "id": lb_id, "status": "deleted" if gone else "pending",
+        "latency": round(time.time() - started, 3),
+    })
+    report["success"] = gone is not None
+    if gone:
+        print(f"✅ LB '{lb_name}' đã xóa thành công")
+    else:
+        print(f"⚠️ LB '{lb_name}' chưa xóa xong, hãy thử lại sau")
+    return report
+
+
+# ---- Dựng trọn bộ LB + listener + pool + health monitor + members ----
+
+def member_address(server, subnet_cidr=None):
+    # Lấy IPv4 fixed đầu tiên của server (ưu tiên IP thuộc subnet của member nếu biết CIDR)
+    candidates = [
+        a["addr"] for addrs in server.get("addresses", {}).values() for a in addrs
+        if a.get("version") == 4 and a.get("OS-EXT-IPS:type", "fixed") == "fixed"
+    ]
+    if subnet_cidr:
+        network = ipaddress.ip_network(subnet_cidr)
+        in_subnet = [a for a in candidates if ipaddress.ip_address(a) in network]
+        candidates = in_subnet or candidates
+    return candidates[0] if candidates else None
+
+
+def in_subnet(address, subnet_cidr):
+    return ipaddress.ip_address(address) in ipaddress.ip_network(subnet_cidr)
+
+
+async def _wait_lb_active(lb_id, step, timeout=STEP_TIMEOUT):
+    # Mỗi thay đổi con đưa LB sang PENDING_UPDATE -> phải chờ ACTIVE trước bước kế tiếp
+    Jobs.report(f"Chờ LB ACTIVE sau bước {step}")
+    lb = await Waiter.wait_for("loadbalancers", lb_id, {"ACTIVE"}, timeout=timeout)
+    if lb is None:
+        raise RuntimeError(f"LB không về ACTIVE sau bước {step}")
+    return lb
+
+
+async def _create_child(kind, payload):
+    resp = await Idempotency.post_create("load-balancer", f"/v2.0/lbaas/{kind}s", {kind: payload})
+    if resp.status_code != 201:
+        raise RuntimeError(f"Lỗi tạo {kind}: {resp.status_code} {resp.text}")
+    item = resp.json()[kind]
+    print(f"✅ Tạo {kind} thành công: {item.get('name') or item['id']} (id={item['id']})")
+    return item
+
+
+async def _resolve_members(server_names, member_subnet_id, vip_subnet_id, protocol_port):
+    # Member chỉ mang subnet_id khi IP của nó nằm trong subnet đó (không thì Octavia trỏ member vào subnet
+    # không tới được). member_subnet_id chỉ định rõ mà server không có IP trong đó -> báo lỗi;
+    # mặc định theo VIP subnet thì bỏ subnet_id, Octavia coi member tới được từ VIP
+    if not server_names:
+        return []
+    subnet_id = member_subnet_id or vip_subnet_id
+    resp = await AsyncClient.get("network", f"/v2.0/subnets/{subnet_id}", params={"fields": "cidr"})
+    if resp.status_code != 200:
+        raise RuntimeError(f"Không lấy được subnet {subnet_id}: {resp.status_code} {resp.text}")
+    subnet_cidr = resp.json()["subnet"]["cidr"]
+
+    servers = await asyncio.gather(*(Resolver.aresolve("servers", name) for name in server_names))
+    members = []
+    for name, server in zip(server_names, servers):
+        address = member_address(server, subnet_cidr) if server else None
+        if address is None:
+            raise RuntimeError(f"Không tìm thấy IPv4 của server '{name}'")
+        member = {"name": name, "address": address, "protocol_port": protocol_port}
+        if in_subnet(address, subnet_cidr):
+            member["subnet_id"] = subnet_id
+        elif member_subnet_id:
+            raise RuntimeError(f"Server '{name}' không có IPv4 trong subnet {member_subnet_id} ({subnet_cidr})")
+        members.append(member)
+    return members
+
+
+async def create_lb_stack(name, vip_subnet_id, server_names=(), member_subnet_id=None,
+                          protocol="HTTP", protocol_port=80, member_port=None,
+                          lb_algorithm="ROUND_ROBIN", healthmonitor=None):
+    # Tạo LB rồi lần lượt listener, pool, health monitor và thêm tất cả member bằng một PUT.
+    # Giữa các bước chờ provisioning_status ACTIVE qua waiter dùng chung thay vì thử lại bằng tay.
+    stack = {"loadbalancer": None, "listener": None, "pool": None, "healthmonitor": None,
+             "members": [], "success": False}
+    try:
+        # Tra IP các server trước (song song, vài ms) để sai tên server không để lại LB dở dang
+        members = await _resolve_members(
+            list(server_names), member_subnet_id, vip_subnet_id, member_port or protocol_port
+        )
+
+        lb = await create_lb(name, vip_subnet_id)
+        if lb is None:
+            raise RuntimeError("Lỗi tạo Load Balancer")
+        stack["loadbalancer"] = lb
+        await _wait_lb_active(lb["id"], "loadbalancer", timeout=LB_ACTIVE_TIMEOUT)
+
+        stack["listener"] = await _create_child("listener", {
+            "name": f"{name}-listener",
+            "loadbalancer_id": lb["id"],
+            "protocol": protocol,
+            "protocol_port": protocol_port,
+            "admin_state_up": True,
+        })
+        await _wait_lb_active(lb["id"], "listener")
+
+        # Pool gắn thẳng vào listener -> thành default pool, không cần cập nhật listener thêm lần nữa
+        stack["pool"] = await _create_child("pool", {
+            "name": f"{name}-pool",
+            "listener_id": stack["listener"]["id"],
+            "protocol": protocol,
+            "lb_algorithm": lb_algorithm,
+            "admin_state_up": True,
+        })
+        await _wait_lb_active(lb["id"], "pool")
+
+        if healthmonitor is not False:
+            monitor = {"type": "HTTP" if protocol in ("HTTP", "HTTPS") else "TCP",
+                       "delay": 5, "timeout": 5, "max_retries": 3,
+                       **(healthmonitor if isinstance(healthmonitor, dict) else {})}
+            if monitor["type"] not in ("HTTP", "HTTPS"):
+                monitor.pop("url_path", None)
+            stack["healthmonitor"] = await _create_child("healthmonitor", {
+                "name": f"{name}-hm", "pool_id": stack["pool"]["id"], **monitor
+            })
+            await _wait_lb_active(lb["id"], "healthmonitor")
+
+        if members:
+            # Batch member update: một PUT thay cho N lần POST + N lần chờ ACTIVE
+            resp = await AsyncClient.put(
+                "load-balancer", f"/v2.0/lbaas/pools/{stack['pool']['id']}/members", json={"members": members}
+            )
+            if resp.status_code not in (200, 202):
+                raise RuntimeError(f"Lỗi thêm members: {resp.status_code} {resp.text}")
+            await _wait_lb_active(lb["id"], "members")
+            stack["members"] = members
+            print(f"✅ Đã thêm {len(members)} member vào pool {stack['pool']['id']}")
+
+        stack["success"] = True
+        print(f"✅ Dựng xong Load Balancer '{name}'")
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        stack["error"] = str(e)
+    return stack
+
+
+# ---- Thêm/bớt member của một pool có sẵn (autoscaler, standby pool, drain) ----
+
+async def resolve_pool(pool_name_or_id):
+    # Trả về bản ghi pool đầy đủ (kèm loadbalancers, members), nhận tên hoặc ID
+    pool = await Resolver.aresolve("pools", pool_name_or_id)
+    pool_id = pool["id"] if pool else pool_name_or_id
+    resp = await AsyncClient.get("load-balancer", f"/v2.0/lbaas/pools/{pool_id}")
+    if resp.status_code != 200:
+        print(f"❌ Không tìm thấy pool '{pool_name_or_id}': {resp.status_code}")
+        return None
+    return resp.json()["pool"]
+
+
+def pool_lb_id(pool):
+    lbs = pool.get("loadbalancers") or []
+    return lbs[0]["id"] if lbs else None
+
+
+async def member_pool(pool_name_or_id, member_subnet_id=None):
+    # Pool để đăng ký server làm member: {"id", "lb_id", "subnet_id", "subnet_cidr"};
+    # None nếu không tìm thấy pool hoặc không lấy được subnet của member
+    record = await resolve_pool(pool_name_or_id)
+    if record is None:
+        return None
+    subnet_cidr = None
+    if member_subnet_id:
+        resp = await AsyncClient.get("network", f"/v2.0/subnets/{member_subnet_id}", params={"fields": "cidr"})
+        if resp.status_code != 200:
+            print(f"❌ Không lấy được subnet '{member_subnet_id}': {resp.status_code} {resp.text}")
+            return None
+        subnet_cidr = resp.json()["subnet"]["cidr"]
+    return {"id": record["id"], "lb_id": pool_lb_id(record), "subnet_id": member_subnet_id, "subnet_cidr": subnet_cidr}
+
+
+async def register_server(pool, server, protocol_port):
+    # Thêm server (bản ghi chi tiết, có addresses) vào pool từ member_pool();
+    # subnet_id chỉ gắn khi IP thật sự thuộc subnet đó, không thì Octavia nhận member sai subnet
+    address = member_address(server, pool["subnet_cidr"])
+    if address is None:
+        print(f"⚠️ '{server['name']}' chưa có IPv4 để thêm vào pool {pool['id']}")
+        return None
+    member = {"name": server["name"], "address": address, "protocol_port": protocol_port}
+    if pool["subnet_id"]:
+        if not in_subnet(address, pool["subnet_cidr"]):
+            print(f"⚠️ '{server['name']}' không có IP trong subnet {pool['subnet_id']}")
+            return None
+        member["subnet_id"] = pool["subnet_id"]
+    return await add_member(pool["id"], pool["lb_id"], member)
+
+
+async def list_members(pool_id):
+    resp = await AsyncClient.get("load-balancer", f"/v2.0/lbaas/pools/{pool_id}/members")
+    if resp.status_code != 200:
+        print(f"❌ Lỗi khi lấy member của pool {pool_id}: {resp.status_code} {resp.text}")
+        return None
+    return resp.json().get("members", [])
+
+
+async def _member_call(lb_id, method, path, **kwargs):
+    # Mỗi thay đổi member đưa LB sang PENDING_UPDATE -> các thay đổi đồng thời nhận 409, chờ ACTIVE rồi gửi lại
+    for attempt in range(CONFLICT_RETRIES):
+        resp = await AsyncClient.api(method, "load-balancer", path, **kwargs)
+        if resp.status_code != 409 or lb_id is None or attempt == CONFLICT_RETRIES - 1:
+            return resp
+        # LB không về ACTIVE (hết thời gian, ERROR) -> trả luôn 409 cho caller, không chờ thêm
+        if await Waiter.wait_for("loadbalancers", lb_id, {"ACTIVE"}, timeout=STEP_TIMEOUT) is None:
+            return resp
+    return resp
+
+
+async def add_member(pool_id, lb_id, member):
+    # member: {"name", "address", "protocol_port", "subnet_id"?, "weight"?}
+    resp = await _member_call(lb_id, "POST", f"/v2.0/lbaas/pools/{pool_id}/members", json={"member": member})
+    if resp.status_code != 201:
+        print(f"❌ Lỗi thêm member {member.get('name') or member['address']}: {resp.status_code} {resp.text}")
+        return None
+    item = resp.json()["member"]
+    print(f"✅ Thêm member {item.get('name') or item['address']} vào pool {pool_id}")
+    return item
+
+
+async def update_member(pool_id, lb_id, member_id, changes):
+    resp = await _member_call(lb_id, "PUT", f"/v2.0/lbaas/pools/{pool_id}/members/{member_id}", json={"member": changes})
+    if resp.status_code != 200:
+        print(f"❌ Lỗi cập nhật member {member_id}: {resp.status_code} {resp.text}")
+        return None
+    return resp.json()["member"]
+
+
+async def remove_member(pool_id, lb_id, member_id):
+    resp = await _member_call(lb_id, "DELETE", f"/v2.0/lbaas/pools/{pool_id}/members/{member_id}")
+    if resp.status_code not in (204, 404):
+        print(f"❌ Lỗi xóa member {member_id}: {resp.status_code} {resp.text}")
+        return False
+    return True
@@ -0,0 +1,135 @@
+import asyncio
+import AsyncClient
+import Idempotency
+import Resolver
+import Reference
+from Network import validate_specs, bulk_network_payload, bulk_subnet_payload, remember_bulk
+
+
+
+def iter_networks(limit=None, strict=False):
+    return AsyncClient.iter_pages("network", "/v2.0/networks", "networks", limit=limit, strict=strict)
+
+async def list_networks():
+    # strict: trang giữa chừng lỗi thì báo lỗi, không trả về danh sách thiếu
+    try:
+        networks = [n async for page in iter_networks(strict=True) for n in page]
+    except RuntimeError as e:
+        print(f"❌ Lỗi khi lấy danh sách network: {e}")
+        return None
+    print(f"✅ Có {len(networks)} network:")
+    for n in networks:
+        print(f"- {n['name']} ({n['id']})")
+    return networks
+
+async def create_network(name, cidr, subnet_name=None, gateway_ip=None):
+    # 1️⃣ Tạo network
+    payload_net = {
+        "network": {
+            "name": name,
+            "admin_state_up": True
+        }
+    }
+
+    # Có Idempotency-Key thì ghi vào description để lỗi tạm thời vẫn tìm lại được network đã tạo;
+    # không có thì chỉ gửi lại khi chắc chắn request chưa tới Neutron (lỗi kết nối)
+    key = Idempotency.current_key()
+    if key:
+        payload_net["network"]["description"] = f"idempotency_key={Idempotency.tag(key)}"
+
+    async def _find_created():
+        resp = await AsyncClient.get("network", "/v2.0/networks", params={
+            "name": name, "description": payload_net["network"]["description"]})
+        networks = resp.json().get("networks", []) if resp.status_code == 200 else []
+        return Idempotency.found(201, "network", networks[0]) if networks else None
+
+    find_created = _find_created if key else None
+    resp_net = await Idempotency.post_create("network", "/v2.0/networks", payload_net, find_created)
+    if resp_net.status_code != 201:
+        print(f"❌ Lỗi tạo network: {resp_net.status_code} {resp_net.text}")
+        return None
+
+    network = resp_net.json()["network"]
+    network_id = network["id"]
+    print(f"✅ Tạo network thành công: {network['name']} (id={network_id})")
+    Resolver.remember("networks", network)
+    Reference.remember("networks", network)
+
+    # 2️⃣ Tạo subnet trong network vừa tạo
+    subnet_name = subnet_name or f"{name}_subnet"
+    payload_subnet = {
+        "subnet": {
+            "network_id": network_id,
+            "ip_version": 4,
+            "cidr": cidr,
+            "gateway_ip": gateway_ip,
+            "name": subnet_name
+        }
+    }
+
+    resp_subnet = await Idempotency.post_create("network", "/v2.0/subnets", payload_subnet)
+    if resp_subnet.status_code == 201:
+        subnet = resp_subnet.json()["subnet"]
+        print(f"✅ Tạo subnet thành công: {subnet['name']} (id={subnet['id']}) CIDR={subnet['cidr']}")
+        Resolver.remember("subnets", subnet)
+    else:
+        print(f"⚠️ Tạo network thành công nhưng lỗi khi tạo subnet: {resp_subnet.status_code} {resp_subnet.text}")
+
+    return {
+        "network": network,
+        "subnet": resp_subnet.json().get("subnet") if resp_subnet.status_code == 201 else None
+    }
+
+# =========================================
+# 🗑️ 3. Xóa Network
+# =========================================
+async def delete_network(network_name):
+    network = await Resolver.aresolve("networks", network_name)
+    if not network:
+        print(f"❌ Không tìm thấy network '{network_name}'")
+        return None
+
+    network_id = network["id"]
+    resp = await AsyncClient.delete("network", f"/v2.0/networks/{network_id}")
+    if resp.status_code == 204:
+        print(f"🗑️ Xóa network '{network_name}' (id={network_id}) thành công.")
+        Resolver.forget("networks", network_name)
+        Reference.forget("networks", network_name)
+        # Subnet của network bị xóa theo
+        Resolver.invalidate("subnets")
+        return True
+    else:
+        print(f"❌ Lỗi khi xóa network: {resp.status_code} {resp.text}")
+        return False
+
+
+# =========================================
+# 4. Tạo hàng loạt network + subnet bằng bulk POST của Neutron
+# =========================================
+async def create_networks(specs):
+    # Hai lời gọi cho cả lô; lỗi giữa chừng thì xóa song song các network đã tạo (subnet bị xóa theo)
+    errors = validate_specs(specs)
+    if errors:
+        for e in errors:
+            print(f"❌ {e}")
+        return {"success": False, "errors": errors, "networks": [], "subnets": []}
+
+    resp_net = await Idempotency.post_create("network", "/v2.0/networks", bulk_network_payload(specs))
+    if resp_net.status_code != 201:
+        print(f"❌ Lỗi tạo network hàng loạt: {resp_net.status_code} {resp_net.text}")
+        return {"success": False, "errors": [f"{resp_net.status_code} {resp_net.text}"], "networks": [], "subnets": []}
+    networks = resp_net.json()["networks"]
+    print(f"✅ Tạo {len(networks)} network thành công")
+
+    resp_subnet = await Idempotency.post_create("network", "/v2.0/subnets", bulk_subnet_payload(specs, networks))
+    if resp_subnet.status_code != 201:
+        print(f"❌ Lỗi tạo subnet hàng loạt: {resp_subnet.status_code} {resp_subnet.text}, hoàn tác {len(networks)} network")
+        resps = await asyncio.gather(*(AsyncClient.delete("network", f"/v2.0/networks/{n['id']}") for n in networks))
+        rolled_back = [n["id"] for n, r in zip(networks, resps) if r.status_code in (204, 404)]
+        return {"success": False, "errors": [f"{resp_subnet.status_code} {resp_subnet.text}"],
+                "networks": [], "subnets": [], "rolled_back": rolled_back}
+    subnets = resp_subnet.json()["subnets"]
+    print(f"✅ Tạo {len(subnets)} subnet thành công")
+
+    remember_bulk(networks, subnets)
+    return {"success": True, "errors": [], "networks": networks, "subnets": subnets}
@@ -0,0 +1,97 @@
+import AsyncClient
+import Idempotency
+import Resolver
+
+
+
+async def create_router(router_name, external_network_name):
+    # Tìm external_network_id qua chỉ mục dùng chung
+    external_net = await Resolver.aresolve("networks", external_network_name)
+    if not external_net:
+        print(f"❌ Không tìm thấy external network '{external_network_name}'")
+        return None
+
+    payload = {
+        "router": {
+            "name": router_name,
+            "admin_state_up": True,
+            "external_gateway_info": {
+                "network_id": external_net["id"]
+            }
+        }
+    }
+
+    resp = await Idempotency.post_create("network", "/v2.0/routers", payload)
+    if resp.status_code == 201:
+        router = resp.json()["router"]
+        print(f"✅ Tạo router thành công: {router['name']} (id={router['id']})")
+        Resolver.remember("routers", router)
+        return router
+    else:
+        print(f"❌ Lỗi tạo router: {resp.status_code} {resp.text}")
+        return None
+
+async def delete_router(router_name):
+    # Tìm ID router qua chỉ mục dùng chung
+    router = await Resolver.aresolve("routers", router_name)
+    if not router:
+        print(f"❌ Không tìm thấy router '{router_name}'")
+        return None
+
+    router_id = router["id"]
+    resp = await AsyncClient.delete("network", f"/v2.0/routers/{router_id}")
+    if resp.status_code == 204:
+        print(f"🗑️ Xóa router '{router_name}' (id={router_id}) thành công.")
+        Resolver.forget("routers", router_name)
+        return True
+    else:
+        print(f"❌ Lỗi khi xóa router: {resp.status_code} {resp.text}")
+        return False
+
+async def add_interface(router_name, subnet_name):
+    # Lấy ID router
+    router = await Resolver.aresolve("routers", router_name)
+    if not router:
+        print(f"❌ Không tìm thấy router '{router_name}'")
+        return False
+    router_id = router["id"]
+
+    # Lấy ID subnet
+    subnet = await Resolver.aresolve("subnets", subnet_name)
+    if not subnet:
+        print(f"❌ Không tìm thấy subnet '{subnet_name}'")
+        return False
+    subnet_id = subnet["id"]
+
+    payload = {"subnet_id": subnet_id}
+    resp = await AsyncClient.put("network", f"/v2.0/routers/{router_id}/add_router_interface", json=payload)
+    if resp.status_code == 200:
+        print(f"🔗 Thêm subnet '{subnet_name}' vào router '{router_name}' thành công.")
+        return True
+    else:
+        print(f"❌ Lỗi thêm interface: {resp.status_code} {resp.text}")
+        return False
+
+async def remove_interface(router_name, subnet_name):
+    # Lấy ID router
+    router = await Resolver.aresolve("routers", router_name)
+    if not router:
+        print(f"❌ Không tìm thấy router '{router_name}'")
+        return False
+    router_id = router["id"]
+
+    # Lấy ID subnet
+    subnet = await Resolver.aresolve("subnets", subnet_name)
+    if not subnet:
+        print(f"❌ Không tìm thấy subnet '{subnet_name}'")
+        return False
+    subnet_id = subnet["id"]
+
+    payload = {"subnet_id": subnet_id}
+    resp = await AsyncClient.put("network", f"/v2.0/routers/{router_id}/remove_router_interface", json=payload)
+    if resp.status_code == 200:
+        print(f"❎ Gỡ subnet '{subnet_name}' khỏi router '{router_name}' thành công.")
+        return True
+    else:
+        print(f"❌ Lỗi gỡ interface: {resp.status_code} {resp.text}")
+        return False
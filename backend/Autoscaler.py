@@ -0,0 +1,328 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+import AsyncClient
+import AsyncInstance
+import AsyncLoadBalancer
+import Drain
+import Waiter
+
+# Tự co giãn nhóm bản sao <base>-clone-N theo một tín hiệu tải cắm vào được (LB, CPU đẩy vào, giả lập),
+# bản sao mới ACTIVE thì tự thêm vào pool Octavia, bản sao bị bớt thì được rút êm khỏi pool (Drain) trước khi xóa
+INTERVAL = float(os.environ.get("OS_AUTOSCALE_INTERVAL", 15))
+# Bản sao mới chưa ACTIVE sau chừng này giây thì thôi chờ (vòng đối chiếu sau vẫn sẽ đăng ký nếu nó ACTIVE)
+ACTIVE_TIMEOUT = 600
+HISTORY = 100
+# Trạng thái không còn phục vụ, không tính vào kích thước nhóm
+DEAD_STATUSES = {"ERROR", "DELETED", "SOFT_DELETED", "DELETING"}
+
+# name -> nhóm {"config", "state", "metric", "pool", "task", "pending"}
+_groups = {}
+# name -> (giá trị, thời điểm) do hệ thống giám sát bên ngoài đẩy vào (vd. CPU trung bình)
+_pushed = {}
+
+
+# ---- Nguồn tín hiệu tải: async () -> tổng tải của nhóm, None nếu chưa đo được ----
+
+def lb_connection_rate(lb_id):
+    # Số kết nối mới mỗi giây của LB, từ chênh lệch total_connections giữa hai lần đọc stats
+    last = {}
+
+    async def read():
+        resp = await AsyncClient.get("load-balancer", f"/v2.0/lbaas/loadbalancers/{lb_id}/stats")
+        if resp.status_code != 200:
+            return None
+        total = resp.json()["stats"]["total_connections"]
+        now = time.monotonic()
+        previous, last["sample"] = last.get("sample"), (now, total)
+        # Lần đọc đầu, hoặc bộ đếm bị reset (failover amphora) -> chưa có tốc độ
+        if previous is None or now <= previous[0] or total < previous[1]:
+            return None
+        return (total - previous[1]) / (now - previous[0])
+    return read
+
+
+def lb_active_connections(lb_id):
+    async def read():
+        resp = await AsyncClient.get("load-balancer", f"/v2.0/lbaas/loadbalancers/{lb_id}/stats")
+        if resp.status_code != 200:
+            return None
+        return float(resp.json()["stats"]["active_connections"])
+    return read
+
+
+def push(name, value):
+    _pushed[name] = (float(value), time.time())
+
+
+def pushed(name, max_age=None):
+    # Giá trị cũ hơn max_age (mặc định 3 chu kỳ) coi như mất tín hiệu -> không co giãn theo số liệu cũ
+    async def read():
+        sample = _pushed.get(name)
+        if sample is None or time.time() - sample[1] > (max_age or 3 * _interval(name)):
+            return None
+        return sample[0]
+    return read
+
+
+def simulated(values):
+    # Dùng để thử: values là danh sách (đọc lần lượt, lặp vòng) hoặc hàm theo số giây từ lúc bắt đầu
+    started = time.monotonic()
+    position = {"i": 0}
+
+    async def read():
+        if callable(values):
+            return float(values(time.monotonic() - started))
+        value = values[position["i"] % len(values)]
+        position["i"] += 1
+        return float(value)
+    return read
+
+
+def metric_from_spec(name, spec):
+    # spec từ API: {"type": "lb_connection_rate" | "lb_active_connections", "lb_id"}
+    #            | {"type": "pushed", "max_age"?} | {"type": "simulated", "values": [...]}
+    kind = spec.get("type")
+    if kind == "lb_connection_rate":
+        return lb_connection_rate(spec["lb_id"])
+    if kind == "lb_active_connections":
+        return lb_active_connections(spec["lb_id"])
+    if kind == "pushed":
+        return pushed(name, spec.get("max_age"))
+    if kind == "simulated":
+        return simulated(spec["values"])
+    raise ValueError(f"Nguồn tải không hỗ trợ: {kind}")
+
+
+# ---- Quyết định co giãn ----
+
+def decide(config, state, load, size, now):
+    # Target tracking có vùng chết (hysteresis): chỉ co giãn khi tải mỗi instance lệch khỏi target quá tolerance
+    # liên tiếp `breaches` lần và đã qua cooldown. Trả về (số instance thêm/bớt, lý do)
+    if size < config["min_size"]:
+        return config["min_size"] - size, "dưới min_size"
+    if size > config["max_size"]:
+        return config["max_size"] - size, "vượt max_size"
+
+    per_instance = load / size
+    target, tolerance = config["target"], config["tolerance"]
+    if per_instance > target * (1 + tolerance):
+        state["breach_up"] += 1
+        state["breach_down"] = 0
+    elif per_instance < target * (1 - tolerance):
+        state["breach_down"] += 1
+        state["breach_up"] = 0
+    else:
+        state["breach_up"] = state["breach_down"] = 0
+        return 0, "trong ngưỡng"
+
+    desired = min(max(math.ceil(load / target), config["min_size"]), config["max_size"])
+    if desired > size:
+        if state["breach_up"] < config["breaches"]:
+            return 0, f"quá tải {state['breach_up']}/{config['breaches']} lần"
+        if now - state["last_up"] < config["up_cooldown"]:
+            return 0, "đang cooldown sau scale up"
+        return min(desired - size, config["max_step"]), f"{per_instance:.1f}/instance > {target}"
+    if desired < size:
+        if state["breach_down"] < config["breaches"]:
+            return 0, f"dư tải {state['breach_down']}/{config['breaches']} lần"
+        # Bớt máy phải chờ cả sau lần thêm gần nhất, tránh vừa thêm đã bớt (dao động)
+        if now - max(state["last_up"], state["last_down"]) < config["down_cooldown"]:
+            return 0, "đang cooldown trước scale down"
+        return -min(size - desired, config["max_step"]), f"{per_instance:.1f}/instance < {target}"
+    # desired == size: chạm min/max, hoặc dư tải nhưng bớt một máy thì các máy còn lại vượt target (làm tròn lên)
+    if state["breach_up"]:
+        return 0, "đã ở max_size"
+    if size == config["min_size"]:
+        return 0, "đã ở min_size"
+    return 0, f"dư tải {min(state['breach_down'], config['breaches'])}/{config['breaches']} lần, vẫn cần {size} instance"
+
+
+def serving(server):
+    # Máy đang xóa (Nova giữ status cũ, task_state "deleting") không còn tính vào nhóm,
+    # không thì vòng sau vẫn thấy nhóm quá lớn và xóa thêm lần nữa
+    return server["status"] not in DEAD_STATUSES and server.get("OS-EXT-STS:task_state") != "deleting"
+
+
+# ---- Pool Octavia ----
+
+async def _register(group, server):
+    return await AsyncLoadBalancer.register_server(group["pool"], server, group["config"]["member_port"])
+
+
+async def _register_when_active(group, server_id):
+    try:
+        server = await Waiter.wait_for("servers", server_id, {"ACTIVE"}, timeout=ACTIVE_TIMEOUT)
+        if server is not None and group["pool"] is not None:
+            await _register(group, server)
+    finally:
+        group["pending"].discard(server_id)
+
+
+async def _reconcile_members(group, clones):
+    # Bản sao ACTIVE chưa có trong pool (vd. ACTIVE sau khi hết thời gian chờ) -> đăng ký;
+    # member mang tên bản sao của nhóm mà server không còn -> gỡ
+    pool = group["pool"]
+    members = await AsyncLoadBalancer.list_members(pool["id"])
+    if members is None:
+        return
+    by_name = {m.get("name"): m for m in members}
+    alive = {c["name"] for c in clones}
+    prefix = f"{group['config']['base_instance_name']}-clone"
+    missing = [c for c in clones
+               if c["status"] == "ACTIVE" and c["name"] not in by_name and c["id"] not in group["pending"]]
+    stale = [m for name, m in by_name.items() if name and name.startswith(prefix) and name not in alive]
+    await asyncio.gather(
+        *(_register(group, c) for c in missing),
+        *(AsyncLoadBalancer.remove_member(pool["id"], pool["lb_id"], m["id"]) for m in stale),
+    )
+
+
+# ---- Thực thi ----
+
+async def _scale_out(group, count):
+    config = group["config"]
+    results = await AsyncInstance.scale_up(config["base_instance_name"], config["subnet_id"], count=count)
+    created = [r for r in results or [] if r["success"]]
+    # Đăng ký vào pool khi từng bản sao ACTIVE, chạy nền để vòng điều khiển không bị chặn cả chu kỳ boot
+    for r in created:
+        group["pending"].add(r["id"])
+        task = asyncio.get_running_loop().create_task(_register_when_active(group, r["id"]))
+        group["tasks"].add(task)
+        task.add_done_callback(group["tasks"].discard)
+    return [r["name"] for r in created]
+
+
+async def _scale_in(group, clones, count):
+    # Rút khỏi pool (weight 0, chờ hết kết nối) rồi mới xóa; vòng điều khiển chờ xong mới quyết định tiếp
+    config = group["config"]
+    victims = Drain.choose_victims(clones, count, config["victim_policy"])
+    results = await AsyncInstance.delete_servers(victims, pool=group["pool"], drain_timeout=config["drain_timeout"])
+    return [r["name"] for r in results if r["success"]]
+
+
+async def tick(name):
+    # Một lần đo + quyết định + thực thi; vòng nền gọi định kỳ, cũng gọi trực tiếp được khi thử
+    group = _groups[name]
+    config, state = group["config"], group["state"]
+    clones = await AsyncInstance.list_clones(config["base_instance_name"])
+    if clones is None:
+        return None
+    clones = [c for c in clones if serving(c)]
+    # Instance gốc cũng phục vụ -> kích thước nhóm = gốc + bản sao (kể cả bản sao đang BUILD)
+    size = 1 + len(clones)
+    if group["pool"] is not None:
+        await _reconcile_members(group, clones)
+
+    load = await group["metric"]()
+    now = time.time()
+    decision = {"at": now, "size": size, "load": load, "delta": 0}
+    if load is None:
+        decision["reason"] = "chưa có số liệu tải"
+    else:
+        delta, decision["reason"] = decide(config, state, load, size, now)
+        decision["delta"] = delta
+        # Cooldown chỉ tính từ lần co giãn thực sự có máy được thêm/bớt; thất bại thì vòng sau thử lại
+        if delta > 0:
+            decision["created"] = await _scale_out(group, delta)
+            if decision["created"]:
+                state["last_up"] = now
+        elif delta < 0:
+            decision["deleted"] = await _scale_in(group, clones, -delta)
+            if decision["deleted"]:
+                state["last_down"] = now
+    if decision["delta"]:
+        print(f"📈 Autoscaler {name}: {size} -> {size + decision['delta']} ({decision['reason']})")
+    state["size"], state["load"] = size, load
+    group["history"].append(decision)
+    return decision
+
+
+async def _loop(name):
+    while True:
+        try:
+            await tick(name)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Autoscaler {name} lỗi: {e}")
+        await asyncio.sleep(_interval(name))
+
+
+def _interval(name):
+    group = _groups.get(name)
+    return group["config"]["interval"] if group else INTERVAL
+
+
+async def register(name, base_instance_name, subnet_id, metric, pool=None, member_port=80, member_subnet_id=None,
+                   min_size=1, max_size=5, target=100.0, tolerance=0.2, max_step=2,
+                   up_cooldown=60, down_cooldown=300, breaches=2, interval=None,
+                   victim_policy="newest", drain_timeout=None, start=True):
+    # metric: async () -> tổng tải (xem các nguồn ở trên); target: tải mong muốn trên mỗi instance
+    if not 1 <= min_size <= max_size:
+        raise ValueError("Cần 1 <= min_size <= max_size")
+    if target <= 0 or not 0 <= tolerance < 1:
+        raise ValueError("target phải > 0 và 0 <= tolerance < 1")
+    if victim_policy not in Drain.POLICIES:
+        raise ValueError(f"victim_policy phải là một trong {Drain.POLICIES}")
+
+    pool_info = None
+    if pool:
+        pool_info = await AsyncLoadBalancer.member_pool(pool, member_subnet_id)
+        if pool_info is None:
+            raise ValueError(f"Không dùng được pool '{pool}' (subnet member: {member_subnet_id})")
+
+    stop(name)
+    _groups[name] = {
+        "config": {
+            "name": name, "base_instance_name": base_instance_name, "subnet_id": subnet_id,
+            "member_port": member_port, "member_subnet_id": member_subnet_id,
+            "min_size": min_size, "max_size": max_size, "target": target, "tolerance": tolerance,
+            "max_step": max_step, "up_cooldown": up_cooldown, "down_cooldown": down_cooldown,
+            "breaches": breaches, "interval": interval or INTERVAL,
+            "victim_policy": victim_policy, "drain_timeout": drain_timeout,
+        },
+        "state": {"breach_up": 0, "breach_down": 0, "last_up": 0.0, "last_down": 0.0, "size": None, "load": None},
+        "metric": metric,
+        "pool": pool_info,
+        "pending": set(),
+        "tasks": set(),
+        "history": deque(maxlen=HISTORY),
+        "task": None,
+    }
+    if start:
+        _groups[name]["task"] = asyncio.get_running_loop().create_task(_loop(name))
+    return status(name)
+
+
+def stop(name):
+    group = _groups.pop(name, None)
+    if group is None:
+        return False
+    for task in [group["task"], *group["tasks"]]:
+        if task is not None:
+            task.cancel()
+    return True
+
+
+def stop_all():
+    for name in list(_groups):
+        stop(name)
+
+
+def status(name=None):
+    names = [name] if name else list(_groups)
+    return {
+        n: {
+            "config": _groups[n]["config"],
+            "state": _groups[n]["state"],
+            "pool": _groups[n]["pool"],
+            "running": _groups[n]["task"] is not None and not _groups[n]["task"].done(),
+            "pending_registration": len(_groups[n]["pending"]),
+            "history": list(_groups[n]["history"])[-10:],
+        }
+        for n in names if n in _groups
+    }
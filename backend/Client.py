@@ -0,0 +1,281 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import Identity
+import Metrics
+import Throttle
+
+# ---- Cấu hình pool (có thể ghi đè bằng biến môi trường hoặc configure()) ----
+POOL_SIZE = int(os.environ.get("OS_POOL_SIZE", 20))
+POOL_BLOCK = True
+CONNECT_TIMEOUT = float(os.environ.get("OS_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("OS_READ_TIMEOUT", 60))
+
+# origin ("https://host:port") -> (session, adapter)
+_sessions = {}
+# origin -> bộ đếm thống kê
+_stats = {}
+_lock = threading.Lock()
+
+
+def configure(pool_size=None, connect_timeout=None, read_timeout=None, pool_block=None):
+    global POOL_SIZE, CONNECT_TIMEOUT, READ_TIMEOUT, POOL_BLOCK
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+    if connect_timeout is not None:
+        CONNECT_TIMEOUT = connect_timeout
+    if read_timeout is not None:
+        READ_TIMEOUT = read_timeout
+    if pool_block is not None:
+        POOL_BLOCK = pool_block
+    close()
+
+
+def close():
+    with _lock:
+        for session, _ in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _stats.clear()
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _get_session(origin):
+    with _lock:
+        entry = _sessions.get(origin)
+        if entry is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, pool_block=POOL_BLOCK)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            entry = (session, adapter)
+            _sessions[origin] = entry
+            _stats[origin] = {"requests": 0, "waits": 0, "in_flight": 0, "bytes_in": 0}
+        return entry[0], _stats[origin]
+
+
+def request(method, url, **kwargs):
+    session, stats = _get_session(_origin(url))
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+
+    with _lock:
+        stats["requests"] += 1
+        # Pool đã dùng hết kết nối -> request này phải chờ một kết nối rảnh
+        if stats["in_flight"] >= POOL_SIZE:
+            stats["waits"] += 1
+        stats["in_flight"] += 1
+    try:
+        resp = session.request(method, url, **kwargs)
+    finally:
+        with _lock:
+            stats["in_flight"] -= 1
+
+    with _lock:
+        stats["bytes_in"] += len(resp.content)
+    return resp
+
+
+# ---- Gộp các GET giống hệt nhau đang chạy đồng thời (single-flight) ----
+
+COALESCE_GETS = os.environ.get("OS_COALESCE_GETS", "1") != "0"
+
+# khóa -> _Flight của GET đang chạy
+_flights = {}
+_flight_lock = threading.Lock()
+_flight_stats = {"leaders": 0, "coalesced": 0}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.resp = None
+        self.error = None
+
+
+def flight_key(service_type, path, kwargs):
+    # Cùng project, cùng URL, cùng tham số và header -> cùng kết quả. Có tham số khác (timeout, stream...) thì không gộp
+    if not COALESCE_GETS or kwargs.keys() - {"params", "headers"}:
+        return None
+    params = kwargs.get("params") or ()
+    params = params.items() if isinstance(params, dict) else params
+    return (
+        Identity.project_scope(),
+        service_type,
+        path,
+        tuple(sorted((str(k), str(v)) for k, v in params)),
+        tuple(sorted((kwargs.get("headers") or {}).items())),
+    )
+
+
+def shared_json(resp):
+    # Các caller dùng chung một response chỉ parse JSON một lần -> dữ liệu trả về phải coi là chỉ đọc
+    parsed = []
+
+    def json(**kwargs):
+        if kwargs:
+            return type(resp).json(resp, **kwargs)
+        if not parsed:
+            parsed.append(type(resp).json(resp))
+        return parsed[0]
+    resp.json = json
+    return resp
+
+
+def _coalesced_get(key, service_type, path, kwargs):
+    with _flight_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+            _flight_stats["leaders"] += 1
+        else:
+            _flight_stats["coalesced"] += 1
+    if not leader:
+        Metrics.inc("openstack_coalesced_requests_total", client="sync")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.resp
+
+    try:
+        flight.resp = shared_json(api("GET", service_type, path, **kwargs))
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        # Bỏ khỏi bảng trước khi báo xong: request đến sau lúc này sẽ gọi upstream mới, không nhận kết quả cũ
+        with _flight_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+    return flight.resp
+
+
+def flight_stats():
+    with _flight_lock:
+        return {"in_flight": len(_flights), **_flight_stats}
+
+
+# ---- Gọi API theo service type trong catalog, tự gắn token ----
+
+def api(method, service_type, path, **kwargs):
+    extra_headers = kwargs.pop("headers", None) or {}
+    reauthenticated = False
+    throttled = 0
+    while True:
+        headers, _ = Identity.get_headers()
+        headers.update(extra_headers)
+        url = f"{Identity.get_service_url(service_type)}{path}"
+        # Token bucket + circuit breaker theo service (Throttle); mạch mở thì CircuitOpenError ngay tại đây
+        wait = Throttle.acquire(service_type)
+        started = time.time()
+        try:
+            if wait:
+                time.sleep(wait)
+                started = time.time()
+            resp = request(method, url, headers=headers, **kwargs)
+        except BaseException as e:
+            Throttle.release(service_type, method, error=e)
+            if isinstance(e, Exception):
+                Metrics.record_call(service_type, method, path, started, error=e)
+            raise
+        Metrics.record_call(service_type, method, path, started, status=resp.status_code)
+        retry = Throttle.release(service_type, method, status=resp.status_code, headers=resp.headers)
+        # Token bị thu hồi trước hạn -> xác thực lại và thử thêm một lần
+        if resp.status_code == 401 and not reauthenticated:
+            reauthenticated = True
+            Identity.invalidate(headers.get("X-Auth-Token"))
+            continue
+        # 429/503: Throttle đã chặn bucket tới hết Retry-After, lần acquire sau sẽ tự chờ
+        if retry and throttled < Throttle.MAX_RETRIES:
+            throttled += 1
+            continue
+        return resp
+
+def get(service_type, path, **kwargs):
+    key = flight_key(service_type, path, kwargs)
+    if key is None:
+        return api("GET", service_type, path, **kwargs)
+    return _coalesced_get(key, service_type, path, kwargs)
+
+def post(service_type, path, **kwargs):
+    return api("POST", service_type, path, **kwargs)
+
+def put(service_type, path, **kwargs):
+    return api("PUT", service_type, path, **kwargs)
+
+def delete(service_type, path, **kwargs):
+    return api("DELETE", service_type, path, **kwargs)
+
+
+# ---- Phân trang limit/marker theo chuẩn Nova/Neutron/Octavia ----
+
+PAGE_SIZE = int(os.environ.get("OS_PAGE_SIZE", 200))
+
+def next_marker(data, key, page, limit):
+    links = data.get(f"{key}_links", [])
+    if not page or len(page) < limit or not any(l.get("rel") == "next" for l in links):
+        return None
+    return page[-1]["id"]
+
+def iter_pages(service_type, path, key, params=None, limit=None, strict=False):
+    # Generator trả về từng trang; trang lỗi thì dừng. strict=True: báo lỗi (RuntimeError) thay vì dừng im lặng,
+    # cho caller cần cả danh sách (cache, ảnh chụp) không coi danh sách thiếu là đủ
+    limit = limit or PAGE_SIZE
+    # Giữ dạng danh sách cặp để tham số lặp lại (vd. fields=id&fields=name) không bị gộp mất
+    params = list(params.items() if isinstance(params, dict) else params or [])
+    marker = None
+    while True:
+        page_params = params + [("limit", limit)] + ([("marker", marker)] if marker else [])
+        resp = get(service_type, path, params=page_params)
+        if resp.status_code != 200:
+            if strict:
+                raise RuntimeError(f"Lỗi khi lấy trang {key}: {resp.status_code} {resp.text}")
+            print(f"❌ Lỗi khi lấy trang {key}: {resp.status_code} {resp.text}")
+            return
+        data = resp.json()
+        page = data.get(key, [])
+        yield page
+        marker = next_marker(data, key, page, limit)
+        if marker is None:
+            return
+
+
+def pool_stats():
+    result = {}
+    with _lock:
+        entries = [(origin, adapter, dict(_stats[origin])) for origin, (_, adapter) in _sessions.items()]
+
+    for origin, adapter, stats in entries:
+        new_connections = 0
+        idle = 0
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += pool.num_connections
+            if pool.pool is not None:
+                idle += sum(1 for conn in list(pool.pool.queue) if conn is not None and conn.sock is not None)
+
+        total = stats["requests"]
+        result[origin] = {
+            "pool_size": POOL_SIZE,
+            "requests": total,
+            "new_connections": new_connections,
+            "reuse_ratio": round(1 - new_connections / total, 3) if total else None,
+            "waits": stats["waits"],
+            "in_flight": stats["in_flight"],
+            "idle_sockets": idle,
+            "open_sockets": idle + stats["in_flight"],
+            "bytes_in": stats["bytes_in"],
+        }
+    return result
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import time
+
+import AsyncClient
+import AsyncLoadBalancer
+
+# Bớt máy êm: chọn máy theo policy, đặt weight member = 0 để LB ngừng gửi kết nối mới, chờ kết nối đang mở
+# về 0 (hoặc hết thời gian) rồi gỡ member và mới xóa server
+POLICIES = ("newest", "oldest", "least_loaded")
+TIMEOUT = float(os.environ.get("OS_DRAIN_TIMEOUT", 30))
+POLL_INTERVAL = 2
+# Octavia không có số kết nối theo từng member -> agent/giám sát trên server báo về; cũ hơn MAX_AGE giây thì bỏ qua
+MAX_AGE = 30
+
+# server name -> (số kết nối đang mở, thời điểm báo)
+_reported = {}
+
+
+def report(server_name, connections):
+    _reported[server_name] = (float(connections), time.time())
+
+
+def reported(server_name):
+    sample = _reported.get(server_name)
+    if sample is None or time.time() - sample[1] > MAX_AGE:
+        return None
+    return sample[0]
+
+
+def forget(server_name):
+    _reported.pop(server_name, None)
+
+
+def choose_victims(clones, count, policy="newest"):
+    if policy not in POLICIES:
+        raise ValueError(f"policy phải là một trong {POLICIES}")
+    victims = sorted(clones, key=lambda c: (c.get("created") or "", c["name"]), reverse=policy != "oldest")
+    if policy == "least_loaded":
+        # Máy chưa có số liệu xếp sau; cùng tải thì bớt máy mới nhất trước (sort ổn định giữ thứ tự trên)
+        victims.sort(key=lambda c: (reported(c["name"]) is None, reported(c["name"]) or 0))
+    return victims[:count]
+
+
+async def resolve(pool_name_or_id):
+    record = await AsyncLoadBalancer.resolve_pool(pool_name_or_id)
+    if record is None:
+        return None
+    return {"id": record["id"], "lb_id": AsyncLoadBalancer.pool_lb_id(record)}
+
+
+async def connections(server, pool):
+    # Số kết nối còn mở tới server, None nếu không biết
+    value = reported(server["name"])
+    if value is not None:
+        return value
+    # Cả LB không còn kết nối nào thì member chắc chắn đã rảnh
+    if pool.get("lb_id"):
+        resp = await AsyncClient.get("load-balancer", f"/v2.0/lbaas/loadbalancers/{pool['lb_id']}/stats")
+        if resp.status_code == 200 and resp.json()["stats"]["active_connections"] == 0:
+            return 0
+    return None
+
+
+async def drain(server, pool, timeout=None):
+    # pool: {"id", "lb_id"}; member của server nhận theo tên hoặc IP. Không có số liệu kết nối thì chờ hết timeout
+    timeout = TIMEOUT if timeout is None else timeout
+    started = time.monotonic()
+    members = await AsyncLoadBalancer.list_members(pool["id"]) or []
+    addresses = {a["addr"] for addrs in server.get("addresses", {}).values() for a in addrs}
+    mine = [m for m in members if m.get("name") == server["name"] or m.get("address") in addresses]
+    if not mine:
+        return {"members": [], "drained": True, "waited": 0}
+
+    await asyncio.gather(*(
+        AsyncLoadBalancer.update_member(pool["id"], pool["lb_id"], m["id"], {"weight": 0}) for m in mine
+    ))
+    drained = False
+    while True:
+        if await connections(server, pool) == 0:
+            drained = True
+            break
+        remaining = timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(POLL_INTERVAL, remaining))
+    waited = round(time.monotonic() - started, 1)
+    if not drained:
+        print(f"⚠️ {server['name']} còn kết nối sau {waited}s, vẫn gỡ khỏi pool")
+
+    await asyncio.gather(*(AsyncLoadBalancer.remove_member(pool["id"], pool["lb_id"], m["id"]) for m in mine))
+    print(f"🚰 Đã rút {server['name']} khỏi pool {pool['id']} sau {waited}s")
+    return {"members": [m["id"] for m in mine], "drained": drained, "waited": waited}
@@ -0,0 +1,138 @@
+import asyncio
+import contextvars
+import hashlib
+import os
+import random
+import time
+from collections import OrderedDict
+
+import httpx
+
+import AsyncClient
+
+# Idempotency-Key cho các endpoint tạo tài nguyên: client gửi lại (vd. sau timeout) với cùng key thì nhận lại
+# đúng kết quả lần đầu thay vì tạo thêm một bản; request cùng key đang chạy thì chờ và dùng chung kết quả
+TTL = float(os.environ.get("OS_IDEMPOTENCY_TTL", 24 * 3600))
+MAX_KEYS = int(os.environ.get("OS_IDEMPOTENCY_MAX_KEYS", 10000))
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# POST tạo tài nguyên lên upstream: số lần gửi lại khi lỗi tạm thời và backoff (có jitter)
+CREATE_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8
+# Lỗi mà upstream có thể đã nhận request (tạo xong rồi mới lỗi) -> phải kiểm tra trước khi gửi lại
+AMBIGUOUS_STATUS = {500, 502, 503, 504}
+
+# key -> {"fingerprint", "future", "created_at", "expires_at"}
+_entries = OrderedDict()
+_stats = {"executed": 0, "replayed": 0, "joined": 0, "mismatched": 0}
+# Key của request đang xử lý, để module tạo tài nguyên gắn vào upstream (metadata/description)
+_current = contextvars.ContextVar("idempotency_key", default=None)
+
+
+class KeyReused(ValueError):
+    # Cùng key nhưng khác endpoint hoặc khác nội dung request
+    pass
+
+
+def current_key():
+    return _current.get()
+
+
+def tag(key):
+    # Dấu gắn vào tài nguyên upstream (metadata Nova, description Neutron tối đa 255 ký tự): hash độ dài cố định
+    # thay vì key gốc dài tới MAX_KEY_LENGTH
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def fingerprint(method, path, query, body):
+    return hashlib.sha256(b"\0".join([method.encode(), path.encode(), query.encode(), body])).hexdigest()
+
+
+def _trim(now):
+    for key in list(_entries):
+        entry = _entries[key]
+        if entry["expires_at"] <= now and entry["future"].done():
+            del _entries[key]
+    # Quá giới hạn thì bỏ key cũ nhất đã xong (key đang chạy không bao giờ bị bỏ)
+    for key in list(_entries):
+        if len(_entries) <= MAX_KEYS:
+            return
+        if _entries[key]["future"].done():
+            del _entries[key]
+
+
+async def _execute(key, fn):
+    _current.set(key)
+    return await fn()
+
+
+async def run(key, fingerprint, fn, keep):
+    # fn() -> kết quả; keep(kết quả) quyết định có lưu để phát lại không (lỗi tạm thời thì không, để client thử lại được)
+    # Trả về (kết quả, replayed)
+    now = time.time()
+    _trim(now)
+    entry = _entries.get(key)
+    if entry is not None and entry["expires_at"] <= now and entry["future"].done():
+        del _entries[key]
+        entry = None
+    if entry is not None:
+        if entry["fingerprint"] != fingerprint:
+            _stats["mismatched"] += 1
+            raise KeyReused(f"{HEADER} '{key}' đã được dùng cho một request khác")
+        _stats["joined" if not entry["future"].done() else "replayed"] += 1
+        return await asyncio.shield(entry["future"]), True
+
+    future = asyncio.ensure_future(_execute(key, fn))
+    _entries[key] = {"fingerprint": fingerprint, "future": future, "created_at": now, "expires_at": now + TTL}
+    _stats["executed"] += 1
+
+    def done(task):
+        # Lỗi hoặc kết quả không nên lưu -> bỏ key ngay để lần gửi lại được thực thi lại
+        if task.cancelled() or task.exception() is not None or not keep(task.result()):
+            if _entries.get(key, {}).get("future") is task:
+                del _entries[key]
+    future.add_done_callback(done)
+    # shield: client ngắt kết nối giữa chừng thì việc tạo vẫn chạy xong và được lưu cho lần gửi lại
+    return await asyncio.shield(future), False
+
+
+def stats():
+    return {"keys": len(_entries), "in_flight": sum(1 for e in _entries.values() if not e["future"].done()), **_stats}
+
+
+# ---- Gửi POST tạo tài nguyên, thử lại an toàn ----
+
+def backoff(attempt):
+    # Exponential backoff với full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def found(status_code, key, item):
+    # Tài nguyên tìm thấy sau lỗi tạm thời -> trả về như phản hồi POST thành công để caller xử lý như cũ
+    return httpx.Response(status_code, json={key: item})
+
+
+async def post_create(service_type, path, payload, find=None, retries=CREATE_RETRIES):
+    # Lỗi kết nối trước khi gửi được request thì luôn gửi lại được. Lỗi mà upstream có thể đã tạo xong
+    # (timeout khi đọc, 5xx) chỉ gửi lại khi có find(): tìm tài nguyên theo dấu đã gắn vào payload,
+    # thấy rồi thì trả về như thể POST thành công, không tạo bản thứ hai
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        try:
+            resp = await AsyncClient.post(service_type, path, json=payload)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+            if last:
+                raise
+        except httpx.TransportError:
+            if last or find is None:
+                raise
+        else:
+            if resp.status_code not in AMBIGUOUS_STATUS or last or find is None:
+                return resp
+        await asyncio.sleep(backoff(attempt))
+        if find is not None:
+            existing = await find()
+            if existing is not None:
+                return existing
@@ -1,12 +1,23 @@
-import requests
 import json
 import os
 import time
 import datetime
+import threading
 
-AUTH_URL = "https://cloud-identity.uitiot.vn/v3/auth/tokens"
+import Client
+import Metrics
+
+# OS_AUTH_URL cho phép trỏ sang Keystone khác (vd. bench/fake_openstack.py khi đo hiệu năng)
+AUTH_URL = os.environ.get("OS_AUTH_URL", "https://cloud-identity.uitiot.vn/v3/auth/tokens")
 TOKEN_FILE = "token.json"
 
+# Làm mới token ở nền trước khi hết hạn REFRESH_MARGIN giây
+REFRESH_MARGIN = 300
+# Token còn dưới EXPIRY_SKEW giây thì coi như đã hết hạn
+EXPIRY_SKEW = 30
+# Nếu làm mới ở nền lỗi thì thử lại sau RETRY_DELAY giây
+RETRY_DELAY = 30
+
 auth_data = {
     "auth": {
         "identity": {
@@ -28,18 +39,90 @@ auth_data = {
     }
 }
 
-def get_token_and_catalog():
-    if os.path.exists(TOKEN_FILE):
+# ---- Cache dùng chung cho cả process ----
+# _state = (token, body, expires_at, endpoints), luôn được thay nguyên bộ
+# nên các luồng đọc không cần khóa.
+_state = (None, None, 0, {})
+_lock = threading.Lock()
+_refresh_timer = None
+# Token đã bị Keystone từ chối, không nạp lại từ token.json
+_revoked_token = None
+
+
+def _build_endpoint_map(catalog):
+    endpoints = {}
+    for service in catalog:
+        for ep in service.get("endpoints", []):
+            # Giữ endpoint đầu tiên giống như get_endpoint trước đây
+            endpoints.setdefault((service["type"], ep["interface"]), ep["url"])
+    return endpoints
+
+
+def _is_usable(state):
+    token, body, expires_at, _ = state
+    return token is not None and time.time() < expires_at - EXPIRY_SKEW
+
+
+def _store(token, body, expires_at):
+    global _state
+    _state = (token, body, expires_at, _build_endpoint_map(body["token"]["catalog"]))
+    _schedule_refresh(expires_at)
+
+
+def _schedule_refresh(at_ts):
+    global _refresh_timer
+    if _refresh_timer:
+        _refresh_timer.cancel()
+    delay = max(at_ts - REFRESH_MARGIN - time.time(), 0)
+    _refresh_timer = threading.Timer(delay, _background_refresh)
+    _refresh_timer.daemon = True
+    _refresh_timer.start()
+
+
+def _background_refresh():
+    try:
+        with _lock:
+            _authenticate()
+    except Exception as e:
+        print(f"⚠️ Làm mới token ở nền thất bại: {e}")
+        global _refresh_timer
+        _refresh_timer = threading.Timer(RETRY_DELAY, _background_refresh)
+        _refresh_timer.daemon = True
+        _refresh_timer.start()
+
+
+def _load_token_file():
+    if not os.path.exists(TOKEN_FILE):
+        return False
+    try:
         with open(TOKEN_FILE, "r") as f:
             data = json.load(f)
-            if time.time() < data["expires_at"]:
-                print("🔁 Dùng lại token cũ.")
-                response = requests.post(AUTH_URL, json=auth_data)
-                body = response.json()
-                return data["token"], body
+    except (OSError, ValueError):
+        return False
 
+    # token.json cũ chỉ có token, không có catalog -> phải xác thực lại
+    if "body" not in data or time.time() >= data["expires_at"] - EXPIRY_SKEW:
+        return False
+    if data["token"] == _revoked_token:
+        return False
+
+    print("🔁 Dùng lại token cũ.")
+    Metrics.inc("openstack_auth_total", result="reused_file")
+    _store(data["token"], data["body"], data["expires_at"])
+    return True
+
+
+def _authenticate():
     print("🔑 Yêu cầu token mới...")
-    response = requests.post(AUTH_URL, json=auth_data)
+    started = time.time()
+    try:
+        response = Client.request("POST", AUTH_URL, json=auth_data)
+    except Exception as e:
+        Metrics.record_call("identity", "POST", "/v3/auth/tokens", started, error=e)
+        Metrics.inc("openstack_auth_total", result="error")
+        raise
+    Metrics.record_call("identity", "POST", "/v3/auth/tokens", started, status=response.status_code)
+    Metrics.inc("openstack_auth_total", result="issued" if response.status_code == 201 else "rejected")
     if response.status_code != 201:
         raise Exception(f"❌ Lỗi xác thực: {response.status_code} {response.text}")
 
@@ -50,13 +133,57 @@ def get_token_and_catalog():
     exp_ts = datetime.datetime.fromisoformat(expires.replace("Z", "+00:00")).timestamp()
 
     with open(TOKEN_FILE, "w") as f:
-        json.dump({"token": token, "expires_at": exp_ts}, f)
+        json.dump({"token": token, "expires_at": exp_ts, "body": body}, f)
 
+    _store(token, body, exp_ts)
     print("✅ Token mới:", token)
-    return token, body
+
+
+def get_token_and_catalog():
+    state = _state
+    if _is_usable(state):
+        return state[0], state[1]
+
+    # Single-flight: chỉ một luồng gọi Keystone, các luồng khác chờ rồi dùng kết quả
+    with _lock:
+        if not _is_usable(_state) and not _load_token_file():
+            _authenticate()
+        state = _state
+    return state[0], state[1]
+
+
+def has_valid_token():
+    return _is_usable(_state)
+
+
+def invalidate(token=None):
+    # Gọi khi token bị từ chối (401) để lần sau xác thực lại. token: token đã gửi đi; nhiều request cùng nhận 401
+    # với token cũ thì chỉ request đầu xóa, các request sau thấy token đã được làm mới thì dùng luôn token mới
+    global _state, _revoked_token
+    with _lock:
+        if token is not None and _state[0] != token:
+            return
+        Metrics.inc("openstack_auth_total", result="revoked")
+        _revoked_token = _state[0]
+        _state = (None, None, 0, {})
+
+
+def project_scope():
+    # Project mà mọi token của tiến trình được cấp cho; dùng trong khóa gộp request đọc (Client.flight_key)
+    project = auth_data["auth"]["scope"]["project"]
+    return f"{project['domain'].get('name') or project['domain'].get('id')}/{project['name']}"
+
+
+def get_service_url(service_type, interface="public"):
+    get_token_and_catalog()
+    return _state[3].get((service_type, interface))
 
 
 def get_endpoint(catalog, service_type, interface="public"):
+    token, body, expires_at, endpoints = _state
+    if body is not None and catalog is body["token"]["catalog"]:
+        return endpoints.get((service_type, interface))
+
     for service in catalog:
         if service["type"] == service_type:
             for ep in service.get("endpoints", []):
@@ -66,4 +193,4 @@ def get_endpoint(catalog, service_type, interface="public"):
 
 def get_headers():
     token, body = get_token_and_catalog()
-    return {"X-Auth-Token": token}, body
\ No newline at end of file
+    return {"X-Auth-Token": token}, body
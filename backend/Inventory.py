@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+import AsyncClient
+import Metrics
+
+# Danh sách /vms, /networks kèm ETag: client poll gửi If-None-Match -> 304, hoặc ?since=<etag> -> chỉ phần thay đổi
+# Ảnh chụp dùng lại trong TTL giây nên nhiều dashboard poll cùng lúc chỉ tốn một lần tải upstream
+TTL = float(os.environ.get("OS_INVENTORY_TTL", 2))
+# Số phiên bản cũ giữ lại mỗi kind để tính delta cho ?since=
+HISTORY = 32
+
+# kind -> (service type, path danh sách, khóa trong JSON)
+KINDS = {
+    "servers": ("compute", "/servers/detail", "servers"),
+    "networks": ("network", "/v2.0/networks", "networks"),
+}
+
+# kind -> ảnh chụp hiện tại {"etag", "items" (sắp theo id), "digests" {id: hash}, "generated_at"}
+_snapshots = {}
+_building = {}
+# kind -> OrderedDict etag -> digests của phiên bản đó
+_history = {kind: OrderedDict() for kind in KINDS}
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=10).hexdigest()
+
+
+def _normalize(items):
+    # Cùng nội dung thì cùng ETag bất kể thứ tự upstream trả về hay thứ tự khóa trong JSON
+    items = sorted(items, key=lambda item: item["id"])
+    digests = {item["id"]: _digest(json.dumps(item, sort_keys=True, separators=(",", ":")).encode()) for item in items}
+    etag = _digest("".join(f"{i}:{d};" for i, d in digests.items()).encode())
+    return items, digests, etag
+
+
+async def _fetch(kind):
+    # strict: trang lỗi phải báo lỗi, không được coi là danh sách rỗng (sẽ sinh ETag "rỗng" sai)
+    service_type, path, key = KINDS[kind]
+    return [item async for page in AsyncClient.iter_pages(service_type, path, key, strict=True) for item in page]
+
+
+async def _build(kind):
+    items, digests, etag = _normalize(await _fetch(kind))
+    history = _history[kind]
+    history[etag] = digests
+    history.move_to_end(etag)
+    while len(history) > HISTORY:
+        history.popitem(last=False)
+    return {"etag": etag, "items": items, "digests": digests, "generated_at": time.time()}
+
+
+async def snapshot(kind):
+    current = _snapshots.get(kind)
+    fresh = current is not None and time.time() - current["generated_at"] < TTL
+    Metrics.cache(f"inventory.{kind}", fresh)
+    if fresh:
+        return current
+
+    # Single-flight giống Topology.snapshot
+    task = _building.get(kind)
+    if task is None or task.done():
+        task = _building[kind] = asyncio.ensure_future(_build(kind))
+    _snapshots[kind] = await asyncio.shield(task)
+    return _snapshots[kind]
+
+
+def invalidate(kind=None):
+    for k in [kind] if kind else list(KINDS):
+        _snapshots.pop(k, None)
+
+
+def matches(if_none_match, etag):
+    # If-None-Match: "a", W/"b" hoặc * (so sánh yếu theo RFC 9110)
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/").strip('"') == etag for tag in tags)
+
+
+def delta(kind, current, since):
+    # Phần thay đổi từ phiên bản since tới hiện tại; None nếu since không còn trong lịch sử (client phải tải lại đủ)
+    old = _history[kind].get(since)
+    if old is None:
+        return None
+    digests = current["digests"]
+    return {
+        "etag": current["etag"],
+        "since": since,
+        "added": [item for item in current["items"] if item["id"] not in old],
+        "changed": [item for item in current["items"] if item["id"] in old and old[item["id"]] != digests[item["id"]]],
+        "removed": [item_id for item_id in old if item_id not in digests],
+    }
+
+
+def stats():
+    return {kind: {"etag": snap["etag"], "count": len(snap["items"]),
+                   "age": round(time.time() - snap["generated_at"], 3), "versions": len(_history[kind])}
+            for kind, snap in _snapshots.items()}
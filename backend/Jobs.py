@@ -0,0 +1,96 @@
+import asyncio
+import contextvars
+import time
+import uuid
+from collections import OrderedDict
+
+# Số job chạy đồng thời tối đa, job vượt quá sẽ ở trạng thái pending
+MAX_CONCURRENT_JOBS = 20
+# Giữ lại tối đa bao nhiêu job (cũ nhất đã xong sẽ bị bỏ trước)
+MAX_JOBS = 1000
+
+_jobs = OrderedDict()
+# job_id -> asyncio.Task, giữ tham chiếu để task không bị thu gom giữa chừng
+_tasks = {}
+_semaphore = None
+_semaphore_loop = None
+# Job đang chạy trong context hiện tại, để report() biết cập nhật job nào
+_current = contextvars.ContextVar("current_job", default=None)
+
+
+def _get_semaphore():
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+        _semaphore_loop = loop
+    return _semaphore
+
+
+def _trim():
+    for job_id in list(_jobs):
+        if len(_jobs) <= MAX_JOBS:
+            return
+        if _jobs[job_id]["finished_at"] is not None:
+            del _jobs[job_id]
+
+
+async def _run(job, fn, args, kwargs):
+    async with _get_semaphore():
+        _current.set(job)
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        try:
+            job["result"] = await fn(*args, **kwargs)
+            job["status"] = "succeeded"
+        except asyncio.CancelledError:
+            job["status"] = "cancelled"
+            raise
+        except Exception as e:
+            print(f"❌ Job {job['kind']} ({job['id']}) lỗi: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            _tasks.pop(job["id"], None)
+
+
+def submit(kind, fn, *args, **kwargs):
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "pending",
+        "progress": None,
+        "result": None,
+        "error": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+    _jobs[job["id"]] = job
+    _trim()
+    _tasks[job["id"]] = asyncio.get_running_loop().create_task(_run(job, fn, args, kwargs))
+    print(f"🕒 Đã nhận job {kind} (id={job['id']})")
+    return job
+
+
+def report(progress):
+    # Gọi được từ bất kỳ hàm nào đang chạy bên trong job; ngoài job thì bỏ qua
+    job = _current.get()
+    if job is not None:
+        job["progress"] = progress
+
+
+def get(job_id):
+    return _jobs.get(job_id)
+
+
+def list_jobs(status=None):
+    return [job for job in _jobs.values() if status is None or job["status"] == status]
+
+
+async def shutdown():
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
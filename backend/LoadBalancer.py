@@ -1,154 +1,50 @@
-import requests
 import time
-from Identity import get_endpoint, get_headers
 
-def create_lb(name, vip_subnet_id, description=None):
-    headers, body = get_headers()
-    lb_url = get_endpoint(body["token"]["catalog"], "load-balancer")
+# Các hàm dùng chung (không gọi API) cho AsyncLoadBalancer: thứ tự xóa từng tầng, ghi kết quả xóa.
+# Thao tác với Octavia nằm ở AsyncLoadBalancer, App chỉ gọi bản async.
 
-    if not vip_subnet_id:
-        print("❌ Không có subnet_id hợp lệ")
-        return None
+# Octavia cũ/driver không hỗ trợ ?cascade=true (501/405, hoặc 400 nói về cascade) -> xóa từng tầng
+# trong CASCADE_RETRY giây rồi thử cascade lại (driver có thể đã được nâng cấp, lỗi có thể chỉ thoáng qua)
+CASCADE_RETRY = 600
+_cascade_off_until = 0.0
+# Thứ tự xóa theo phụ thuộc: con trước, cha sau
+TEARDOWN_ORDER = ("members", "healthmonitors", "pools", "listeners")
 
-    payload = {
-        "loadbalancer": {
-            "name": name,
-            "vip_subnet_id": vip_subnet_id,
-            "description": description or "",
-            "admin_state_up": True
-        }
-    }
-
-    resp = requests.post(f"{lb_url}/v2.0/lbaas/loadbalancers", headers=headers, json=payload)
-    if resp.status_code == 201:
-        lb = resp.json()["loadbalancer"]
-        print(f"✅ Tạo Load Balancer thành công: {lb['name']} (id={lb['id']})")
-        return lb
-    else:
-        print(f"❌ Lỗi tạo Load Balancer: {resp.status_code} {resp.text}")
-        return None
 
-def create_listener(name, lb_name, protocol="HTTP", protocol_port=80):
-    headers, body = get_headers()
-    lb_url = get_endpoint(body["token"]["catalog"], "load-balancer")
+def cascade_supported():
+    return time.time() >= _cascade_off_until
 
-    # Lấy id từ tên Load Balancer
-    lbs_resp = requests.get(f"{lb_url}/v2.0/lbaas/loadbalancers", headers=headers)
-    if lbs_resp.status_code != 200:
-        print(f"❌ Lỗi khi lấy danh sách Load Balancer: {lbs_resp.status_code} {lbs_resp.text}")
-        return None
-
-    lbs = lbs_resp.json().get("loadbalancers", [])
-    lb = next((l for l in lbs if l["name"] == lb_name), None)
-    if not lb:
-        print(f"❌ Không tìm thấy Load Balancer '{lb_name}'")
-        return None
-
-    lb_id = lb["id"]
+def cascade_rejected(resp):
+    # 400 thông thường (vd. LB đang ở trạng thái không xóa được) là lỗi của lần xóa này, không phải thiếu cascade
+    global _cascade_off_until
+    if resp.status_code in (405, 501) or (resp.status_code == 400 and "cascade" in resp.text.lower()):
+        print(f"⚠️ Octavia không hỗ trợ cascade delete ({resp.status_code}), xóa từng tầng trong {CASCADE_RETRY}s tới")
+        _cascade_off_until = time.time() + CASCADE_RETRY
+        return True
+    return False
 
-    payload = {
-        "listener": {
-            "name": name,
-            "loadbalancer_id": lb_id,
-            "protocol": protocol,
-            "protocol_port": protocol_port,
-            "admin_state_up": True
-        }
+def teardown_children(lb):
+    # Từ bản ghi chi tiết LB -> {tầng: [(id, path xóa), ...]}; members/healthmonitors lấy từ pool
+    return {
+        "pools": [(p["id"], f"/v2.0/lbaas/pools/{p['id']}") for p in lb.get("pools", [])],
+        "listeners": [(l["id"], f"/v2.0/lbaas/listeners/{l['id']}") for l in lb.get("listeners", [])],
     }
 
-    resp = requests.post(f"{lb_url}/v2.0/lbaas/listeners", headers=headers, json=payload)
-    if resp.status_code == 201:
-        listener = resp.json()["listener"]
-        print(f"✅ Tạo Listener thành công: {listener['name']} (id={listener['id']}) trên LB {lb_name}")
-        return listener
-    else:
-        print(f"❌ Lỗi tạo Listener: {resp.status_code} {resp.text}")
-        return None
-
-
-def create_pool(name, lb_name, protocol="HTTP", lb_algorithm="ROUND_ROBIN"):
-    headers, body = get_headers()
-    lb_url = get_endpoint(body["token"]["catalog"], "load-balancer")
-
-    # Lấy id từ tên Load Balancer
-    lbs_resp = requests.get(f"{lb_url}/v2.0/lbaas/loadbalancers", headers=headers)
-    if lbs_resp.status_code != 200:
-        print(f"❌ Lỗi khi lấy danh sách Load Balancer: {lbs_resp.status_code} {lbs_resp.text}")
-        return None
-
-    lbs = lbs_resp.json().get("loadbalancers", [])
-    lb = next((l for l in lbs if l["name"] == lb_name), None)
-    if not lb:
-        print(f"❌ Không tìm thấy Load Balancer '{lb_name}'")
-        return None
-
-    lb_id = lb["id"]
-
-    payload = {
-        "pool": {
-            "name": name,
-            "loadbalancer_id": lb_id,
-            "protocol": protocol,
-            "lb_algorithm": lb_algorithm,
-            "admin_state_up": True
-        }
+def pool_children(pool):
+    return {
+        "members": [(m["id"], f"/v2.0/lbaas/pools/{pool['id']}/members/{m['id']}") for m in pool.get("members", [])],
+        "healthmonitors": [(pool["healthmonitor_id"], f"/v2.0/lbaas/healthmonitors/{pool['healthmonitor_id']}")]
+                          if pool.get("healthmonitor_id") else [],
     }
 
-    resp = requests.post(f"{lb_url}/v2.0/lbaas/pools", headers=headers, json=payload)
-    if resp.status_code == 201:
-        pool = resp.json()["pool"]
-        print(f"✅ Tạo Pool thành công: {pool['name']} (id={pool['id']})")
-        return pool
+def teardown_record(kind, object_id, resp, started):
+    # 404 nghĩa là đã bị xóa trước đó (vd. pool xóa kéo theo member) -> vẫn tính là xong
+    ok = resp.status_code in (200, 202, 204, 404)
+    record = {"type": kind, "id": object_id, "status": "deleted" if ok else "failed",
+              "latency": round(time.time() - started, 3)}
+    if ok:
+        print(f"🗑️ Đã xóa {kind[:-1]} {object_id}")
     else:
-        print(f"❌ Lỗi tạo Pool: {resp.status_code} {resp.text}")
-        return None
-
-
-def delete_lb(lb_name):
-    headers, body = get_headers()
-    lb_url = get_endpoint(body["token"]["catalog"], "load-balancer")
-
-    # Lấy danh sách LB
-    lbs_resp = requests.get(f"{lb_url}/v2.0/lbaas/loadbalancers", headers=headers)
-    if lbs_resp.status_code != 200:
-        print(f"❌ Lỗi khi lấy danh sách LB: {lbs_resp.status_code}")
-        return False
-
-    lbs = lbs_resp.json().get("loadbalancers", [])
-    lb = next((l for l in lbs if l["name"] == lb_name), None)
-    if not lb:
-        print(f"⚠️ Không tìm thấy LB '{lb_name}'")
-        return False
-
-    lb_id = lb["id"]
-
-    # Xóa tất cả listeners
-    listeners_resp = requests.get(f"{lb_url}/v2.0/lbaas/listeners", headers=headers)
-    if listeners_resp.status_code == 200:
-        for listener in [l for l in listeners_resp.json().get("listeners", []) if l["loadbalancer_id"] == lb_id]:
-            requests.delete(f"{lb_url}/v2.0/lbaas/listeners/{listener['id']}", headers=headers)
-            print(f"🗑️ Đã xóa Listener {listener['name']}")
-
-    # Xóa tất cả pools
-    pools_resp = requests.get(f"{lb_url}/v2.0/lbaas/pools", headers=headers)
-    if pools_resp.status_code == 200:
-        for pool in [p for p in pools_resp.json().get("pools", []) if p["loadbalancer_id"] == lb_id]:
-            requests.delete(f"{lb_url}/v2.0/lbaas/pools/{pool['id']}", headers=headers)
-            print(f"🗑️ Đã xóa Pool {pool['name']}")
-
-    # Xóa LB
-    del_resp = requests.delete(f"{lb_url}/v2.0/lbaas/loadbalancers/{lb_id}", headers=headers)
-    if del_resp.status_code not in [200, 202, 204]:
-        print(f"❌ Lỗi xóa LB: {del_resp.status_code} {del_resp.text}")
-        return False
-
-    # Polling chờ LB thực sự bị xóa
-    for _ in range(10):
-        time.sleep(2)
-        check_resp = requests.get(f"{lb_url}/v2.0/lbaas/loadbalancers/{lb_id}", headers=headers)
-        if check_resp.status_code == 404:
-            print(f"✅ LB '{lb_name}' đã xóa thành công")
-            return True
-
-    print(f"⚠️ LB '{lb_name}' chưa xóa xong, hãy thử lại sau")
-    return False
+        print(f"❌ Lỗi xóa {kind[:-1]} {object_id}: {resp.status_code} {resp.text}")
+        record["error"] = f"{resp.status_code} {resp.text}"
+    return record
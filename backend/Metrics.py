@@ -0,0 +1,154 @@
+import re
+import threading
+import time
+
+# Số đo dạng Prometheus, tự cài để không thêm thư viện; Client/AsyncClient ghi vào ở đường gọi chung
+
+# service type trong catalog -> tên dịch vụ OpenStack dùng làm nhãn
+SERVICE_NAMES = {
+    "compute": "nova",
+    "network": "neutron",
+    "load-balancer": "octavia",
+    "image": "glance",
+    "identity": "keystone",
+}
+# Đoạn path là hành động/chi tiết chứ không phải ID (vd. /servers/detail, /routers/{id}/add_router_interface)
+ACTIONS = {"detail", "action", "tokens", "add_router_interface", "remove_router_interface", "failover", "stats", "status"}
+# Đoạn tiền tố phiên bản/nhóm API bỏ qua khi đặt tên
+PREFIX = re.compile(r"^(v\d+(\.\d+)?|lbaas)$")
+METHOD_OPS = {"GET": "get", "POST": "create", "PUT": "update", "PATCH": "update", "DELETE": "delete", "HEAD": "get"}
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "openstack_upstream_request_duration_seconds": ("histogram", "Thời gian gọi API OpenStack theo service và thao tác"),
+    "openstack_upstream_requests_total": ("counter", "Số lời gọi API OpenStack theo service, thao tác và mã trạng thái"),
+    "openstack_upstream_errors_total": ("counter", "Số lời gọi lỗi mạng/timeout không nhận được phản hồi"),
+    "openstack_auth_total": ("counter", "Số lần xác thực Keystone theo kết quả"),
+    "openstack_cache_requests_total": ("counter", "Số lần tra cache theo cache và kết quả hit/miss"),
+    "openstack_throttled_total": ("counter", "Số lời gọi phải chờ do giới hạn tốc độ hoặc Retry-After"),
+    "openstack_circuit_rejected_total": ("counter", "Số lời gọi bị từ chối ngay vì circuit breaker đang mở"),
+    "openstack_coalesced_requests_total": ("counter", "Số GET dùng chung kết quả của một GET giống hệt đang chạy"),
+}
+
+_lock = threading.Lock()
+# (name, labels tuple) -> giá trị
+_counters = {}
+# (name, labels tuple) -> [bucket counts..., sum, count]
+_histograms = {}
+_op_cache = {}
+
+
+def operation(method, path):
+    # GET /v2.0/routers -> routers.list, GET /servers/detail -> servers.detail,
+    # PUT /v2.0/lbaas/pools/{id}/members -> pools.members.update
+    key = (method, path)
+    op = _op_cache.get(key)
+    if op is not None:
+        return op
+    segments = [s for s in path.split("?", 1)[0].split("/") if s]
+    while segments and PREFIX.match(segments[0]):
+        segments.pop(0)
+    parts, expect_id, is_item = [], False, False
+    for seg in segments:
+        if expect_id and seg not in ACTIONS:
+            expect_id, is_item = False, True
+            continue
+        parts.append(seg)
+        is_item = False
+        expect_id = seg not in ACTIONS
+    if parts and parts[-1] in ACTIONS:
+        op = ".".join(parts)
+    else:
+        suffix = "list" if method == "GET" and not is_item else METHOD_OPS.get(method, method.lower())
+        op = ".".join(parts + [suffix])
+    if len(_op_cache) < 10000:
+        _op_cache[key] = op
+    return op
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                h[i] += 1
+        h[-2] += seconds
+        h[-1] += 1
+
+
+def record_call(service_type, method, path, started, status=None, error=None):
+    service = SERVICE_NAMES.get(service_type, service_type)
+    op = f"{service}.{operation(method, path)}"
+    observe("openstack_upstream_request_duration_seconds", time.time() - started, service=service, op=op)
+    if error is not None:
+        inc("openstack_upstream_errors_total", service=service, op=op, error=type(error).__name__)
+    else:
+        inc("openstack_upstream_requests_total", service=service, op=op, status=str(status))
+
+
+def cache(name, hit):
+    inc("openstack_cache_requests_total", cache=name, result="hit" if hit else "miss")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render(gauges=()):
+    # gauges: [(name, help, value, labels dict)] đọc tại thời điểm scrape (vd. pool kết nối)
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    lines = []
+    described = set()
+
+    def describe(name, kind, text):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        kind, text = HELP.get(name, ("counter", name))
+        describe(name, kind, text)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), h in sorted(histograms.items()):
+        kind, text = HELP.get(name, ("histogram", name))
+        describe(name, kind, text)
+        for bound, count in zip(BUCKETS, h):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {h[-1]}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {round(h[-2], 6)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {h[-1]}")
+
+    # Các mẫu cùng tên phải liền nhau trong định dạng Prometheus
+    for name, text, value, labels in sorted(gauges, key=lambda g: g[0]):
+        if value is None:
+            continue
+        describe(name, "gauge", text)
+        lines.append(f"{name}{_format_labels(_labels(labels))} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -1,90 +1,67 @@
-import requests
-from Identity import get_endpoint, get_headers
+import ipaddress
+import Resolver
+import Reference
 
+# Các hàm dùng chung (không gọi API) cho AsyncNetwork: kiểm tra spec, dựng body bulk, ghi vào cache tên.
+# Thao tác với OpenStack nằm ở AsyncNetwork, App chỉ gọi bản async.
 
+def validate_specs(specs):
+    # specs: [{"name", "cidr", "gateway_ip"?, "subnet_name"?}] -> danh sách lỗi (rỗng nếu hợp lệ)
+    errors = []
+    parsed = []
+    names = set()
+    for i, spec in enumerate(specs):
+        label = f"#{i} '{spec.get('name')}'"
+        if not spec.get("name"):
+            errors.append(f"{label}: thiếu name")
+        elif spec["name"] in names:
+            errors.append(f"{label}: trùng tên trong danh sách")
+        names.add(spec.get("name"))
+        try:
+            net = ipaddress.ip_network(spec["cidr"])
+        except (KeyError, ValueError) as e:
+            errors.append(f"{label}: CIDR không hợp lệ ({e})")
+            continue
+        gateway = spec.get("gateway_ip")
+        if gateway:
+            try:
+                gateway_ok = ipaddress.ip_address(gateway) in net and ipaddress.ip_address(gateway) not in (
+                    net.network_address, net.broadcast_address)
+            except ValueError:
+                gateway_ok = False
+            if not gateway_ok:
+                errors.append(f"{label}: gateway {gateway} không nằm trong {net}")
+        parsed.append((net, label))
 
-def list_networks():
-    headers, body = get_headers()
-    network_url = get_endpoint(body["token"]["catalog"], "network")
-    resp = requests.get(f"{network_url}/v2.0/networks", headers=headers)
-    if resp.status_code == 200:
-        networks = resp.json().get("networks", [])
-        print(f"✅ Có {len(networks)} network:")
-        for n in networks:
-            print(f"- {n['name']} ({n['id']})")
-        return networks
-    else:
-        print(f"❌ Lỗi khi lấy danh sách network: {resp.status_code} {resp.text}")
-        return None
+    # Sắp theo địa chỉ đầu -> chỉ cần so mỗi mạng với mạng kết thúc xa nhất trước nó, O(n log n)
+    parsed.sort(key=lambda p: (p[0].version, p[0].network_address, p[0].prefixlen))
+    widest = None
+    for net, label in parsed:
+        if widest is not None and widest[0].version == net.version and net.overlaps(widest[0]):
+            errors.append(f"{label}: CIDR {net} chồng lấn với {widest[1]} ({widest[0]})")
+        if widest is None or widest[0].version != net.version or net.broadcast_address > widest[0].broadcast_address:
+            widest = (net, label)
+    return errors
 
-def create_network(name, cidr, subnet_name=None, gateway_ip=None):
-    headers, body = get_headers()
-    network_url = get_endpoint(body["token"]["catalog"], "network")
+def bulk_network_payload(specs):
+    return {"networks": [{"name": spec["name"], "admin_state_up": True} for spec in specs]}
 
-    # 1️⃣ Tạo network
-    payload_net = {
-        "network": {
-            "name": name,
-            "admin_state_up": True
+def bulk_subnet_payload(specs, networks):
+    # Neutron trả về network theo đúng thứ tự trong body bulk
+    return {"subnets": [
+        {
+            "network_id": network["id"],
+            "ip_version": ipaddress.ip_network(spec["cidr"]).version,
+            "cidr": spec["cidr"],
+            "gateway_ip": spec.get("gateway_ip"),
+            "name": spec.get("subnet_name") or f"{spec['name']}_subnet",
         }
-    }
+        for spec, network in zip(specs, networks)
+    ]}
 
-    resp_net = requests.post(f"{network_url}/v2.0/networks", headers=headers, json=payload_net)
-    if resp_net.status_code != 201:
-        print(f"❌ Lỗi tạo network: {resp_net.status_code} {resp_net.text}")
-        return None
-
-    network = resp_net.json()["network"]
-    network_id = network["id"]
-    print(f"✅ Tạo network thành công: {network['name']} (id={network_id})")
-
-    # 2️⃣ Tạo subnet trong network vừa tạo
-    subnet_name = subnet_name or f"{name}_subnet"
-    payload_subnet = {
-        "subnet": {
-            "network_id": network_id,
-            "ip_version": 4,
-            "cidr": cidr,
-            "gateway_ip": gateway_ip,
-            "name": subnet_name
-        }
-    }
-
-    resp_subnet = requests.post(f"{network_url}/v2.0/subnets", headers=headers, json=payload_subnet)
-    if resp_subnet.status_code == 201:
-        subnet = resp_subnet.json()["subnet"]
-        print(f"✅ Tạo subnet thành công: {subnet['name']} (id={subnet['id']}) CIDR={subnet['cidr']}")
-    else:
-        print(f"⚠️ Tạo network thành công nhưng lỗi khi tạo subnet: {resp_subnet.status_code} {resp_subnet.text}")
-
-    return {
-        "network": network,
-        "subnet": resp_subnet.json().get("subnet") if resp_subnet.status_code == 201 else None
-    }
-
-# =========================================
-# 🗑️ 3. Xóa Network
-# =========================================
-def delete_network(network_name):
-    headers, body = get_headers()
-    network_url = get_endpoint(body["token"]["catalog"], "network")
-
-    networks_resp = requests.get(f"{network_url}/v2.0/networks", headers=headers)
-    if networks_resp.status_code != 200:
-        print(f"❌ Lỗi khi lấy danh sách networks: {networks_resp.status_code} {networks_resp.text}")
-        return None
-
-    networks = networks_resp.json().get("networks", [])
-    network = next((n for n in networks if n["name"] == network_name), None)
-    if not network:
-        print(f"❌ Không tìm thấy network '{network_name}'")
-        return None
-
-    network_id = network["id"]
-    resp = requests.delete(f"{network_url}/v2.0/networks/{network_id}", headers=headers)
-    if resp.status_code == 204:
-        print(f"🗑️ Xóa network '{network_name}' (id={network_id}) thành công.")
-        return True
-    else:
-        print(f"❌ Lỗi khi xóa network: {resp.status_code} {resp.text}")
-        return False
+def remember_bulk(networks, subnets):
+    for network in networks:
+        Resolver.remember("networks", network)
+        Reference.remember("networks", network)
+    for subnet in subnets:
+        Resolver.remember("subnets", subnet)
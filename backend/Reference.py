@@ -0,0 +1,206 @@
+import asyncio
+import os
+import threading
+import time
+
+import Client
+import AsyncClient
+import Metrics
+
+# Dữ liệu tham chiếu (flavor, image, network, security group) ít thay đổi -> giữ lâu, làm mới nền
+TTL = float(os.environ.get("OS_REFERENCE_TTL", 3600))
+REFRESH_INTERVAL = float(os.environ.get("OS_REFERENCE_REFRESH", 600))
+# Tên không có trong bản tải trong vòng MIN_RELOAD giây thì coi như không tồn tại, không tải lại
+MIN_RELOAD = 5
+# Flavor/image mặc định khi request không chỉ định
+DEFAULT_FLAVOR = os.environ.get("OS_DEFAULT_FLAVOR", "d10.xs1")
+DEFAULT_IMAGE = os.environ.get("OS_DEFAULT_IMAGE", "CentOS 7")
+
+# kind -> (service type, path danh sách, khóa trong JSON, tham số chỉ lấy id/name)
+KINDS = {
+    "flavors": ("compute", "/flavors", "flavors", None),
+    "images": ("image", "/v2/images", "images", None),
+    "networks": ("network", "/v2.0/networks", "networks", [("fields", "id"), ("fields", "name")]),
+    "security_groups": ("network", "/v2.0/security-groups", "security_groups", [("fields", "id"), ("fields", "name")]),
+}
+
+# kind -> ({name: id}, loaded_at); cả tuple được thay một lần nên đọc không cần khóa
+_maps = {}
+_load_locks = {kind: threading.Lock() for kind in KINDS}
+# kind -> asyncio.Task đang tải
+_async_loads = {}
+_refresher = None
+_stats = {"hits": 0, "misses": 0, "loads": 0}
+
+
+def _build(kind, items):
+    by_name = {}
+    for item in items:
+        # Trùng tên thì giữ bản đầu tiên giống next(...) trước đây
+        by_name.setdefault(item.get("name"), item["id"])
+    _maps[kind] = (by_name, time.time())
+    _stats["loads"] += 1
+    return by_name
+
+
+def _glance_next(data):
+    # Glance v2 phân trang bằng trường "next" ("/v2/images?marker=..."), không theo {key}_links
+    next_link = data.get("next")
+    return next_link.split("marker=", 1)[1].split("&", 1)[0] if next_link and "marker=" in next_link else None
+
+
+def load(kind):
+    service_type, path, key, params = KINDS[kind]
+    if kind == "images":
+        items, marker = [], None
+        while True:
+            resp = Client.get(service_type, path, params={"limit": Client.PAGE_SIZE, **({"marker": marker} if marker else {})})
+            if resp.status_code != 200:
+                print(f"❌ Lỗi khi lấy danh sách {kind}: {resp.status_code} {resp.text}")
+                return None
+            data = resp.json()
+            items += data.get(key, [])
+            marker = _glance_next(data)
+            if marker is None:
+                break
+    else:
+        # Trang nào lỗi thì giữ nguyên map cũ, không dựng lại từ danh sách thiếu
+        try:
+            items = [item for page in Client.iter_pages(service_type, path, key, params=params, strict=True)
+                     for item in page]
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return None
+    return _build(kind, items)
+
+
+async def aload(kind):
+    service_type, path, key, params = KINDS[kind]
+    if kind == "images":
+        items, marker = [], None
+        while True:
+            resp = await AsyncClient.get(service_type, path, params={"limit": Client.PAGE_SIZE, **({"marker": marker} if marker else {})})
+            if resp.status_code != 200:
+                print(f"❌ Lỗi khi lấy danh sách {kind}: {resp.status_code} {resp.text}")
+                return None
+            data = resp.json()
+            items += data.get(key, [])
+            marker = _glance_next(data)
+            if marker is None:
+                break
+    else:
+        try:
+            items = [item async for page in AsyncClient.iter_pages(service_type, path, key, params=params, strict=True)
+                     for item in page]
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return None
+    return _build(kind, items)
+
+
+def _lookup(kind, name_or_id):
+    entry = _maps.get(kind)
+    if entry is None or time.time() - entry[1] >= TTL:
+        return None
+    by_name = entry[0]
+    if name_or_id in by_name:
+        return by_name[name_or_id]
+    # Cho phép truyền thẳng ID
+    if name_or_id in by_name.values():
+        return name_or_id
+    return None
+
+
+def _should_reload(kind, entry):
+    # Không có tên trong bản vừa tải (tên sai) thì không tải lại liên tục
+    current = _maps.get(kind)
+    return current is entry and (current is None or time.time() - current[1] >= MIN_RELOAD)
+
+
+def resolve_id(kind, name_or_id):
+    resource_id = _lookup(kind, name_or_id)
+    Metrics.cache(f"reference.{kind}", resource_id is not None)
+    if resource_id is not None:
+        _stats["hits"] += 1
+        return resource_id
+    # Hết hạn hoặc không có tên (có thể vừa được tạo) -> tải lại một lần, các luồng khác chờ dùng chung
+    _stats["misses"] += 1
+    entry = _maps.get(kind)
+    with _load_locks[kind]:
+        if _should_reload(kind, entry):
+            load(kind)
+    return _lookup(kind, name_or_id)
+
+
+async def aresolve_id(kind, name_or_id):
+    resource_id = _lookup(kind, name_or_id)
+    Metrics.cache(f"reference.{kind}", resource_id is not None)
+    if resource_id is not None:
+        _stats["hits"] += 1
+        return resource_id
+    _stats["misses"] += 1
+    task = _async_loads.get(kind)
+    if task is None and _should_reload(kind, _maps.get(kind)):
+        task = asyncio.ensure_future(aload(kind))
+        _async_loads[kind] = task
+        task.add_done_callback(lambda _: _async_loads.pop(kind, None))
+    if task is not None:
+        await asyncio.shield(task)
+    return _lookup(kind, name_or_id)
+
+
+# ---- Ghi xuyên từ các hàm create/delete của mình ----
+
+def remember(kind, item):
+    entry = _maps.get(kind)
+    if entry is not None:
+        _maps[kind] = ({**entry[0], item.get("name"): item["id"]}, entry[1])
+
+
+def forget(kind, name):
+    entry = _maps.get(kind)
+    if entry is not None and name in entry[0]:
+        _maps[kind] = ({k: v for k, v in entry[0].items() if k != name}, entry[1])
+
+
+def invalidate(kind=None):
+    for k in ([kind] if kind else KINDS):
+        _maps.pop(k, None)
+
+
+# ---- Làm ấm lúc khởi động và làm mới nền ----
+
+async def refresh():
+    results = await asyncio.gather(*(aload(kind) for kind in KINDS), return_exceptions=True)
+    for kind, result in zip(KINDS, results):
+        if isinstance(result, Exception) or result is None:
+            print(f"⚠️ Không làm mới được {kind}: {result}")
+
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(REFRESH_INTERVAL)
+        await refresh()
+
+
+async def start():
+    # Làm ấm trước khi nhận request, sau đó làm mới định kỳ để request không phải chờ tải lại
+    global _refresher
+    await refresh()
+    _refresher = asyncio.get_running_loop().create_task(_refresh_loop())
+
+
+async def stop():
+    global _refresher
+    if _refresher is not None:
+        _refresher.cancel()
+        await asyncio.gather(_refresher, return_exceptions=True)
+        _refresher = None
+
+
+def stats():
+    return {
+        **_stats,
+        "sizes": {kind: len(_maps[kind][0]) for kind in KINDS if kind in _maps},
+        "ages": {kind: round(time.time() - _maps[kind][1], 1) for kind in KINDS if kind in _maps},
+    }
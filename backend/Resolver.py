@@ -0,0 +1,160 @@
+import asyncio
+import re
+import threading
+import time
+
+import Client
+import AsyncClient
+import Metrics
+
+# Một mục trong chỉ mục tên -> tài nguyên được coi là còn mới trong TTL giây
+TTL = 60
+
+# kind -> (service type, path danh sách, khóa trong JSON trả về)
+RESOURCES = {
+    "servers": ("compute", "/servers/detail", "servers"),
+    "networks": ("network", "/v2.0/networks", "networks"),
+    "subnets": ("network", "/v2.0/subnets", "subnets"),
+    "routers": ("network", "/v2.0/routers", "routers"),
+    "loadbalancers": ("load-balancer", "/v2.0/lbaas/loadbalancers", "loadbalancers"),
+    "pools": ("load-balancer", "/v2.0/lbaas/pools", "pools"),
+}
+
+# kind -> {name: (resource, ts)}
+_index = {kind: {} for kind in RESOURCES}
+_lock = threading.Lock()
+# kind -> False khi service từ chối tham số lọc, từ đó về sau quét cả danh sách
+_filter_supported = {kind: True for kind in RESOURCES}
+# Khóa chia theo hash(kind, name) để các luồng tra cùng tên dùng chung một request
+_load_locks = [threading.Lock() for _ in range(64)]
+# (kind, name) -> asyncio.Task đang tải
+_async_loads = {}
+
+
+def _filter_params(kind, name):
+    if kind == "servers":
+        # Nova lọc name bằng regex -> neo hai đầu để khớp chính xác
+        return {"name": f"^{re.escape(name)}$"}
+    # Neutron/Octavia lọc chính xác và chỉ trả về các trường cần
+    return [("name", name), ("fields", "id"), ("fields", "name")]
+
+
+def _lookup(kind, name):
+    with _lock:
+        entry = _index[kind].get(name)
+        if entry is None or time.time() - entry[1] >= TTL:
+            return None
+        return entry[0]
+
+
+def _store(kind, items):
+    now = time.time()
+    by_name = {}
+    for item in items:
+        # Trùng tên thì giữ bản đầu tiên giống next(...) trước đây
+        by_name.setdefault(item.get("name"), (item, now))
+    with _lock:
+        _index[kind].update(by_name)
+
+
+def _parse(kind, resp, name):
+    if resp.status_code == 400 and _filter_supported[kind]:
+        print(f"⚠️ Service không hỗ trợ lọc {kind} theo tên, chuyển sang quét danh sách")
+        _filter_supported[kind] = False
+        return None
+    if resp.status_code != 200:
+        print(f"❌ Lỗi khi lấy danh sách {kind}: {resp.status_code} {resp.text}")
+        return None
+    items = resp.json().get(RESOURCES[kind][2], [])
+    # Vẫn so khớp ở client phòng khi service bỏ qua tham số lọc
+    _store(kind, [item for item in items if item.get("name") == name] if _filter_supported[kind] else items)
+    return True
+
+
+def _request_args(kind, name):
+    service_type, path, _ = RESOURCES[kind]
+    if _filter_supported[kind]:
+        return service_type, path, {"params": _filter_params(kind, name)}
+    return service_type, path, {}
+
+
+def _fetch(kind, name):
+    for _ in range(2):
+        filtered = _filter_supported[kind]
+        service_type, path, kwargs = _request_args(kind, name)
+        if _parse(kind, Client.get(service_type, path, **kwargs), name):
+            return True
+        # Chỉ thử lại khi vừa phát hiện service không hỗ trợ lọc
+        if filtered == _filter_supported[kind]:
+            return False
+    return False
+
+
+async def _afetch(kind, name):
+    for _ in range(2):
+        filtered = _filter_supported[kind]
+        service_type, path, kwargs = _request_args(kind, name)
+        if _parse(kind, await AsyncClient.get(service_type, path, **kwargs), name):
+            return True
+        if filtered == _filter_supported[kind]:
+            return False
+    return False
+
+
+def resolve(kind, name):
+    item = _lookup(kind, name)
+    Metrics.cache(f"resolver.{kind}", item is not None)
+    if item is not None:
+        return item
+
+    # Single-flight: luồng tới sau chờ luồng đang tải cùng tên rồi dùng kết quả
+    with _load_locks[hash((kind, name)) % len(_load_locks)]:
+        item = _lookup(kind, name)
+        if item is None and _fetch(kind, name):
+            item = _lookup(kind, name)
+    return item
+
+
+async def aresolve(kind, name):
+    item = _lookup(kind, name)
+    Metrics.cache(f"resolver.{kind}", item is not None)
+    if item is not None:
+        return item
+
+    key = (kind, name)
+    task = _async_loads.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_afetch(kind, name))
+        _async_loads[key] = task
+        task.add_done_callback(lambda _: _async_loads.pop(key, None))
+    if not await asyncio.shield(task):
+        return None
+    return _lookup(kind, name)
+
+
+def resolve_id(kind, name):
+    item = resolve(kind, name)
+    return item["id"] if item else None
+
+
+async def aresolve_id(kind, name):
+    item = await aresolve(kind, name)
+    return item["id"] if item else None
+
+
+# ---- Ghi xuyên: các hàm create/delete của mình cập nhật chỉ mục ngay ----
+
+def remember(kind, item):
+    with _lock:
+        _index[kind][item.get("name")] = (item, time.time())
+
+
+def forget(kind, name):
+    with _lock:
+        _index[kind].pop(name, None)
+
+
+def invalidate(kind=None):
+    with _lock:
+        for k in ([kind] if kind else RESOURCES):
+            _index[k].clear()
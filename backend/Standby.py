@@ -0,0 +1,219 @@
+import asyncio
+import os
+import re
+
+import AsyncClient
+import Resolver
+import Waiter
+from Instance import SCALE_CONCURRENCY, clone_numbers, clone_payload
+
+# Bể máy dự phòng ấm: mỗi instance gốc giữ sẵn vài máy <base>-standby-N đã boot xong rồi tắt hoặc tạm dừng.
+# scale_up lấy máy trong bể trước (đổi tên thành <base>-clone-N rồi start/unpause) nên chỉ mất vài giây
+# thay vì cả chu kỳ boot, rồi bù lại bể ở nền. Tên -standby- nằm ngoài list_clones nên scale_down,
+# autoscaler không đụng tới máy đang chờ.
+# paused: giữ nguyên RAM trên host, unpause gần như tức thì; shutoff: không chiếm CPU/RAM nhưng start phải boot lại OS
+MODES = {"shutoff": ("os-stop", "SHUTOFF"), "paused": ("pause", "PAUSED")}
+# Trạng thái đang chờ -> action để đưa về ACTIVE (theo trạng thái thực tế, nên đổi mode không làm hỏng máy cũ)
+RESUME = {"SHUTOFF": "os-start", "PAUSED": "unpause"}
+MAX_SIZE = int(os.environ.get("OS_STANDBY_MAX", 20))
+BOOT_TIMEOUT = 600
+PARK_TIMEOUT = 120
+
+# base -> {"base_instance_name", "subnet_id", "size", "mode", "task", "dirty", "claimed", "stats"}
+_pools = {}
+
+
+def _prefix(base_instance_name):
+    return f"{base_instance_name}-standby-"
+
+
+async def list_standby(base_instance_name):
+    params = {"name": f"^{re.escape(_prefix(base_instance_name))}"}
+    resp = await AsyncClient.get("compute", "/servers/detail", params=params)
+    if resp.status_code != 200:
+        print(f"Lỗi khi lấy danh sách máy dự phòng: {resp.status_code} {resp.text}")
+        return None
+    return [s for s in resp.json().get("servers", []) if s["name"].startswith(_prefix(base_instance_name))]
+
+
+async def _action(server, action):
+    resp = await AsyncClient.post("compute", f"/servers/{server['id']}/action", json={action: None})
+    if resp.status_code != 202:
+        print(f"❌ Lỗi {action} {server['name']}: {resp.status_code} {resp.text}")
+        return False
+    return True
+
+
+# ---- Bù bể ----
+
+async def _park(pool, server):
+    # BUILD -> ACTIVE -> tắt/tạm dừng; máy đã ở trạng thái chờ thì giữ nguyên
+    server = await Waiter.wait_for("servers", server["id"], {"ACTIVE", *RESUME}, timeout=BOOT_TIMEOUT)
+    if server is None:
+        return False
+    if server["status"] in RESUME:
+        return True
+    action, parked = MODES[pool["mode"]]
+    if not await _action(server, action):
+        return False
+    return await Waiter.wait_for("servers", server["id"], {parked}, timeout=PARK_TIMEOUT) is not None
+
+
+async def _boot(pool, base, name, semaphore):
+    async with semaphore:
+        resp = await AsyncClient.post("compute", "/servers", json=clone_payload(base, name, pool["subnet_id"]))
+    vm = resp.json().get("server") if resp.status_code == 202 else None
+    if not vm:
+        print(f"❌ Lỗi tạo máy dự phòng {name}: {resp.status_code} {resp.text}")
+        pool["stats"]["failed"] += 1
+        return
+    pool["stats"]["booted"] += 1
+    if not await _park(pool, {"id": vm["id"], "name": name}):
+        pool["stats"]["failed"] += 1
+
+
+async def _delete(pool, server):
+    if server["id"] in pool["claimed"]:
+        return
+    resp = await AsyncClient.delete("compute", f"/servers/{server['id']}")
+    if resp.status_code not in (204, 404):
+        print(f"❌ Lỗi xóa máy dự phòng {server['name']}: {resp.status_code} {resp.text}")
+
+
+async def _fill(pool):
+    name = pool["base_instance_name"]
+    servers = await list_standby(name)
+    if servers is None:
+        return
+    # Máy đang được lấy ra dùng không còn thuộc bể
+    servers = [s for s in servers if s["id"] not in pool["claimed"]]
+    broken = [s for s in servers if s["status"] in Waiter.FAILED]
+    live = [s for s in servers if s["status"] not in Waiter.FAILED]
+    # Giảm size -> bỏ máy chưa sẵn sàng trước, giữ lại máy đã ở trạng thái chờ
+    live.sort(key=lambda s: s["status"] not in RESUME)
+    surplus, live = live[pool["size"]:], live[:pool["size"]]
+    missing = pool["size"] - len(live)
+
+    base = None
+    if missing > 0:
+        base = await Resolver.aresolve("servers", name)
+        if not base:
+            print(f"Không tìm thấy instance gốc '{name}' để tạo máy dự phòng")
+            missing = 0
+    numbers = clone_numbers(name, [s["name"] for s in servers], missing, kind="standby")
+    semaphore = asyncio.Semaphore(SCALE_CONCURRENCY)
+    await asyncio.gather(
+        *(_delete(pool, s) for s in broken + surplus),
+        # Máy còn ACTIVE/BUILD (vd. lần bù trước bị ngắt giữa chừng) -> đưa nốt về trạng thái chờ
+        *(_park(pool, s) for s in live if s["status"] not in RESUME),
+        *(_boot(pool, base, f"{_prefix(name)}{n}", semaphore) for n in numbers),
+    )
+    if numbers or surplus or broken:
+        print(f"♻️ Bể dự phòng '{name}': +{len(numbers)} -{len(surplus) + len(broken)} (mục tiêu {pool['size']})")
+
+
+async def _replenish(pool):
+    # take() trong lúc đang bù -> dirty, chạy lại một lượt để bù cả phần vừa lấy
+    while pool["dirty"] and _pools.get(pool["base_instance_name"]) is pool:
+        pool["dirty"] = False
+        try:
+            await _fill(pool)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Lỗi bù bể dự phòng '{pool['base_instance_name']}': {e}")
+
+
+def replenish(base_instance_name):
+    # Bù bể ở nền; đang bù thì chỉ đánh dấu để lượt đang chạy lặp lại
+    pool = _pools.get(base_instance_name)
+    if pool is None:
+        return None
+    pool["dirty"] = True
+    if pool["task"] is None or pool["task"].done():
+        pool["task"] = asyncio.ensure_future(_replenish(pool))
+    return pool["task"]
+
+
+# ---- Lấy máy ra dùng ----
+
+async def _promote(pool, server, clone_name):
+    # Đổi tên trước: máy đã mang tên -clone- thì bể không còn tính nó, kể cả khi start lỗi
+    resp = await AsyncClient.put("compute", f"/servers/{server['id']}", json={"server": {"name": clone_name}})
+    if resp.status_code != 200:
+        print(f"❌ Lỗi đổi tên máy dự phòng {server['name']}: {resp.status_code} {resp.text}")
+        return None
+    Resolver.forget("servers", server["name"])
+    Resolver.forget("servers", clone_name)
+    if not await _action({**server, "name": clone_name}, RESUME[server["status"]]):
+        return {"name": clone_name, "id": server["id"], "success": False, "error": f"{RESUME[server['status']]} lỗi"}
+    pool["stats"]["taken"] += 1
+    print(f"⚡ Lấy máy dự phòng {server['name']} -> {clone_name} (id={server['id']})")
+    # Không ghi status: máy đang chuyển từ PAUSED/SHUTOFF sang ACTIVE, caller chờ ACTIVE nếu cần
+    return {"name": clone_name, "id": server["id"], "success": True, "standby": True}
+
+
+async def take(base_instance_name, numbers, subnet_id):
+    # Lấy tối đa len(numbers) máy đang chờ làm <base>-clone-N; trả về kết quả như scale_up cho các máy đã đổi tên
+    # (có thể ít hơn numbers nếu bể không đủ). Máy chuyển sang ACTIVE sau vài giây, caller tự chờ nếu cần.
+    # Máy trong bể nằm trên subnet của bể -> scale_up sang subnet khác thì không lấy từ bể
+    pool = _pools.get(base_instance_name)
+    if pool is None or not numbers:
+        return []
+    if pool["subnet_id"] != subnet_id:
+        print(f"Bể dự phòng '{base_instance_name}' ở subnet {pool['subnet_id']}, không dùng cho subnet {subnet_id}")
+        return []
+    servers = await list_standby(base_instance_name)
+    ready = [s for s in servers or [] if s["status"] in RESUME and s["id"] not in pool["claimed"]]
+    chosen = list(zip(ready, numbers))
+    # Đánh dấu ngay sau khi lọc (không có await ở giữa) nên hai scale_up đồng thời không lấy trùng máy
+    pool["claimed"].update(s["id"] for s, _ in chosen)
+    try:
+        results = await asyncio.gather(
+            *(_promote(pool, s, f"{base_instance_name}-clone-{n}") for s, n in chosen))
+    finally:
+        pool["claimed"].difference_update(s["id"] for s, _ in chosen)
+    if len(ready) < len(numbers):
+        pool["stats"]["misses"] += len(numbers) - len(ready)
+    replenish(base_instance_name)
+    return [r for r in results if r is not None]
+
+
+# ---- Cấu hình ----
+
+def configure(base_instance_name, subnet_id, size, mode="paused"):
+    # size = 0 -> bể tự xóa hết máy đang chờ rồi ngừng
+    if mode not in MODES:
+        raise ValueError(f"mode phải là một trong {sorted(MODES)}")
+    if not 0 <= size <= MAX_SIZE:
+        raise ValueError(f"Cần 0 <= size <= {MAX_SIZE}")
+    pool = _pools.get(base_instance_name)
+    if pool is None:
+        pool = _pools[base_instance_name] = {
+            "base_instance_name": base_instance_name, "task": None, "dirty": False, "claimed": set(),
+            "stats": {"booted": 0, "taken": 0, "misses": 0, "failed": 0},
+        }
+    pool.update(subnet_id=subnet_id, size=size, mode=mode)
+    replenish(base_instance_name)
+    return status(base_instance_name)
+
+
+def stop_all():
+    for pool in _pools.values():
+        if pool["task"] is not None:
+            pool["task"].cancel()
+    _pools.clear()
+
+
+def status(base_instance_name=None):
+    names = [base_instance_name] if base_instance_name else list(_pools)
+    return {
+        n: {
+            "subnet_id": _pools[n]["subnet_id"],
+            "size": _pools[n]["size"],
+            "mode": _pools[n]["mode"],
+            "replenishing": _pools[n]["task"] is not None and not _pools[n]["task"].done(),
+            **_pools[n]["stats"],
+        }
+        for n in names if n in _pools
+    }
@@ -0,0 +1,176 @@
+import email.utils
+import os
+import threading
+import time
+from collections import deque
+
+import Metrics
+
+# Giới hạn tốc độ (token bucket) và circuit breaker theo từng service, dùng chung cho Client và AsyncClient:
+# mọi module gọi qua Client.api/AsyncClient.api nên fan-out (scale_up, teardown...) cũng bị giới hạn ở một chỗ
+
+# Số request/giây và burst mỗi service; ghi đè riêng bằng OS_RATE_LIMIT_COMPUTE, OS_RATE_LIMIT_LOAD_BALANCER...
+RATE_LIMIT = float(os.environ.get("OS_RATE_LIMIT", 50))
+RATE_BURST = float(os.environ.get("OS_RATE_BURST", 100))
+# 429/503 kèm Retry-After: chờ rồi gửi lại tối đa MAX_RETRIES lần; không có Retry-After thì chờ DEFAULT_RETRY_AFTER giây
+MAX_RETRIES = 3
+DEFAULT_RETRY_AFTER = 1.0
+MAX_RETRY_AFTER = 60.0
+# 503 chỉ gửi lại với method idempotent; 429 nghĩa là request chưa được xử lý nên gửi lại được với mọi method
+IDEMPOTENT = {"GET", "HEAD", "PUT", "DELETE"}
+
+# Circuit breaker: trong WINDOW giây có ít nhất MIN_CALLS lời gọi và tỉ lệ lỗi >= ERROR_THRESHOLD -> mở mạch
+# OPEN_SECONDS giây; sau đó cho một request thăm dò (half-open), thành công thì đóng, lỗi thì mở lại
+WINDOW = float(os.environ.get("OS_BREAKER_WINDOW", 30))
+MIN_CALLS = int(os.environ.get("OS_BREAKER_MIN_CALLS", 10))
+ERROR_THRESHOLD = float(os.environ.get("OS_BREAKER_THRESHOLD", 0.5))
+OPEN_SECONDS = float(os.environ.get("OS_BREAKER_OPEN", 30))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+_lock = threading.Lock()
+_services = {}
+
+
+class CircuitOpenError(Exception):
+    # Không kế thừa RuntimeError: các handler bắt RuntimeError (lỗi upstream) không được nuốt lỗi này,
+    # để nó tới handler 503 + Retry-After của App
+    def __init__(self, service_type, retry_after):
+        super().__init__(f"{service_type} tạm ngắt do lỗi liên tục, thử lại sau {retry_after:.0f}s")
+        self.service_type = service_type
+        self.retry_after = retry_after
+
+
+def _rate(service_type):
+    env = service_type.upper().replace("-", "_")
+    return (float(os.environ.get(f"OS_RATE_LIMIT_{env}", RATE_LIMIT)),
+            float(os.environ.get(f"OS_RATE_BURST_{env}", RATE_BURST)))
+
+
+def _service(service_type):
+    state = _services.get(service_type)
+    if state is None:
+        rate, burst = _rate(service_type)
+        state = _services[service_type] = {
+            "rate": rate, "burst": burst, "tokens": burst, "refilled": time.monotonic(), "blocked_until": 0.0,
+            "state": CLOSED, "opened_at": 0.0, "probing": False, "outcomes": deque(),
+            "throttled": 0, "rejected": 0, "opened": 0,
+        }
+    return state
+
+
+def acquire(service_type):
+    # Giữ chỗ một token; trả về số giây phải chờ trước khi gửi. Mạch đang mở -> CircuitOpenError ngay
+    now = time.monotonic()
+    with _lock:
+        s = _service(service_type)
+        if s["state"] == OPEN:
+            remaining = s["opened_at"] + OPEN_SECONDS - now
+            if remaining > 0:
+                s["rejected"] += 1
+                Metrics.inc("openstack_circuit_rejected_total", service=Metrics.SERVICE_NAMES.get(service_type, service_type))
+                raise CircuitOpenError(service_type, remaining)
+            s["state"] = HALF_OPEN
+        if s["state"] == HALF_OPEN:
+            if s["probing"]:
+                s["rejected"] += 1
+                raise CircuitOpenError(service_type, 1)
+            s["probing"] = True
+
+        s["tokens"] = min(s["burst"], s["tokens"] + (now - s["refilled"]) * s["rate"])
+        s["refilled"] = now
+        s["tokens"] -= 1
+        wait = max(-s["tokens"] / s["rate"] if s["rate"] > 0 else 0, s["blocked_until"] - now, 0)
+    if wait > 0:
+        Metrics.inc("openstack_throttled_total", service=Metrics.SERVICE_NAMES.get(service_type, service_type))
+    return wait
+
+
+def _retry_after(value):
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
+    return min(max(seconds, 0), MAX_RETRY_AFTER)
+
+
+def _record(service_type, s, failed, now):
+    outcomes = s["outcomes"]
+    outcomes.append((now, failed))
+    while outcomes and outcomes[0][0] < now - WINDOW:
+        outcomes.popleft()
+    if s["state"] == HALF_OPEN:
+        s["probing"] = False
+        if failed:
+            s["state"], s["opened_at"] = OPEN, now
+            s["opened"] += 1
+        else:
+            s["state"] = CLOSED
+            outcomes.clear()
+        return
+    failures = sum(1 for _, f in outcomes if f)
+    if s["state"] == CLOSED and len(outcomes) >= MIN_CALLS and failures / len(outcomes) >= ERROR_THRESHOLD:
+        s["state"], s["opened_at"] = OPEN, now
+        s["opened"] += 1
+        print(f"⛔ Ngắt mạch {service_type}: {failures}/{len(outcomes)} lời gọi lỗi trong {WINDOW:.0f}s")
+
+
+def release(service_type, method, status=None, headers=None, error=None):
+    # Ghi kết quả vào breaker; trả về True nếu nên gửi lại (429/503 được phép thử lại, đã chặn bucket theo Retry-After)
+    now = time.monotonic()
+    with _lock:
+        s = _service(service_type)
+        if error is not None and not isinstance(error, Exception):
+            # Caller bị hủy (CancelledError...) không phải lỗi của service
+            if s["state"] == HALF_OPEN:
+                s["probing"] = False
+            return False
+        if status in (429, 503):
+            s["blocked_until"] = max(s["blocked_until"], now + _retry_after((headers or {}).get("Retry-After")))
+            s["throttled"] += 1
+            if status == 503:
+                _record(service_type, s, True, now)
+            elif s["state"] == HALF_OPEN:
+                s["probing"] = False
+            return status == 429 or method in IDEMPOTENT
+        _record(service_type, s, error is not None or (status is not None and status >= 500), now)
+        return False
+
+
+def state(service_type):
+    with _lock:
+        s = _services.get(service_type)
+        if s is None:
+            return CLOSED
+        if s["state"] == OPEN and time.monotonic() - s["opened_at"] >= OPEN_SECONDS:
+            return HALF_OPEN
+        return s["state"]
+
+
+def reset():
+    with _lock:
+        _services.clear()
+
+
+def stats():
+    now = time.monotonic()
+    with _lock:
+        return {
+            service_type: {
+                "state": s["state"],
+                "rate": s["rate"],
+                "tokens": round(min(s["burst"], s["tokens"] + (now - s["refilled"]) * s["rate"]), 1),
+                "blocked_for": round(max(s["blocked_until"] - now, 0), 3),
+                "window_calls": len(s["outcomes"]),
+                "window_errors": sum(1 for _, f in s["outcomes"] if f),
+                "throttled": s["throttled"],
+                "rejected": s["rejected"],
+                "opened": s["opened"],
+            }
+            for service_type, s in _services.items()
+        }
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import time
+
+import AsyncClient
+import Metrics
+
+# Ảnh chụp topology được dùng lại trong TTL giây -> dashboard poll liên tục cũng chỉ tốn một lần tải
+TTL = float(os.environ.get("OS_TOPOLOGY_TTL", 5))
+
+# kind -> (service type, path danh sách, khóa trong JSON, hàm rút gọn bản ghi)
+SOURCES = {
+    "servers": ("compute", "/servers/detail", "servers",
+                lambda s: {"name": s.get("name"), "status": s.get("status")}),
+    "networks": ("network", "/v2.0/networks", "networks",
+                 lambda n: {"name": n.get("name"), "status": n.get("status"), "external": n.get("router:external", False)}),
+    "subnets": ("network", "/v2.0/subnets", "subnets",
+                lambda s: {"name": s.get("name"), "cidr": s.get("cidr"), "network_id": s.get("network_id"),
+                           "gateway_ip": s.get("gateway_ip")}),
+    "ports": ("network", "/v2.0/ports", "ports",
+              lambda p: {"network_id": p.get("network_id"), "device_id": p.get("device_id"),
+                         "device_owner": p.get("device_owner"), "status": p.get("status"),
+                         "fixed_ips": p.get("fixed_ips", [])}),
+    "routers": ("network", "/v2.0/routers", "routers",
+                lambda r: {"name": r.get("name"), "status": r.get("status"),
+                           "external_network_id": (r.get("external_gateway_info") or {}).get("network_id")}),
+    "floatingips": ("network", "/v2.0/floatingips", "floatingips",
+                    lambda f: {"floating_ip_address": f.get("floating_ip_address"), "port_id": f.get("port_id"),
+                               "fixed_ip_address": f.get("fixed_ip_address"), "status": f.get("status")}),
+    "loadbalancers": ("load-balancer", "/v2.0/lbaas/loadbalancers", "loadbalancers",
+                      lambda l: {"name": l.get("name"), "vip_address": l.get("vip_address"),
+                                 "vip_port_id": l.get("vip_port_id"), "vip_subnet_id": l.get("vip_subnet_id"),
+                                 "provisioning_status": l.get("provisioning_status"),
+                                 "operating_status": l.get("operating_status")}),
+    "pools": ("load-balancer", "/v2.0/lbaas/pools", "pools",
+              lambda p: {"name": p.get("name"), "protocol": p.get("protocol"),
+                         "loadbalancers": [l["id"] for l in p.get("loadbalancers", [])],
+                         "members": [m["id"] for m in p.get("members", [])]}),
+}
+
+# Ảnh chụp gần nhất (snapshot, ts) và task đang dựng để các request đồng thời dùng chung
+_snapshot = None
+_building = None
+
+
+async def _collect(kind):
+    service_type, path, key, summarize = SOURCES[kind]
+    # strict: listing lỗi phải vào errors, không được thành collection rỗng trong ảnh chụp
+    items = [item async for page in AsyncClient.iter_pages(service_type, path, key, strict=True) for item in page]
+    return {item["id"]: summarize(item) for item in items}
+
+
+async def _collect_members(pools, errors):
+    # Octavia không có API liệt kê member toàn project -> lấy theo từng pool có member, song song.
+    # Pool nào lỗi thì ghi vào errors (ảnh chụp thiếu phải báo là thiếu)
+    pool_ids = [pool_id for pool_id, pool in pools.items() if pool["members"]]
+    resps = await asyncio.gather(*(
+        AsyncClient.get("load-balancer", f"/v2.0/lbaas/pools/{pool_id}/members") for pool_id in pool_ids
+    ), return_exceptions=True)
+    members = {}
+    for pool_id, resp in zip(pool_ids, resps):
+        if isinstance(resp, Exception) or resp.status_code != 200:
+            error = str(resp) if isinstance(resp, Exception) else f"{resp.status_code} {resp.text}"
+            errors.setdefault("members", {})[pool_id] = error
+            continue
+        for m in resp.json().get("members", []):
+            members[m["id"]] = {"pool_id": pool_id, "address": m.get("address"),
+                                "protocol_port": m.get("protocol_port"), "subnet_id": m.get("subnet_id"),
+                                "operating_status": m.get("operating_status")}
+    return members
+
+
+def _add(index, src, dst):
+    if src is not None and dst is not None:
+        index.setdefault(src, set()).add(dst)
+
+
+def build_graph(nodes):
+    # Chỉ mục kề: mỗi cạnh một chiều, tra O(1) từ id nguồn
+    edges = {name: {} for name in (
+        "network_subnets", "subnet_routers", "router_subnets", "router_external_network",
+        "server_ports", "port_floatingips", "server_floatingips", "subnet_servers",
+        "loadbalancer_pools", "pool_members", "loadbalancer_members", "member_server",
+    )}
+    for subnet_id, subnet in nodes["subnets"].items():
+        _add(edges["network_subnets"], subnet["network_id"], subnet_id)
+
+    for router_id, router in nodes["routers"].items():
+        _add(edges["router_external_network"], router_id, router["external_network_id"])
+
+    # (subnet, ip) -> server để nối member của LB về server
+    server_by_ip = {}
+    for port_id, port in nodes["ports"].items():
+        owner = port["device_owner"] or ""
+        subnets = [ip.get("subnet_id") for ip in port["fixed_ips"]]
+        if owner.startswith("network:router_interface"):
+            for subnet_id in subnets:
+                _add(edges["subnet_routers"], subnet_id, port["device_id"])
+                _add(edges["router_subnets"], port["device_id"], subnet_id)
+        elif owner.startswith("compute:") and port["device_id"] in nodes["servers"]:
+            _add(edges["server_ports"], port["device_id"], port_id)
+            for ip in port["fixed_ips"]:
+                _add(edges["subnet_servers"], ip.get("subnet_id"), port["device_id"])
+                server_by_ip[(ip.get("subnet_id"), ip.get("ip_address"))] = port["device_id"]
+                server_by_ip.setdefault((None, ip.get("ip_address")), port["device_id"])
+
+    for fip_id, fip in nodes["floatingips"].items():
+        _add(edges["port_floatingips"], fip["port_id"], fip_id)
+        port = nodes["ports"].get(fip["port_id"])
+        if port and port["device_id"] in nodes["servers"]:
+            _add(edges["server_floatingips"], port["device_id"], fip_id)
+
+    for pool_id, pool in nodes["pools"].items():
+        for lb_id in pool["loadbalancers"]:
+            _add(edges["loadbalancer_pools"], lb_id, pool_id)
+    for member_id, member in nodes["members"].items():
+        _add(edges["pool_members"], member["pool_id"], member_id)
+        for lb_id in nodes["pools"].get(member["pool_id"], {}).get("loadbalancers", []):
+            _add(edges["loadbalancer_members"], lb_id, member_id)
+        server_id = server_by_ip.get((member["subnet_id"], member["address"])) or server_by_ip.get((None, member["address"]))
+        _add(edges["member_server"], member_id, server_id)
+
+    return {name: {src: sorted(dsts) for src, dsts in index.items()} for name, index in edges.items()}
+
+
+async def _build():
+    started = time.time()
+    kinds = list(SOURCES)
+    results = await asyncio.gather(*(_collect(kind) for kind in kinds), return_exceptions=True)
+    nodes, errors = {}, {}
+    for kind, result in zip(kinds, results):
+        if isinstance(result, Exception):
+            # Service thiếu trong catalog (vd. không có Octavia) không làm hỏng cả ảnh chụp
+            errors[kind] = str(result)
+            result = {}
+        nodes[kind] = result
+    nodes["members"] = await _collect_members(nodes["pools"], errors)
+
+    return {
+        "generated_at": time.time(),
+        "build_seconds": round(time.time() - started, 3),
+        "counts": {kind: len(items) for kind, items in nodes.items()},
+        "errors": errors,
+        "nodes": nodes,
+        "edges": build_graph(nodes),
+    }
+
+
+async def snapshot(refresh=False):
+    global _snapshot, _building
+    fresh = not refresh and _snapshot is not None and time.time() - _snapshot["generated_at"] < TTL
+    Metrics.cache("topology", fresh)
+    if fresh:
+        return _snapshot
+
+    # Single-flight: nhiều request cùng lúc khi cache hết hạn chỉ dựng một lần
+    if _building is None or _building.done():
+        _building = asyncio.ensure_future(_build())
+    _snapshot = await asyncio.shield(_building)
+    return _snapshot
+
+
+def invalidate():
+    global _snapshot
+    _snapshot = None
@@ -0,0 +1,177 @@
+import asyncio
+import datetime
+import random
+import time
+
+import AsyncClient
+
+# Chu kỳ poll: bắt đầu MIN_INTERVAL, không có gì thay đổi thì nhân BACKOFF tới MAX_INTERVAL
+MIN_INTERVAL = 1.0
+MAX_INTERVAL = 15.0
+BACKOFF = 1.6
+JITTER = 0.2
+# Nova changes-since lùi về trước thời điểm đăng ký bao nhiêu giây
+CHANGES_SKEW = 300
+
+# Trạng thái coi như thất bại, waiter kết thúc ngay
+FAILED = {"ERROR"}
+DELETED = "DELETED"
+
+# kind -> (service type, path danh sách, khóa trong JSON, trường trạng thái)
+KINDS = {
+    "servers": ("compute", "/servers/detail", "servers", "status"),
+    "loadbalancers": ("load-balancer", "/v2.0/lbaas/loadbalancers", "loadbalancers", "provisioning_status"),
+    "listeners": ("load-balancer", "/v2.0/lbaas/listeners", "listeners", "provisioning_status"),
+    "pools": ("load-balancer", "/v2.0/lbaas/pools", "pools", "provisioning_status"),
+}
+
+# kind -> {resource_id: [waiter, ...]}; waiter = {"targets", "future", "registered_at", "seen"}
+_waiters = {kind: {} for kind in KINDS}
+# kind -> {"loop", "task", "wakeup", "interval", "polls"}
+_pollers = {}
+
+
+def _iso(ts):
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _poller(kind):
+    loop = asyncio.get_running_loop()
+    poller = _pollers.get(kind)
+    if poller is None or poller["task"].done() or poller["loop"] is not loop:
+        poller = {"loop": loop, "wakeup": asyncio.Event(), "interval": MIN_INTERVAL, "polls": 0}
+        poller["task"] = loop.create_task(_poll_loop(kind, poller))
+        _pollers[kind] = poller
+    return poller
+
+
+async def _fetch(kind):
+    service_type, path, key, _ = KINDS[kind]
+    ids = list(_waiters[kind])
+    if kind == "servers":
+        # Nova không lọc theo nhiều id cho user thường -> chỉ lấy các server thay đổi gần đây
+        oldest = min(w["registered_at"] for ws in _waiters[kind].values() for w in ws)
+        params = {"changes-since": _iso(oldest - CHANGES_SKEW)}
+    else:
+        params = [("id", i) for i in ids] + [("fields", "id"), ("fields", "provisioning_status"), ("fields", "operating_status")]
+
+    resp = await AsyncClient.get(service_type, path, params=params)
+    if resp.status_code != 200:
+        print(f"⚠️ Poll {kind} lỗi: {resp.status_code} {resp.text}")
+        return None
+    return {item["id"]: item for item in resp.json().get(key, []) if item["id"] in _waiters[kind]}
+
+
+async def _fetch_one(kind, resource_id):
+    service_type, path, key, _ = KINDS[kind]
+    path = path.replace("/detail", "")
+    resp = await AsyncClient.get(service_type, f"{path}/{resource_id}")
+    if resp.status_code == 404:
+        return {"id": resource_id, KINDS[kind][3]: DELETED}
+    if resp.status_code != 200:
+        return None
+    return resp.json().get(key[:-1])
+
+
+def _settle(kind, resource_id, item):
+    # Trả về True nếu có waiter được giải quyết
+    status_field = KINDS[kind][3]
+    status = item.get(status_field) if item else None
+    settled = False
+    for waiter in list(_waiters[kind].get(resource_id, [])):
+        waiter["seen"] = True
+        future = waiter["future"]
+        if future.done():
+            pass
+        elif status in waiter["targets"]:
+            future.set_result(item)
+        elif status in FAILED:
+            future.set_result(None)
+            print(f"❌ {kind} {resource_id} chuyển sang {status}")
+        else:
+            continue
+        _waiters[kind][resource_id].remove(waiter)
+        settled = True
+    if not _waiters[kind].get(resource_id):
+        _waiters[kind].pop(resource_id, None)
+    return settled
+
+
+async def _poll_loop(kind, poller):
+    while _waiters[kind]:
+        delay = poller["interval"] * random.uniform(1 - JITTER, 1 + JITTER)
+        poller["wakeup"].clear()
+        try:
+            await asyncio.wait_for(poller["wakeup"].wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        if not _waiters[kind]:
+            break
+
+        try:
+            items = await _fetch(kind)
+        except Exception as e:
+            # Lỗi mạng hoặc mạch đang mở (Throttle): lùi lại rồi poll tiếp, không để poller chết bỏ rơi waiter
+            print(f"⚠️ Poll {kind} lỗi: {e}")
+            items = None
+        poller["polls"] += 1
+        if items is None:
+            poller["interval"] = min(poller["interval"] * BACKOFF, MAX_INTERVAL)
+            continue
+
+        changed = False
+        for resource_id in list(_waiters[kind]):
+            item = items.get(resource_id)
+            if item is None:
+                # Octavia: không có trong kết quả chưa chắc đã xóa (danh sách bị phân trang, bộ lọc id bị bỏ qua)
+                # -> hỏi riêng, chỉ 404 mới là DELETED.
+                # Server không đổi gì kể từ changes-since: hỏi riêng một lần để biết trạng thái hiện tại
+                if kind != "servers" or any(not w["seen"] for w in _waiters[kind].get(resource_id, [])):
+                    try:
+                        item = await _fetch_one(kind, resource_id)
+                    except Exception as e:
+                        print(f"⚠️ Lấy {kind} {resource_id} lỗi: {e}")
+            if item is not None:
+                changed = _settle(kind, resource_id, item) or changed
+
+        poller["interval"] = MIN_INTERVAL if changed else min(poller["interval"] * BACKOFF, MAX_INTERVAL)
+
+
+async def wait_for(kind, resource_id, targets, timeout=600):
+    # Chờ tài nguyên đạt một trong các trạng thái targets ("DELETED" = đã bị xóa).
+    # Trả về bản ghi cuối cùng, hoặc None khi lỗi/hết thời gian.
+    loop = asyncio.get_running_loop()
+    waiter = {
+        "targets": set(targets),
+        "future": loop.create_future(),
+        "registered_at": time.time(),
+        "seen": False,
+    }
+    _waiters[kind].setdefault(resource_id, []).append(waiter)
+    poller = _poller(kind)
+    # Có waiter mới mà poller đang lùi xa -> poll lại sớm
+    if poller["interval"] > MIN_INTERVAL:
+        poller["interval"] = MIN_INTERVAL
+        poller["wakeup"].set()
+    try:
+        return await asyncio.wait_for(asyncio.shield(waiter["future"]), timeout)
+    except asyncio.TimeoutError:
+        print(f"⚠️ Hết thời gian chờ {kind} {resource_id} đạt {sorted(targets)}")
+        return None
+    finally:
+        waiters = _waiters[kind].get(resource_id, [])
+        if waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                _waiters[kind].pop(resource_id, None)
+
+
+def stats():
+    return {
+        kind: {
+            "waiting": sum(len(ws) for ws in _waiters[kind].values()),
+            "polls": _pollers[kind]["polls"] if kind in _pollers else 0,
+            "interval": round(_pollers[kind]["interval"], 2) if kind in _pollers else None,
+        }
+        for kind in KINDS
+    }
@@ -0,0 +1,179 @@
+import asyncio
+import datetime
+import os
+import time
+import uuid
+from collections import deque
+
+import AsyncClient
+
+# Một poller dùng chung cho mọi client /watch -> tải upstream không phụ thuộc số client
+INTERVAL = float(os.environ.get("OS_WATCH_INTERVAL", 5))
+# Server chỉ lấy phần thay đổi (changes-since); cứ FULL_EVERY lần poll thì tải đủ một lần để đối chiếu
+FULL_EVERY = 12
+CHANGES_SKEW = 2
+# Số sự kiện giữ lại để client kết nối lại (Last-Event-ID) nhận bù
+HISTORY = 1000
+# Hàng đợi mỗi client; client đọc chậm làm đầy hàng đợi thì nhận "resync" thay vì làm chậm poller
+QUEUE_SIZE = 1000
+
+# kind -> (service type, path, khóa trong JSON, tham số, các trường theo dõi)
+KINDS = {
+    "servers": ("compute", "/servers/detail", "servers", None, ("name", "status")),
+    "networks": ("network", "/v2.0/networks", "networks",
+                 [("fields", "id"), ("fields", "name"), ("fields", "status")], ("name", "status")),
+    "loadbalancers": ("load-balancer", "/v2.0/lbaas/loadbalancers", "loadbalancers",
+                      [("fields", "id"), ("fields", "name"), ("fields", "provisioning_status"),
+                       ("fields", "operating_status")], ("name", "provisioning_status", "operating_status")),
+}
+
+# kind -> {id: {trường theo dõi}}
+_state = {kind: {} for kind in KINDS}
+_history = deque(maxlen=HISTORY)
+_subscribers = set()
+# Các kind đã tải thành công ít nhất một lần
+_loaded = set()
+_seq = 0
+# _seq bắt đầu lại từ 0 mỗi lần khởi động -> id sự kiện gắn epoch của tiến trình,
+# Last-Event-ID của tiến trình trước không bị hiểu nhầm là một vị trí trong lịch sử hiện tại
+EPOCH = uuid.uuid4().hex[:8]
+_task = None
+_ready = None
+_stats = {"polls": 0, "events": 0, "errors": 0}
+
+
+def _iso(ts):
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _summary(kind, item):
+    return {field: item.get(field) for field in KINDS[kind][4]}
+
+
+async def _fetch(kind, since=None):
+    # strict: trang lỗi phải báo lỗi, không được coi là danh sách rỗng
+    # (nếu không, một lần upstream lỗi sẽ sinh sự kiện "removed" cho mọi tài nguyên)
+    service_type, path, key, params = KINDS[kind][:4]
+    params = list(params or [])
+    if since is not None:
+        params.append(("changes-since", _iso(since)))
+    return [item async for page in AsyncClient.iter_pages(service_type, path, key, params=params, strict=True)
+            for item in page]
+
+
+def _diff(kind, items, full):
+    # full=True: items là toàn bộ danh sách; ngược lại chỉ là các bản ghi đã đổi (Nova changes-since)
+    old = _state[kind]
+    new = dict(old) if not full else {}
+    events = []
+    for item in items:
+        if item.get("status") == "DELETED" and not full:
+            if item["id"] in new:
+                events.append({"kind": kind, "type": "removed", "id": item["id"], "old": new.pop(item["id"])})
+            continue
+        summary = _summary(kind, item)
+        new[item["id"]] = summary
+        before = old.get(item["id"])
+        if before is None:
+            events.append({"kind": kind, "type": "added", "id": item["id"], "new": summary})
+        elif before != summary:
+            events.append({"kind": kind, "type": "changed", "id": item["id"], "old": before, "new": summary})
+    if full:
+        for resource_id in old.keys() - new.keys():
+            events.append({"kind": kind, "type": "removed", "id": resource_id, "old": old[resource_id]})
+    _state[kind] = new
+    return events
+
+
+def _publish(event):
+    global _seq
+    _seq += 1
+    event = {"seq": _seq, "ts": time.time(), **event}
+    _history.append(event)
+    _stats["events"] += 1
+    for queue in list(_subscribers):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Bỏ các sự kiện đang chờ, báo client tải lại ảnh chụp
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"seq": _seq, "type": "resync"})
+
+
+async def _poll_once(full, since):
+    kinds = list(KINDS)
+    results = await asyncio.gather(*(
+        _fetch(kind, None if full or kind != "servers" else since) for kind in kinds
+    ), return_exceptions=True)
+    _stats["polls"] += 1
+    for kind, items in zip(kinds, results):
+        if isinstance(items, Exception):
+            _stats["errors"] += 1
+            print(f"⚠️ Watch: lỗi khi poll {kind}: {items}")
+            continue
+        events = _diff(kind, items, full or kind != "servers")
+        # Lần tải đầu tiên chỉ dựng trạng thái, không phát "added" cho toàn bộ tài nguyên
+        if kind in _loaded:
+            for event in events:
+                _publish(event)
+        _loaded.add(kind)
+
+
+async def _poll_loop():
+    polls = 0
+    last_started = None
+    while _subscribers:
+        started = time.time()
+        full = last_started is None or polls % FULL_EVERY == 0
+        await _poll_once(full, None if last_started is None else last_started - CHANGES_SKEW)
+        _ready.set()
+        last_started = started
+        polls += 1
+        await asyncio.sleep(INTERVAL)
+
+
+def subscribe():
+    global _task, _ready
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    _subscribers.add(queue)
+    if _task is None or _task.done():
+        # Poller dừng khi không còn client; chạy lại thì ảnh chụp chỉ hợp lệ sau lần poll đủ đầu tiên
+        _ready = asyncio.Event()
+        _task = asyncio.get_running_loop().create_task(_poll_loop())
+    return queue
+
+
+def unsubscribe(queue):
+    _subscribers.discard(queue)
+
+
+async def wait_ready():
+    await _ready.wait()
+
+
+def snapshot(kinds=None):
+    return {"seq": _seq, "type": "snapshot",
+            "state": {kind: _state[kind] for kind in (kinds or KINDS)}}
+
+
+def event_id(seq):
+    return f"{EPOCH}-{seq}"
+
+
+def parse_event_id(value):
+    # Last-Event-ID -> seq trong tiến trình này; khác epoch (server đã khởi động lại) hoặc sai định dạng -> None
+    epoch, _, seq = (value or "").partition("-")
+    return int(seq) if epoch == EPOCH and seq.isdigit() else None
+
+
+def replay(after_seq):
+    # Sự kiện sau after_seq nếu còn trong lịch sử, None nếu đã bị đẩy ra hoặc after_seq vượt quá _seq
+    # (vị trí không biết) -> client cần ảnh chụp mới
+    if after_seq > _seq or (after_seq < _seq and (not _history or _history[0]["seq"] > after_seq + 1)):
+        return None
+    return [event for event in _history if event["seq"] > after_seq]
+
+
+def stats():
+    return {"subscribers": len(_subscribers), "epoch": EPOCH, "seq": _seq, **_stats}
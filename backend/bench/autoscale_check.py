@@ -0,0 +1,151 @@
+# Kiểm tra bộ điều khiển Autoscaler trên OpenStack giả lập: decide() (vùng chết, số lần vượt ngưỡng liên tiếp,
+# cooldown, kẹp min/max, max_step) với thời gian truyền tay, rồi chạy tick() (register start=False) với tải
+# simulated() qua các pha tăng tải, nhiễu, gai đơn lẻ, giảm tải -> nhóm chỉ tăng một đợt rồi giảm một đợt, không dao động.
+# Chạy: cd backend && python bench/autoscale_check.py
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_openstack
+import AsyncClient
+import AsyncInstance
+import Autoscaler
+import Identity
+
+CONFIG = {"min_size": 1, "max_size": 4, "target": 100.0, "tolerance": 0.2, "max_step": 2,
+          "up_cooldown": 60, "down_cooldown": 300, "breaches": 2}
+
+# Tải tổng mỗi lần tick, theo pha (target 100/instance, tolerance 20%)
+PHASES = [
+    ("tăng tải", [400] * 4),
+    ("nhiễu quanh target", [380, 440, 390, 430, 400, 420]),
+    ("gai giảm đơn lẻ", [150, 400, 150, 400]),
+    ("giảm tải", [150] * 4),
+]
+
+_failures = []
+
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label}{f' ({detail})' if detail and not ok else ''}")
+    if not ok:
+        _failures.append(label)
+
+
+def new_state():
+    return {"breach_up": 0, "breach_down": 0, "last_up": 0.0, "last_down": 0.0, "size": None, "load": None}
+
+
+def check_decide():
+    decide = Autoscaler.decide
+    now = 10_000.0
+
+    state = new_state()
+    check("trong vùng chết -> giữ nguyên", decide(CONFIG, state, 110, 1, now)[0] == 0)
+    check("sát biên trên (120/instance) vẫn trong vùng chết", decide(CONFIG, state, 240, 2, now)[0] == 0)
+
+    state = new_state()
+    first = decide(CONFIG, state, 300, 1, now)[0]
+    second = decide(CONFIG, state, 300, 1, now)[0]
+    check("quá tải phải đủ `breaches` lần liên tiếp", (first, second) == (0, 2), f"{first}, {second}")
+
+    state = new_state()
+    decide(CONFIG, state, 300, 1, now)
+    decide(CONFIG, state, 100, 1, now)
+    check("một lần về ngưỡng xóa bộ đếm vượt ngưỡng", decide(CONFIG, state, 300, 1, now)[0] == 0)
+
+    state = {**new_state(), "breach_up": 5}
+    check("max_step giới hạn số máy thêm mỗi lần", decide(CONFIG, state, 1000, 1, now)[0] == CONFIG["max_step"])
+    state = {**new_state(), "breach_up": 5}
+    check("không vượt max_size", decide(CONFIG, state, 1000, 3, now)[0] == 1)
+    check("đang ở max_size -> giữ nguyên", decide(CONFIG, {**new_state(), "breach_up": 5}, 1000, 4, now)[0] == 0)
+    state = {**new_state(), "breach_down": 5}
+    check("không xuống dưới min_size", decide(CONFIG, state, 10, 3, now)[0] == -2)
+    check("dưới min_size -> bù ngay", decide({**CONFIG, "min_size": 2}, new_state(), 0, 1, now)[0] == 1)
+    check("trên max_size -> bớt ngay", decide(CONFIG, new_state(), 1000, 6, now)[0] == -2)
+
+    state = {**new_state(), "breach_up": 5, "last_up": now - 30}
+    check("cooldown sau scale up", decide(CONFIG, state, 1000, 2, now)[0] == 0)
+    state["last_up"] = now - CONFIG["up_cooldown"]
+    check("hết cooldown scale up thì thêm", decide(CONFIG, state, 1000, 2, now)[0] > 0)
+    state = {**new_state(), "breach_down": 5, "last_up": now - 60}
+    check("vừa scale up thì chưa được scale down", decide(CONFIG, state, 10, 4, now)[0] == 0)
+    state["last_up"] = now - CONFIG["down_cooldown"]
+    check("hết cooldown scale down thì bớt", decide(CONFIG, state, 10, 4, now)[0] < 0)
+
+    # Dư tải nhưng 150 tải vẫn cần 2 instance (làm tròn lên) -> không phải "đã ở min/max"
+    state = {**new_state(), "breach_down": 5}
+    delta, reason = decide(CONFIG, state, 150, 2, now)
+    check("dư tải nhưng vẫn cần đủ số máy -> báo lý do dư tải", delta == 0 and reason.startswith("dư tải"), reason)
+    check("đang ở min_size -> báo min_size", decide(CONFIG, {**new_state(), "breach_down": 5}, 10, 1, now)[1]
+          == "đã ở min_size")
+
+
+async def check_ticks(fake):
+    base = "vm-0"
+    subnet_id = next(s["id"] for s in fake.cloud.db["subnets"].values() if s["name"] == "net-0_subnet")
+    loads = [value for _, values in PHASES for value in values]
+    # Cooldown 0 để chạy nhanh: chống dao động ở đây chỉ nhờ vùng chết và số lần vượt ngưỡng liên tiếp
+    await Autoscaler.register("check", base, subnet_id, Autoscaler.simulated(loads),
+                              **{**CONFIG, "up_cooldown": 0, "down_cooldown": 0}, start=False)
+    decisions = []
+    try:
+        for phase, values in PHASES:
+            for _ in values:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    decision = await Autoscaler.tick("check")
+                decisions.append(decision)
+                print(f"   {phase:<20} tải={decision['load']:>5.0f} size={decision['size']} "
+                      f"delta={decision['delta']:+d} ({decision['reason']})")
+    finally:
+        Autoscaler.stop("check")
+
+    deltas = [d["delta"] for d in decisions]
+    signs = [1 if d > 0 else -1 for d in deltas if d]
+    reversals = sum(a != b for a, b in zip(signs, signs[1:]))
+    up, noise, spike, down = (len(values) for _, values in PHASES)
+    check("tăng tải -> lên max_size", decisions[up]["size"] == CONFIG["max_size"], f"size={decisions[up]['size']}")
+    check("nhiễu và gai đơn lẻ không gây co giãn", not any(deltas[up:up + noise + spike]))
+    check("giảm tải -> bớt máy", sum(deltas[-down:]) < 0)
+    check("không dao động (chỉ một lần đổi chiều)", reversals <= 1, f"{reversals} lần đổi chiều: {deltas}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        clones = await AsyncInstance.list_clones(base)
+        # scale up thất bại (không có instance gốc) không được bắt đầu cooldown
+        await Autoscaler.register("failing", "no-such-vm", subnet_id, Autoscaler.simulated([1000]),
+                                  **{**CONFIG, "breaches": 1, "up_cooldown": 3600}, start=False)
+        failed = [await Autoscaler.tick("failing") for _ in range(2)]
+        last_up = Autoscaler.status("failing")["failing"]["state"]["last_up"]
+        Autoscaler.stop("failing")
+    check("scale up thất bại không bắt đầu cooldown",
+          last_up == 0 and all(d["delta"] > 0 and not d["created"] for d in failed),
+          f"last_up={last_up}, {[d['reason'] for d in failed]}")
+    clones = [c for c in clones or [] if Autoscaler.serving(c)]
+    check("số bản sao khớp tổng quyết định", len(clones) == sum(deltas), f"{len(clones)} bản sao, {deltas}")
+    await AsyncClient.aclose()
+
+
+def main():
+    fake = fake_openstack.start(servers=5, networks=2, lbs=0, build_time=0.05)
+    Identity.AUTH_URL = fake.auth_url
+    Identity.TOKEN_FILE = os.path.join(tempfile.mkdtemp(), "token.json")
+    try:
+        print("decide():")
+        check_decide()
+        print("tick() với simulated():")
+        asyncio.run(check_ticks(fake))
+    finally:
+        fake.shutdown()
+    if _failures:
+        print(f"❌ {len(_failures)} kiểm tra lỗi")
+        sys.exit(1)
+    print("✅ Autoscaler không dao động")
+
+
+if __name__ == "__main__":
+    main()
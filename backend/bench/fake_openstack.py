@@ -0,0 +1,622 @@
+# OpenStack giả lập (Keystone/Nova/Glance/Neutron/Octavia) chạy local để đo hiệu năng không cần cloud thật.
+# Phục vụ đúng các endpoint mà các module trong backend gọi, có độ trễ và kích thước dữ liệu cấu hình được.
+# Chạy riêng: cd backend && python bench/fake_openstack.py --port 5000 --latency 20 --servers 500
+#   rồi: OS_AUTH_URL=http://127.0.0.1:5000/v3/auth/tokens uvicorn App:app
+# Hoặc import: server = fake_openstack.start(latency=0.02, servers=500); server.calls / server.reset_calls()
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+def _now_iso(ts=None):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts or time.time()))
+
+
+def _parse_iso(value):
+    return time.mktime(time.strptime(value.replace("Z", "")[:19], "%Y-%m-%dT%H:%M:%S")) - time.timezone
+
+
+class Cloud:
+    # Dữ liệu trong bộ nhớ của cloud giả; mọi thao tác đi qua một khóa
+    def __init__(self, servers=100, networks=10, lbs=2, images=20, flavors=10,
+                 build_time=0.5, lb_time=0.5, delete_time=0.3):
+        self.lock = threading.RLock()
+        self.build_time = build_time
+        self.lb_time = lb_time
+        self.delete_time = delete_time
+        self.db = {kind: {} for kind in (
+            "servers", "flavors", "images", "networks", "subnets", "ports", "routers", "floatingips",
+            "security_groups", "loadbalancers", "listeners", "pools", "members", "healthmonitors")}
+        # Server đã xóa, trả về với status DELETED khi lọc changes-since giống Nova
+        self.deleted_servers = {}
+        # lb_id -> số liệu stats (active_connections, total_connections...) do bài đo đặt
+        self.lb_stats = {}
+        self._seed(servers, networks, lbs, images, flavors)
+
+    # ---- dữ liệu mẫu ----
+
+    def _seed(self, n_servers, n_networks, n_lbs, n_images, n_flavors):
+        for i in range(n_flavors):
+            self.add("flavors", {"name": "d10.xs1" if i == 0 else f"flavor-{i}", "vcpus": 1 + i % 4, "ram": 1024 * (1 + i % 8)})
+        for i in range(n_images):
+            self.add("images", {"name": "CentOS 7" if i == 0 else f"image-{i}", "status": "active"})
+        self.add("security_groups", {"name": "default"})
+        ext = self.add("networks", {"name": "public", "status": "ACTIVE", "router:external": True})
+        self.add("subnets", {"name": "public_subnet", "network_id": ext["id"], "cidr": "203.0.113.0/24",
+                             "gateway_ip": "203.0.113.1", "ip_version": 4})
+        nets = []
+        for i in range(max(n_networks, 1)):
+            net = self.add("networks", {"name": f"net-{i}", "status": "ACTIVE", "router:external": False})
+            subnet = self.add("subnets", {"name": f"net-{i}_subnet", "network_id": net["id"],
+                                          "cidr": f"10.{i // 256}.{i % 256}.0/24",
+                                          "gateway_ip": f"10.{i // 256}.{i % 256}.1", "ip_version": 4})
+            nets.append((net, subnet))
+        router = self.add("routers", {"name": "router-0", "status": "ACTIVE",
+                                      "external_gateway_info": {"network_id": ext["id"]}})
+        for net, subnet in nets:
+            self._router_port(router["id"], subnet)
+        for i in range(n_servers):
+            net, subnet = nets[i % len(nets)]
+            server = self._new_server({"name": f"vm-{i}", "flavorRef": self.first("flavors"),
+                                       "imageRef": self.first("images"), "networks": [{"uuid": net["id"]}]},
+                                      status="ACTIVE")
+            if i % 10 == 0:
+                port = next(p for p in self.db["ports"].values() if p["device_id"] == server["id"])
+                self.add("floatingips", {"floating_ip_address": f"203.0.113.{10 + i % 240}",
+                                         "port_id": port["id"], "status": "ACTIVE"})
+        for i in range(n_lbs):
+            net, subnet = nets[i % len(nets)]
+            lb = self.add("loadbalancers", {"name": f"lb-{i}", "vip_subnet_id": subnet["id"],
+                                            "provisioning_status": "ACTIVE", "operating_status": "ONLINE"})
+            pool = self.add("pools", {"name": f"lb-{i}-pool", "loadbalancer_id": lb["id"], "protocol": "HTTP",
+                                      "lb_algorithm": "ROUND_ROBIN", "provisioning_status": "ACTIVE"})
+            for server in list(self.db["servers"].values())[:3]:
+                addr = next(iter(server["addresses"].values()))[0]["addr"]
+                self.add("members", {"pool_id": pool["id"], "address": addr, "protocol_port": 80,
+                                     "subnet_id": subnet["id"], "operating_status": "ONLINE"})
+
+    def first(self, kind):
+        return next(iter(self.db[kind]))
+
+    def add(self, kind, item):
+        with self.lock:
+            item = {"id": str(uuid.uuid4()), **item}
+            item.setdefault("updated", _now_iso())
+            self.db[kind][item["id"]] = item
+            return item
+
+    def later(self, delay, fn):
+        timer = threading.Timer(delay, lambda: self._locked(fn))
+        timer.daemon = True
+        timer.start()
+
+    def _locked(self, fn):
+        with self.lock:
+            fn()
+
+    # ---- Nova ----
+
+    def _new_server(self, spec, status="BUILD", reservation_id=None):
+        addresses = {}
+        server_id = str(uuid.uuid4())
+        for nic in spec.get("networks", []):
+            # scale_up/clone_payload truyền id subnet vào "uuid" -> nhận cả id network lẫn id subnet
+            subnet = self.db["subnets"].get(nic.get("uuid"))
+            net = self.db["networks"].get(subnet["network_id"] if subnet else nic.get("uuid"))
+            if subnet is None:
+                subnet = next((s for s in self.db["subnets"].values() if net and s["network_id"] == net["id"]), None)
+            if subnet is None:
+                continue
+            ip = self._next_ip(subnet)
+            addresses.setdefault(net["name"], []).append(
+                {"addr": ip, "version": 4, "OS-EXT-IPS:type": "fixed"})
+            self.add("ports", {"network_id": net["id"], "device_id": server_id, "device_owner": "compute:nova",
+                               "status": "ACTIVE", "fixed_ips": [{"subnet_id": subnet["id"], "ip_address": ip}]})
+        server = self.add("servers", {
+            "id": server_id, "name": spec["name"], "status": status,
+            "flavor": {"id": spec.get("flavorRef")}, "image": {"id": spec.get("imageRef")},
+            "addresses": addresses, "key_name": spec.get("key_name"), "metadata": spec.get("metadata", {}),
+            "reservation_id": reservation_id or f"r-{uuid.uuid4().hex[:8]}", "created": _now_iso(),
+        })
+        if status == "BUILD":
+            self.later(self.build_time, lambda: server.update(status="ACTIVE", updated=_now_iso()))
+        return server
+
+    def _next_ip(self, subnet):
+        base = subnet["cidr"].split("/")[0].rsplit(".", 1)[0]
+        used = {ip["ip_address"] for p in self.db["ports"].values() for ip in p["fixed_ips"]
+                if ip["subnet_id"] == subnet["id"]}
+        for host in range(2, 255):
+            if f"{base}.{host}" not in used:
+                return f"{base}.{host}"
+        return f"{base}.254"
+
+    def delete_server(self, server_id):
+        server = self.db["servers"].get(server_id)
+        if server is None:
+            return False
+        server["status"] = "DELETING"
+
+        def gone():
+            if self.db["servers"].pop(server_id, None):
+                for port_id in [p["id"] for p in self.db["ports"].values() if p["device_id"] == server_id]:
+                    del self.db["ports"][port_id]
+                self.deleted_servers[server_id] = {**server, "status": "DELETED", "updated": _now_iso()}
+        self.later(self.delete_time, gone)
+        return True
+
+    # ---- Neutron ----
+
+    def _router_port(self, router_id, subnet):
+        return self.add("ports", {"network_id": subnet["network_id"], "device_id": router_id,
+                                  "device_owner": "network:router_interface", "status": "ACTIVE",
+                                  "fixed_ips": [{"subnet_id": subnet["id"], "ip_address": subnet.get("gateway_ip")}]})
+
+    # ---- Octavia ----
+
+    def lb_busy(self, lb_id, status="PENDING_UPDATE"):
+        lb = self.db["loadbalancers"].get(lb_id)
+        if lb is None:
+            return
+        lb["provisioning_status"] = status
+        self.later(self.lb_time, lambda: lb.update(provisioning_status="ACTIVE", updated=_now_iso()))
+
+    def lb_of(self, kind, item):
+        if kind == "loadbalancers":
+            return item["id"]
+        if kind in ("listeners", "pools"):
+            if item.get("loadbalancer_id"):
+                return item["loadbalancer_id"]
+            listener = self.db["listeners"].get(item.get("listener_id"))
+            return listener and listener["loadbalancer_id"]
+        pool = self.db["pools"].get(item.get("pool_id"))
+        return pool and self.lb_of("pools", pool)
+
+    def lb_view(self, lb):
+        return {**lb,
+                "listeners": [{"id": l["id"]} for l in self.db["listeners"].values() if l["loadbalancer_id"] == lb["id"]],
+                "pools": [{"id": p["id"]} for p in self.db["pools"].values() if self.lb_of("pools", p) == lb["id"]]}
+
+    def pool_view(self, pool):
+        hm = next((h["id"] for h in self.db["healthmonitors"].values() if h["pool_id"] == pool["id"]), None)
+        return {**pool,
+                "loadbalancers": [{"id": self.lb_of("pools", pool)}],
+                "members": [{"id": m["id"]} for m in self.db["members"].values() if m["pool_id"] == pool["id"]],
+                "healthmonitor_id": hm}
+
+    def cascade(self, lb_id):
+        pools = [p["id"] for p in self.db["pools"].values() if self.lb_of("pools", p) == lb_id]
+        for kind, match in (("members", lambda m: m["pool_id"] in pools),
+                            ("healthmonitors", lambda h: h["pool_id"] in pools),
+                            ("pools", lambda p: p["id"] in pools),
+                            ("listeners", lambda l: l["loadbalancer_id"] == lb_id)):
+            for item_id in [i for i, item in self.db[kind].items() if match(item)]:
+                del self.db[kind][item_id]
+
+
+# path (sau tiền tố service) -> kind trong Cloud.db và khóa JSON
+NEUTRON = {"networks": "networks", "subnets": "subnets", "ports": "ports", "routers": "routers",
+           "floatingips": "floatingips", "security-groups": "security_groups"}
+OCTAVIA = {"loadbalancers": "loadbalancers", "listeners": "listeners", "pools": "pools",
+           "healthmonitors": "healthmonitors"}
+SINGULAR = {"networks": "network", "subnets": "subnet", "ports": "port", "routers": "router",
+            "floatingips": "floatingip", "security_groups": "security_group", "loadbalancers": "loadbalancer",
+            "listeners": "listener", "pools": "pool", "healthmonitors": "healthmonitor", "members": "member",
+            "servers": "server", "flavors": "flavor", "images": "image"}
+# Trường điều khiển, không phải bộ lọc
+CONTROL = {"fields", "limit", "marker", "sort_key", "sort_dir", "page_reverse", "cascade"}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def cloud(self):
+        return self.server.cloud
+
+    # ---- tiện ích ----
+
+    def _send(self, code, obj=None, headers=None):
+        body = json.dumps(obj).encode() if obj is not None else b""
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if obj is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return json.loads(self._raw) if self._raw else {}
+
+    def _delay(self):
+        latency, jitter = self.server.latency, self.server.jitter
+        if latency or jitter:
+            time.sleep(max(latency + random.uniform(-jitter, jitter), 0))
+
+    def _page(self, key, items, query, base_path):
+        items = list(items)
+        if "marker" in query:
+            ids = [i["id"] for i in items]
+            marker = query["marker"][0]
+            items = items[ids.index(marker) + 1:] if marker in ids else []
+        links = []
+        if "limit" in query:
+            limit = int(query["limit"][0])
+            if len(items) > limit:
+                links = [{"rel": "next", "href": f"{base_path}?limit={limit}&marker={items[limit - 1]['id']}"}]
+            items = items[:limit]
+        if "fields" in query:
+            items = [{f: item.get(f) for f in query["fields"]} for item in items]
+        return {key: items, f"{key}_links": links}
+
+    def _filter(self, items, query):
+        for field, values in query.items():
+            if field in CONTROL:
+                continue
+            items = [i for i in items if str(i.get(field)) in values
+                     or (isinstance(i.get(field), bool) and str(i.get(field)).lower() in values)]
+        return items
+
+    def _route(self, method):
+        # Đọc hết body trước: phản hồi sớm (409, lỗi giả lập) mà bỏ dở body thì kết nối keep-alive bị lệch
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        self._raw = self.rfile.read(length) if length else b""
+        self.server.count(method, self.path)
+        self._delay()
+        fault = self.server.take_fault(self.path)
+        if fault is not None:
+            status, retry_after = fault
+            return self._send(status, {"error": "injected"}, {"Retry-After": str(retry_after)} if retry_after is not None else None)
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        segs = [s for s in parts.path.split("/") if s]
+        with self.cloud.lock:
+            try:
+                if segs[:3] == ["v3", "auth", "tokens"]:
+                    return self._keystone()
+                if segs and segs[0] == "compute":
+                    return self._nova(method, segs[1:], query)
+                if segs and segs[0] == "image":
+                    return self._glance(segs[1:], query)
+                if segs and segs[0] == "network":
+                    return self._neutron(method, segs[2:], query)
+                if segs and segs[0] == "load-balancer":
+                    return self._octavia(method, segs[3:], query)
+            except (KeyError, ValueError, json.JSONDecodeError) as e:
+                return self._send(400, {"error": str(e)})
+        return self._send(404, {"error": "not found"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+    # ---- Keystone ----
+
+    def _keystone(self):
+        self._body()
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        catalog = [{"type": t, "endpoints": [{"interface": "public", "url": f"{base}/{t}"}]}
+                   for t in ("compute", "image", "network", "load-balancer")]
+        body = {"token": {"expires_at": _now_iso(time.time() + 3600), "catalog": catalog}}
+        return self._send(201, body, {"X-Subject-Token": uuid.uuid4().hex})
+
+    # ---- Nova ----
+
+    def _nova(self, method, segs, query):
+        cloud = self.cloud
+        if segs == ["flavors"] and method == "GET":
+            return self._send(200, self._page("flavors", cloud.db["flavors"].values(), query, "/flavors"))
+        if segs[:1] != ["servers"]:
+            return self._send(404, {})
+        if method == "GET" and len(segs) <= 2 and (len(segs) == 1 or segs[1] == "detail"):
+            items = list(cloud.db["servers"].values())
+            if "changes-since" in query:
+                since = _parse_iso(query["changes-since"][0])
+                items = [s for s in items if _parse_iso(s["updated"]) >= since]
+                items += [s for s in cloud.deleted_servers.values() if _parse_iso(s["updated"]) >= since]
+            if "name" in query:
+                items = [s for s in items if re.search(query["name"][0], s["name"])]
+            if "reservation_id" in query:
+                items = [s for s in items if s["reservation_id"] == query["reservation_id"][0]]
+            if len(segs) == 1:
+                items = [{"id": s["id"], "name": s["name"]} for s in items]
+            return self._send(200, self._page("servers", items, query, "/servers"))
+        if method == "GET" and len(segs) == 2:
+            server = cloud.db["servers"].get(segs[1])
+            return self._send(200, {"server": server}) if server else self._send(404, {"itemNotFound": {}})
+        if method == "PUT" and len(segs) == 2:
+            server = cloud.db["servers"].get(segs[1])
+            if server is None:
+                return self._send(404, {"itemNotFound": {}})
+            server.update({k: v for k, v in self._body()["server"].items() if k == "name"}, updated=_now_iso())
+            return self._send(200, {"server": server})
+        if method == "POST" and len(segs) == 1:
+            spec = self._body()["server"]
+            count = int(spec.get("max_count", 1))
+            reservation_id = f"r-{uuid.uuid4().hex[:8]}"
+            created = [cloud._new_server({**spec, "name": spec["name"] if count == 1 else f"{spec['name']}-{i + 1}"},
+                                         reservation_id=reservation_id) for i in range(count)]
+            if spec.get("return_reservation_id"):
+                return self._send(202, {"reservation_id": reservation_id})
+            return self._send(202, {"server": {"id": created[0]["id"], "links": []}})
+        if method == "POST" and len(segs) == 3 and segs[2] == "action":
+            body = self._body()
+            if segs[1] not in cloud.db["servers"]:
+                return self._send(404, {})
+            if "os-stop" in body:
+                cloud.db["servers"][segs[1]].update(status="SHUTOFF", updated=_now_iso())
+            elif "os-start" in body:
+                cloud.db["servers"][segs[1]].update(status="ACTIVE", updated=_now_iso())
+            elif "pause" in body:
+                cloud.db["servers"][segs[1]].update(status="PAUSED", updated=_now_iso())
+            elif "unpause" in body:
+                cloud.db["servers"][segs[1]].update(status="ACTIVE", updated=_now_iso())
+            return self._send(202)
+        if method == "DELETE" and len(segs) == 2:
+            return self._send(204) if cloud.delete_server(segs[1]) else self._send(404, {})
+        return self._send(404, {})
+
+    # ---- Glance ----
+
+    def _glance(self, segs, query):
+        if segs != ["v2", "images"]:
+            return self._send(404, {})
+        page = self._page("images", self.cloud.db["images"].values(), query, "/v2/images")
+        body = {"images": page["images"]}
+        if page["images_links"]:
+            body["next"] = page["images_links"][0]["href"]
+        return self._send(200, body)
+
+    # ---- Neutron ----
+
+    def _neutron(self, method, segs, query):
+        cloud = self.cloud
+        if not segs or segs[0] not in NEUTRON:
+            return self._send(404, {})
+        kind = NEUTRON[segs[0]]
+        key, one = kind, SINGULAR[kind]
+        db = cloud.db[kind]
+        if method == "GET" and len(segs) == 1:
+            items = self._filter(db.values(), query)
+            return self._send(200, self._page(key, items, query, f"/v2.0/{segs[0]}"))
+        if method == "GET" and len(segs) == 2:
+            item = db.get(segs[1])
+            if item and "fields" in query:
+                item = {f: item.get(f) for f in query["fields"]}
+            return self._send(200, {one: item}) if item else self._send(404, {"NeutronError": {}})
+        if method == "POST" and len(segs) == 1:
+            body = self._body()
+            if key in body:
+                # Bulk create: cả lô hoặc không gì cả
+                return self._send(201, {key: [cloud.add(kind, {"status": "ACTIVE", **spec}) for spec in body[key]]})
+            return self._send(201, {one: cloud.add(kind, {"status": "ACTIVE", **body[one]})})
+        if method == "PUT" and len(segs) == 3 and kind == "routers":
+            body = self._body()
+            subnet = cloud.db["subnets"].get(body.get("subnet_id"))
+            if segs[1] not in db or subnet is None:
+                return self._send(404, {})
+            if segs[2] == "add_router_interface":
+                port = cloud._router_port(segs[1], subnet)
+                return self._send(200, {"id": segs[1], "subnet_id": subnet["id"], "port_id": port["id"]})
+            if segs[2] == "remove_router_interface":
+                for port_id in [p["id"] for p in cloud.db["ports"].values()
+                                if p["device_id"] == segs[1] and p["fixed_ips"][0]["subnet_id"] == subnet["id"]]:
+                    del cloud.db["ports"][port_id]
+                return self._send(200, {"id": segs[1], "subnet_id": subnet["id"]})
+        if method == "DELETE" and len(segs) == 2:
+            if db.pop(segs[1], None) is None:
+                return self._send(404, {})
+            if kind == "networks":
+                for subnet_id in [s["id"] for s in cloud.db["subnets"].values() if s["network_id"] == segs[1]]:
+                    del cloud.db["subnets"][subnet_id]
+            return self._send(204)
+        return self._send(404, {})
+
+    # ---- Octavia ----
+
+    def _octavia(self, method, segs, query):
+        cloud = self.cloud
+        if not segs:
+            return self._send(404, {})
+        if segs[0] == "pools" and len(segs) >= 3 and segs[2] == "members":
+            return self._members(method, segs, query)
+        if segs[0] not in OCTAVIA:
+            return self._send(404, {})
+        kind = OCTAVIA[segs[0]]
+        one = SINGULAR[kind]
+        db = cloud.db[kind]
+        view = {"loadbalancers": cloud.lb_view, "pools": cloud.pool_view}.get(kind, lambda i: i)
+        if method == "GET" and len(segs) == 1:
+            items = self._filter([view(i) for i in db.values()], query)
+            return self._send(200, self._page(kind, items, query, f"/v2.0/lbaas/{segs[0]}"))
+        if method == "GET" and len(segs) == 2:
+            item = db.get(segs[1])
+            return self._send(200, {one: view(item)}) if item else self._send(404, {})
+        if method == "GET" and len(segs) == 3 and segs[2] == "stats" and segs[1] in db:
+            stats = {"active_connections": 0, "total_connections": 0, "bytes_in": 0, "bytes_out": 0, "request_errors": 0}
+            return self._send(200, {"stats": {**stats, **cloud.lb_stats.get(segs[1], {})}})
+        if method == "POST" and len(segs) == 1:
+            spec = self._body()[one]
+            if kind == "loadbalancers":
+                lb = cloud.add(kind, {**spec, "provisioning_status": "PENDING_CREATE", "operating_status": "OFFLINE",
+                                      "vip_address": "10.255.0.10"})
+                cloud.later(cloud.lb_time, lambda: lb.update(provisioning_status="ACTIVE", operating_status="ONLINE"))
+                return self._send(201, {one: lb})
+            lb_id = cloud.lb_of(kind, spec)
+            lb = cloud.db["loadbalancers"].get(lb_id)
+            if lb is None:
+                return self._send(404, {})
+            if lb["provisioning_status"] != "ACTIVE":
+                return self._send(409, {"faultstring": f"Load Balancer {lb_id} is immutable"})
+            item = cloud.add(kind, {**spec, "provisioning_status": "ACTIVE"})
+            if kind == "listeners":
+                item.setdefault("loadbalancer_id", lb_id)
+            cloud.lb_busy(lb_id)
+            return self._send(201, {one: view(item)})
+        if method == "DELETE" and len(segs) == 2:
+            item = db.get(segs[1])
+            if item is None:
+                return self._send(404, {})
+            lb_id = cloud.lb_of(kind, item)
+            lb = cloud.db["loadbalancers"].get(lb_id)
+            if lb and lb["provisioning_status"] != "ACTIVE":
+                return self._send(409, {"faultstring": f"Load Balancer {lb_id} is immutable"})
+            if kind == "loadbalancers":
+                has_children = any(cloud.lb_of(k, i) == lb_id for k in ("listeners", "pools") for i in cloud.db[k].values())
+                if has_children and query.get("cascade") != ["true"]:
+                    return self._send(400, {"faultstring": "Cannot delete Load Balancer - it has children"})
+                lb["provisioning_status"] = "PENDING_DELETE"
+
+                def gone():
+                    cloud.cascade(lb_id)
+                    cloud.db["loadbalancers"].pop(lb_id, None)
+                cloud.later(cloud.lb_time, gone)
+                return self._send(204)
+            del db[segs[1]]
+            cloud.lb_busy(lb_id)
+            return self._send(204)
+        return self._send(404, {})
+
+    def _members(self, method, segs, query):
+        cloud = self.cloud
+        pool = cloud.db["pools"].get(segs[1])
+        if pool is None:
+            return self._send(404, {})
+        lb = cloud.db["loadbalancers"].get(cloud.lb_of("pools", pool))
+        members = {i: m for i, m in cloud.db["members"].items() if m["pool_id"] == pool["id"]}
+        if method == "GET" and len(segs) == 3:
+            return self._send(200, self._page("members", self._filter(members.values(), query), query, ""))
+        if method == "GET" and len(segs) == 4:
+            return self._send(200, {"member": members[segs[3]]}) if segs[3] in members else self._send(404, {})
+        if lb and lb["provisioning_status"] != "ACTIVE":
+            return self._send(409, {"faultstring": "immutable"})
+        if method == "PUT" and len(segs) == 3:
+            # Batch update: danh sách mới thay toàn bộ member của pool
+            for member_id in members:
+                del cloud.db["members"][member_id]
+            for spec in self._body()["members"]:
+                cloud.add("members", {**spec, "pool_id": pool["id"], "operating_status": "ONLINE"})
+            cloud.lb_busy(lb["id"])
+            return self._send(202)
+        if method == "PUT" and len(segs) == 4 and segs[3] in members:
+            members[segs[3]].update(self._body()["member"])
+            cloud.lb_busy(lb["id"])
+            return self._send(200, {"member": members[segs[3]]})
+        if method == "POST" and len(segs) == 3:
+            member = cloud.add("members", {**self._body()["member"], "pool_id": pool["id"], "operating_status": "ONLINE"})
+            cloud.lb_busy(lb["id"])
+            return self._send(201, {"member": member})
+        if method == "DELETE" and len(segs) == 4 and segs[3] in members:
+            del cloud.db["members"][segs[3]]
+            cloud.lb_busy(lb["id"])
+            return self._send(204)
+        return self._send(404, {})
+
+
+class FakeOpenStack(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, cloud, latency=0.0, jitter=0.0):
+        super().__init__(address, Handler)
+        self.cloud = cloud
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = Counter()
+        self.faults = {}
+        self._calls_lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Client đóng kết nối giữa chừng (vd. job nền bị hủy khi tắt) là chuyện bình thường khi đo tải
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def auth_url(self):
+        return f"http://127.0.0.1:{self.server_port}/v3/auth/tokens"
+
+    def inject(self, prefix, status, count=None, retry_after=None):
+        # Lỗi giả cho các request có path bắt đầu bằng prefix (vd. "/compute"): count lần, None = mãi đến khi clear_faults()
+        with self._calls_lock:
+            self.faults[prefix] = [status, count, retry_after]
+
+    def clear_faults(self):
+        with self._calls_lock:
+            self.faults.clear()
+
+    def take_fault(self, path):
+        with self._calls_lock:
+            for prefix, fault in self.faults.items():
+                if path.startswith(prefix):
+                    status, count, retry_after = fault
+                    if count is not None:
+                        if count <= 0:
+                            continue
+                        fault[1] -= 1
+                    return status, retry_after
+        return None
+
+    def count(self, method, path):
+        with self._calls_lock:
+            self.calls[(method, urlsplit(path).path)] += 1
+
+    def total_calls(self):
+        with self._calls_lock:
+            return sum(self.calls.values())
+
+    def reset_calls(self):
+        with self._calls_lock:
+            self.calls.clear()
+
+
+def start(port=0, latency=0.0, jitter=0.0, **sizes):
+    server = FakeOpenStack(("127.0.0.1", port), Cloud(**sizes), latency=latency, jitter=jitter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenStack giả lập cho benchmark")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0, help="độ trễ mỗi request (ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="dao động độ trễ ± (ms)")
+    parser.add_argument("--servers", type=int, default=100)
+    parser.add_argument("--networks", type=int, default=10)
+    parser.add_argument("--lbs", type=int, default=2)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--build-time", type=float, default=0.5, help="thời gian BUILD -> ACTIVE (s)")
+    parser.add_argument("--lb-time", type=float, default=0.5, help="thời gian PENDING_* -> ACTIVE của LB (s)")
+    args = parser.parse_args()
+    server = start(args.port, args.latency / 1000, args.jitter / 1000, servers=args.servers, networks=args.networks,
+                   lbs=args.lbs, images=args.images, build_time=args.build_time, lb_time=args.lb_time)
+    print(f"Fake OpenStack tại {server.auth_url}")
+    print(f"Chạy API: OS_AUTH_URL={server.auth_url} uvicorn App:app")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
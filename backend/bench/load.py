@@ -0,0 +1,165 @@
+# Đo tải các endpoint của API trên OpenStack giả lập (bench/fake_openstack.py), không cần cloud thật.
+# Báo throughput, p50/p95/p99, số lỗi và số lời gọi upstream trung bình mỗi request theo từng mức đồng thời.
+# Chạy: cd backend && python bench/load.py --scenarios vms,topology --concurrency 1,10,50 --requests 200 --latency 20
+#   --url http://127.0.0.1:8000 để bắn vào API đang chạy (khi đó không đếm được lời gọi upstream)
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_openstack
+
+_names = itertools.count()
+
+# tên -> (method, path, hàm sinh body)
+SCENARIOS = {
+    "vms": ("GET", "/vms", None),
+    "vms_page": ("GET", "/vms?limit=50", None),
+    "networks": ("GET", "/networks", None),
+    "topology": ("GET", "/topology", None),
+    "pool_stats": ("GET", "/pool_stats", None),
+    "create_vm": ("POST", "/create_vm", lambda: {"name": f"bench-{next(_names)}", "network_name": "net-0"}),
+    "create_vm_bg": ("POST", "/create_vm?background=true",
+                     lambda: {"name": f"bench-{next(_names)}", "network_name": "net-0"}),
+    "create_networks": ("POST", "/create_networks", lambda: {"networks": [
+        {"name": f"bench-net-{i}", "cidr": f"172.{16 + i // 1024 % 16}.{i // 4 % 256}.{i % 4 * 64}/26"}
+        for i in [next(_names) for _ in range(4)]
+    ]}),
+}
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(p / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_level(client, scenario, concurrency, total):
+    method, path, body = SCENARIOS[scenario]
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                resp = await client.request(method, path, json=body() if body else None)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def print_row(row):
+    calls = row.get("upstream_per_request")
+    print(f"{row['scenario']:<16} c={row['concurrency']:<4} {row['rps']:>9.1f} req/s  "
+          f"p50={row['p50_ms']:>8.1f}ms p95={row['p95_ms']:>8.1f}ms p99={row['p99_ms']:>8.1f}ms  "
+          f"lỗi={row['errors']:<4} upstream/req={'-' if calls is None else f'{calls:.2f}'}")
+
+
+async def bench(args, client, fake=None):
+    rows = []
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            if fake is not None:
+                fake.reset_calls()
+            # Log tiếng Việt của các module in ra mỗi request -> tắt khi đo để không đo tốc độ in
+            quiet = contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext()
+            with quiet:
+                row = await run_level(client, scenario, concurrency, args.requests)
+            if fake is not None:
+                row["upstream_calls"] = fake.total_calls()
+                row["upstream_per_request"] = round(row["upstream_calls"] / args.requests, 2)
+            rows.append(row)
+            print_row(row)
+    return rows
+
+
+async def main_async(args):
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            return await bench(args, client)
+
+    fake = fake_openstack.start(latency=args.latency / 1000, jitter=args.jitter / 1000, servers=args.servers,
+                                networks=args.networks, lbs=args.lbs, build_time=args.build_time,
+                                lb_time=args.build_time)
+    os.environ["OS_AUTH_URL"] = fake.auth_url
+    import Identity
+    import App
+    Identity.AUTH_URL = fake.auth_url
+    Identity.TOKEN_FILE = os.path.join(tempfile.mkdtemp(), "token.json")
+    print(f"Fake OpenStack {fake.auth_url}: {args.servers} servers, {args.networks} networks, {args.lbs} LB, "
+          f"độ trễ {args.latency}±{args.jitter}ms")
+
+    transport = httpx.ASGITransport(app=App.app)
+    with contextlib.redirect_stdout(io.StringIO()):
+        lifespan = App.lifespan(App.app)
+        await lifespan.__aenter__()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            return await bench(args, client, fake)
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await lifespan.__aexit__(None, None, None)
+        fake.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo tải API trên OpenStack giả lập")
+    parser.add_argument("--scenarios", default="vms,networks,topology",
+                        type=lambda s: s.split(","), help=f"trong: {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,10,50", type=lambda s: [int(c) for c in s.split(",")])
+    parser.add_argument("--requests", type=int, default=200, help="số request mỗi mức đồng thời")
+    parser.add_argument("--latency", type=float, default=20, help="độ trễ mỗi lời gọi upstream (ms)")
+    parser.add_argument("--jitter", type=float, default=5, help="dao động độ trễ ± (ms)")
+    parser.add_argument("--servers", type=int, default=500)
+    parser.add_argument("--networks", type=int, default=20)
+    parser.add_argument("--lbs", type=int, default=5)
+    parser.add_argument("--build-time", type=float, default=0.5, help="thời gian BUILD/PENDING -> ACTIVE (s)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--url", help="bắn vào API đang chạy thay vì chạy App trong tiến trình")
+    parser.add_argument("--json", help="ghi kết quả ra file JSON để so sánh giữa các lần chạy")
+    parser.add_argument("--verbose", action="store_true", help="giữ log của các module")
+    args = parser.parse_args()
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"scenario không tồn tại: {', '.join(unknown)}")
+
+    rows = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k != "json"}, "results": rows}, f, indent=2)
+        print(f"💾 Đã ghi {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Đo số byte tải về khi tra tên -> ID: quét cả danh sách (cách cũ) so với lọc ở server.
+# Chạy: cd backend && python bench/lookup_bytes.py [số_server] [số_subnet]
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Identity
+import Client
+import Resolver
+
+N_SERVERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+N_SUBNETS = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+
+def _server(i):
+    return {
+        "id": f"server-{i:08d}",
+        "name": f"vm-{i}",
+        "status": "ACTIVE",
+        "image": {"id": "image-centos7"},
+        "flavor": {"id": "flavor-d10xs1"},
+        "key_name": "lab",
+        "addresses": {"lab-net": [{"addr": f"10.0.{i // 250}.{i % 250}", "version": 4}]},
+        "metadata": {"owner": "nt533", "role": "web"},
+        "created": "2025-10-01T00:00:00Z",
+    }
+
+
+def _subnet(i):
+    return {
+        "id": f"subnet-{i:08d}",
+        "name": f"subnet-{i}",
+        "network_id": f"net-{i:08d}",
+        "cidr": f"10.{i // 250}.{i % 250}.0/24",
+        "gateway_ip": f"10.{i // 250}.{i % 250}.1",
+        "allocation_pools": [{"start": f"10.{i // 250}.{i % 250}.2", "end": f"10.{i // 250}.{i % 250}.254"}],
+        "ip_version": 4,
+        "enable_dhcp": True,
+    }
+
+
+DATA = {
+    "/compute/servers/detail": ("servers", [_server(i) for i in range(N_SERVERS)]),
+    "/network/v2.0/subnets": ("subnets", [_subnet(i) for i in range(N_SUBNETS)]),
+    "/network/v2.0/routers": ("routers", [{"id": f"router-{i}", "name": f"router-{i}", "status": "ACTIVE"} for i in range(50)]),
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, obj, headers=None):
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        catalog = [
+            {"type": t, "endpoints": [{"interface": "public", "url": f"{base}/{t}"}]}
+            for t in ("compute", "network")
+        ]
+        self._send(201, {"token": {"expires_at": "2099-01-01T00:00:00Z", "catalog": catalog}},
+                   {"X-Subject-Token": "bench-token"})
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        key, items = DATA[parts.path]
+        if "name" in query:
+            name = query["name"][0]
+            if key == "servers":
+                items = [s for s in items if re.search(name, s["name"])]
+            else:
+                items = [s for s in items if s["name"] == name]
+        if "fields" in query:
+            items = [{f: s[f] for f in query["fields"]} for s in items]
+        self._send(200, {key: items})
+
+
+def measure(label, fn):
+    before = sum(s["bytes_in"] for s in Client.pool_stats().values())
+    fn()
+    after = sum(s["bytes_in"] for s in Client.pool_stats().values())
+    print(f"{label:<45} {after - before:>12,} bytes")
+    return after - before
+
+
+def main():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    Identity.AUTH_URL = f"http://127.0.0.1:{httpd.server_port}/v3/auth/tokens"
+    Identity.TOKEN_FILE = os.path.join(tempfile.mkdtemp(), "token.json")
+    Identity.get_token_and_catalog()
+
+    target = f"vm-{N_SERVERS // 2}"
+    print(f"{N_SERVERS} servers, {N_SUBNETS} subnets")
+
+    def old_delete_lookup():
+        servers = Client.get("compute", "/servers/detail").json()["servers"]
+        next(s for s in servers if s["name"] == target)
+
+    def old_add_interface_lookup():
+        routers = Client.get("network", "/v2.0/routers").json()["routers"]
+        next(r for r in routers if r["name"] == "router-1")
+        subnets = Client.get("network", "/v2.0/subnets").json()["subnets"]
+        next(s for s in subnets if s["name"] == f"subnet-{N_SUBNETS - 1}")
+
+    def new_delete_lookup():
+        assert Resolver.resolve_id("servers", target)
+
+    def new_add_interface_lookup():
+        assert Resolver.resolve_id("routers", "router-1")
+        assert Resolver.resolve_id("subnets", f"subnet-{N_SUBNETS - 1}")
+
+    old = measure("delete_instance lookup (full /servers/detail)", old_delete_lookup)
+    new = measure("delete_instance lookup (?name=^...$)", new_delete_lookup)
+    print(f"{'':<45} x{old / new:,.0f} less")
+    old = measure("add_interface lookup (full lists)", old_add_interface_lookup)
+    new = measure("add_interface lookup (?name=&fields=)", new_add_interface_lookup)
+    print(f"{'':<45} x{old / new:,.0f} less")
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# Kiểm tra /watch khi client kết nối lại với Last-Event-ID trên OpenStack giả lập:
+# id cùng epoch còn trong lịch sử -> nhận bù; id vượt quá seq hiện tại, id của tiến trình trước (server khởi động lại)
+# hoặc id dạng số cũ -> nhận ảnh chụp mới, và các sự kiện sau đó vẫn đến (không bị lọc bởi seq cũ).
+# Chạy: cd backend && python bench/watch_check.py
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_openstack
+import Identity
+import Watch
+
+TIMEOUT = 5
+
+_failures = []
+
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label}{f' ({detail})' if detail and not ok else ''}")
+    if not ok:
+        _failures.append(label)
+
+
+class _Request:
+    # Đủ cho _watch_events: client không bao giờ tự ngắt, bài kiểm tra đóng generator khi xong
+    async def is_disconnected(self):
+        return False
+
+
+def _parse(chunk):
+    lines = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return lines["id"], json.loads(lines["data"])
+
+
+async def _next(stream):
+    # Bỏ qua keepalive, trả về (id, sự kiện)
+    while True:
+        chunk = await asyncio.wait_for(stream.__anext__(), TIMEOUT)
+        if not chunk.startswith(":"):
+            return _parse(chunk)
+
+
+async def connect(App, last_event_id):
+    stream = App._watch_events(_Request(), ["servers"], Watch.parse_event_id(last_event_id))
+    return stream, await _next(stream)
+
+
+async def check_reconnect(fake, App):
+    servers = iter(range(1000))
+
+    def add_server():
+        fake.cloud._new_server({"name": f"watch-{next(servers)}", "networks": []}, status="ACTIVE")
+
+    stream, (first_id, first) = await connect(App, None)
+    check("kết nối mới -> ảnh chụp", first["type"] == "snapshot")
+    check("id sự kiện mang epoch của tiến trình", first_id == Watch.event_id(first["seq"]), first_id)
+    add_server()
+    event_id, event = await _next(stream)
+    check("sự kiện added sau ảnh chụp", event["type"] == "added", event["type"])
+    await stream.aclose()
+
+    # Cùng epoch, còn trong lịch sử -> chỉ nhận bù phần bị lỡ
+    add_server()
+    await asyncio.sleep(Watch.INTERVAL * 3)
+    stream, (_, missed) = await connect(App, event_id)
+    check("id còn trong lịch sử -> nhận bù, không gửi ảnh chụp", missed["type"] == "added", missed["type"])
+    await stream.aclose()
+
+    current = Watch.stats()["seq"]
+    cases = [
+        ("id vượt quá seq hiện tại", Watch.event_id(current + 50)),
+        ("id của tiến trình trước", f"00000000-{current}"),
+        ("id dạng số cũ", str(current + 50)),
+    ]
+    for label, stale_id in cases:
+        stream, (_, first) = await connect(App, stale_id)
+        check(f"{label} -> ảnh chụp mới", first["type"] == "snapshot", first["type"])
+        add_server()
+        _, event = await _next(stream)
+        check(f"{label} -> sự kiện mới vẫn đến", event["type"] == "added" and event["seq"] > first["seq"],
+              f"{event['type']} seq={event['seq']}")
+        await stream.aclose()
+
+
+def main():
+    fake = fake_openstack.start(servers=5, networks=2, lbs=0)
+    os.environ["OS_AUTH_URL"] = fake.auth_url
+    import App
+    Identity.AUTH_URL = fake.auth_url
+    Identity.TOKEN_FILE = os.path.join(tempfile.mkdtemp(), "token.json")
+    Watch.INTERVAL = 0.1
+
+    async def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            lifespan = App.lifespan(App.app)
+            await lifespan.__aenter__()
+        try:
+            await check_reconnect(fake, App)
+        finally:
+            with contextlib.redirect_stdout(io.StringIO()):
+                await lifespan.__aexit__(None, None, None)
+    try:
+        asyncio.run(run())
+    finally:
+        fake.shutdown()
+    if _failures:
+        print(f"❌ {len(_failures)} kiểm tra lỗi")
+        sys.exit(1)
+    print("✅ /watch gửi ảnh chụp mới khi Last-Event-ID không còn hợp lệ")
+
+
+if __name__ == "__main__":
+    main()